@@ -0,0 +1,77 @@
+# benchmarks/bench_config.py
+
+from pathlib import Path
+
+from harness import Bench, benchmark
+
+from compose_generator import build_config, render_all, render_compose, render_env
+
+
+def _raw(root: Path, **extra: str) -> dict:
+    raw = {
+        'mode': 'clean',
+        'backups_dir': str(root / 'backups'),
+        'projects_dir': str(root / 'projects'),
+        'tags_dir': str(root / 'tags'),
+        'http_port': '8088',
+        'https_port': '8043',
+        'admin_user': 'admin',
+        'admin_pass': 'password',
+        'gateway_name': 'bench-gateway',
+        'image': 'inductiveautomation/ignition:8.1',
+    }
+    raw.update(extra)
+    return raw
+
+
+def _populate(root: Path) -> None:
+    """
+    A backup, project and tag export like the GUI leaves behind.
+    """
+    (root / 'backups').mkdir()
+    (root / 'backups' / 'base.gwbk').write_bytes(b'\0' * 4096)
+    project = root / 'projects' / 'Bench'
+    project.mkdir(parents=True)
+    (project / 'project.json').write_text('{"title": "Bench"}')
+    (root / 'tags').mkdir()
+    (root / 'tags' / 'tags.json').write_text('{"tags": []}')
+
+
+@benchmark('config')
+def build(b: Bench) -> None:
+    root = b.scratch('config')
+    _populate(root)
+    n = b.profile.renders
+    clean = _raw(root)
+    full = _raw(root, mode='backup', backup_name='base.gwbk', project_name='Bench', tag_name='tags.json')
+
+    def _build(raw: dict) -> None:
+        for _ in range(n):
+            build_config(raw)
+
+    b.measure('config.build_config.clean', lambda: _build(clean), items=n, unit='configs')
+    b.measure('config.build_config.backup_project_tags', lambda: _build(full), items=n, unit='configs')
+
+
+@benchmark('config')
+def render(b: Bench) -> None:
+    out = b.scratch('render')
+    n = b.profile.renders
+    cfg = build_config(_raw(out))
+    ports = iter(range(10_000, 10_000 + 100 * n * b.profile.repeat))
+
+    def _changed() -> None:
+        # A different port every time, so the files are really rewritten
+        for _ in range(n):
+            cfg.http_port = next(ports)
+            render_compose(cfg, out)
+            render_env(cfg, out)
+
+    def _unchanged() -> None:
+        for _ in range(n):
+            render_all(cfg, out)
+
+    b.measure('config.render.changed', _changed, items=n, unit='renders')
+    cfg.http_port = 8088
+    render_all(cfg, out)
+    b.measure('config.render.unchanged', _unchanged, items=n, unit='renders')
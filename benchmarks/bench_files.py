@@ -0,0 +1,81 @@
+# benchmarks/bench_files.py
+
+import os
+import shutil
+import zipfile
+from pathlib import Path
+
+from harness import Bench, benchmark
+
+import utils
+
+_MB = 1024 * 1024
+
+
+def make_project_zip(path: Path, files: int) -> Path:
+    """
+    A synthetic Ignition project export: project.json plus `files` small
+    resources spread over nested Perspective/Vision/script folders.
+    """
+    if path.is_file():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    kinds = ('com.inductiveautomation.perspective/views', 'com.inductiveautomation.vision/windows',
+             'ignition/script-python')
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        zf.writestr('project.json', '{"title": "Bench", "enabled": true}')
+        for i in range(files - 1):
+            folder = f"{kinds[i % len(kinds)]}/group{i % 97}/item{i // 97 % 50}"
+            body = ('{"name": "resource %d", "props": {"value": %d}}\n' % (i, i)) * 8
+            zf.writestr(f"{folder}/resource{i}.json", body)
+    return path
+
+
+def make_backup(path: Path, megabytes: int) -> Path:
+    """
+    A .gwbk of the given size with incompressible, non-repeating blocks.
+    """
+    if path.is_file() and path.stat().st_size == megabytes * _MB:
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    block = os.urandom(_MB)
+    with open(path, 'wb') as f:
+        for i in range(megabytes):
+            f.write(i.to_bytes(8, 'little') + block[8:])
+    return path
+
+
+@benchmark('files')
+def unzip_project(b: Bench) -> None:
+    projects = b.scratch('projects')
+    utils.PROJECTS_DIR = projects
+    for files in b.profile.zip_files:
+        archive = make_project_zip(b.workdir / 'zips' / f"Bench{files}.zip", files)
+        dest = projects / archive.stem
+
+        def _clear() -> None:
+            shutil.rmtree(dest, ignore_errors=True)
+
+        b.measure(f"files.unzip_project.cold.{files}", lambda: utils.unzip_project(str(archive)),
+                  items=files, unit='files', setup=_clear, files=files)
+        # Everything already extracted: the incremental sync should skip it all
+        b.measure(f"files.unzip_project.unchanged.{files}", lambda: utils.unzip_project(str(archive)),
+                  items=files, unit='files', files=files)
+
+
+@benchmark('files')
+def save_backup(b: Bench) -> None:
+    for megabytes in b.profile.backup_mb:
+        src = make_backup(b.workdir / 'sources' / f"bench{megabytes}.gwbk", megabytes)
+        rounds = iter(range(1_000_000))
+
+        def _fresh_store() -> None:
+            shutil.rmtree(b.workdir / 'backups', ignore_errors=True)
+            # A new directory each round, so no cached store sees the file
+            utils.BACKUPS_DIR = b.scratch(f"backups/{next(rounds)}")
+
+        b.measure(f"files.save_backup.cold.{megabytes}mb", lambda: utils.save_backup(str(src)),
+                  items=megabytes, unit='MB', setup=_fresh_store, megabytes=megabytes)
+        b.measure(f"files.save_backup.reimport.{megabytes}mb", lambda: utils.save_backup(str(src)),
+                  items=megabytes, unit='MB', megabytes=megabytes)
+        os.unlink(src)
@@ -0,0 +1,121 @@
+# benchmarks/bench_logs.py
+
+import os
+import threading
+import time
+from typing import List
+
+from harness import Bench, benchmark
+
+from log_filter import LogFilter, parse_spec
+from log_watcher import FileWatcher
+
+# Wait at most this long for a consumer to catch up before giving up
+_DRAIN_TIMEOUT = 120.0
+
+
+def sample_lines(count: int) -> List[str]:
+    """
+    Gateway-like container output: mostly INFO, some DEBUG/WARN/ERROR,
+    a stack trace now and then.
+    """
+    levels = 'IIIIIIDDWE'
+    loggers = ('t.p.TagProvider', 'gateway.Router', 'perspective.Session', 'o.e.j.s.Server', 'tags.Subscriptions')
+    lines = []
+    for i in range(count):
+        if i % 250 == 249:
+            lines.append(f"\tat com.inductiveautomation.ignition.Thing.method{i % 7}(Thing.java:{i % 900})")
+            continue
+        lvl = levels[i % len(levels)]
+        lines.append(
+            f"ignition-dev  | jvm 1    | 2024/05/10 14:22:{i % 60:02d} | {lvl} "
+            f"[{loggers[i % len(loggers)]:<18}] [14:22:{i % 60:02d}]: message number {i} with some payload"
+        )
+    return lines
+
+
+@benchmark('logs')
+def file_watcher(b: Bench) -> None:
+    n = b.profile.watcher_lines
+    data = ('\n'.join(sample_lines(n)) + '\n').encode('utf-8')
+    root = b.scratch('watch')
+    path = root / 'wrapper.log'
+    state = {}
+
+    def _setup() -> None:
+        path.write_bytes(b'')
+        received = [0]
+        done = threading.Event()
+
+        def on_batch(_path, lines) -> None:
+            received[0] += len(lines)
+            if received[0] >= n:
+                done.set()
+
+        watcher = FileWatcher(path, on_batch=on_batch, poll_interval=0.05)
+        watcher.start()
+        time.sleep(0.2)
+        state.update(watcher=watcher, done=done)
+
+    def _tail() -> None:
+        # Appended in 64 KiB writes, like a busy wrapper log
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        try:
+            for off in range(0, len(data), 64 * 1024):
+                os.write(fd, data[off:off + 64 * 1024])
+        finally:
+            os.close(fd)
+        ok = state['done'].wait(_DRAIN_TIMEOUT)
+        state['watcher'].stop()
+        if not ok:
+            raise RuntimeError("FileWatcher did not deliver every line")
+
+    b.measure('logs.file_watcher.tail', _tail, items=n, unit='lines', setup=_setup, lines=n)
+
+
+@benchmark('logs')
+def log_filter(b: Bench) -> None:
+    lines = sample_lines(b.profile.watcher_lines)
+    for label, spec in (
+        ('off', parse_spec()),
+        ('warn', parse_spec('WARN')),
+        ('loggers_regex', parse_spec('INFO', 'tags.*,gateway.*', '*Server*', 'payload,!number 1')),
+    ):
+        f = LogFilter(spec)
+        b.measure(f"logs.log_filter.{label}", lambda: [f.accept(line) for line in lines],
+                  items=len(lines), unit='lines')
+
+
+@benchmark('logs')
+def console_append(b: Bench) -> None:
+    """
+    append_log from a reader thread until everything is rendered by the
+    console's frame timer, in an offscreen Qt application.
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError as e:
+        b.skip('logs.console_append', f"PyQt5 not available ({e})")
+        return
+    import gui
+
+    app = QApplication.instance() or QApplication([])
+    window = gui.MainWindow()
+    n = b.profile.console_lines
+    lines = sample_lines(n)
+
+    def _append() -> None:
+        producer = threading.Thread(target=lambda: [window.append_log(line) for line in lines])
+        producer.start()
+        deadline = time.monotonic() + _DRAIN_TIMEOUT
+        while producer.is_alive() or len(window.log_buffer):
+            app.processEvents()
+            if time.monotonic() > deadline:
+                raise RuntimeError("Console did not drain")
+        producer.join()
+        window._flush_log()
+        app.processEvents()
+
+    b.measure('logs.console_append', _append, items=n, unit='lines', setup=window.clear_log)
+    window.close()
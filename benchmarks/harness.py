@@ -0,0 +1,267 @@
+# benchmarks/harness.py
+
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Directories
+BASE_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = BASE_DIR / 'src'
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+# The application modules import each other flat, as when run from src/
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+RESULTS_VERSION = 1
+DEFAULT_THRESHOLD = 0.10
+
+
+@dataclass(frozen=True)
+class Profile:
+    """
+    Workload sizes. `quick` finishes in well under a minute; `full` is the
+    one to record baselines with.
+    """
+    name: str
+    repeat: int
+    zip_files: Tuple[int, ...]
+    backup_mb: Tuple[int, ...]
+    watcher_lines: int
+    console_lines: int
+    renders: int
+
+
+PROFILES = {
+    'quick': Profile('quick', repeat=3, zip_files=(10_000,), backup_mb=(256,),
+                     watcher_lines=200_000, console_lines=100_000, renders=200),
+    'full': Profile('full', repeat=5, zip_files=(10_000, 100_000), backup_mb=(1024, 4096),
+                    watcher_lines=2_000_000, console_lines=500_000, renders=2000),
+}
+
+
+@dataclass
+class Result:
+    name: str
+    samples: List[float]
+    items: Optional[int] = None
+    unit: str = 'items'
+    params: Dict[str, Any] = field(default_factory=dict)
+    skipped: Optional[str] = None
+    # The benchmark raised; it has no samples and fails the run
+    error: Optional[str] = None
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples) if self.samples else 0.0
+
+    @property
+    def rate(self) -> Optional[float]:
+        if not self.items or not self.median:
+            return None
+        return self.items / self.median
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d.update(median=self.median, min=min(self.samples, default=0.0), rate=self.rate)
+        return d
+
+
+class Bench:
+    """
+    Handed to every benchmark function. Setup happens in the function body;
+    only what runs inside measure() is timed.
+    """
+
+    def __init__(self, profile: Profile, workdir: Path):
+        self.profile = profile
+        self.workdir = workdir
+        self.results: List[Result] = []
+
+    def scratch(self, name: str) -> Path:
+        """
+        A fresh empty directory under the benchmark's work dir.
+        """
+        path = self.workdir / name
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True)
+        return path
+
+    def measure(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        items: Optional[int] = None,
+        unit: str = 'items',
+        repeat: Optional[int] = None,
+        setup: Optional[Callable[[], Any]] = None,
+        **params: Any,
+    ) -> Result:
+        """
+        Time `fn` `repeat` times (after an untimed `setup` each round).
+        """
+        samples = []
+        for _ in range(repeat or self.profile.repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        result = Result(name, samples, items, unit, params)
+        self.results.append(result)
+        _print_result(result)
+        return result
+
+    def skip(self, name: str, reason: str) -> None:
+        result = Result(name, [], skipped=reason)
+        self.results.append(result)
+        print(f"  {name:<40} skipped: {reason}")
+
+    def fail(self, name: str, error: BaseException) -> None:
+        result = Result(name, [], error=f"{type(error).__name__}: {error}")
+        self.results.append(result)
+        print(f"  {name:<40} FAILED: {result.error}")
+
+
+BenchFn = Callable[[Bench], None]
+_REGISTRY: Dict[str, BenchFn] = {}
+
+
+def benchmark(group: str) -> Callable[[BenchFn], BenchFn]:
+    def deco(fn: BenchFn) -> BenchFn:
+        _REGISTRY[f"{group}.{fn.__name__}"] = fn
+        return fn
+    return deco
+
+
+def registered() -> Dict[str, BenchFn]:
+    return dict(_REGISTRY)
+
+
+def _print_result(r: Result) -> None:
+    line = f"  {r.name:<40} {r.median * 1000:10.1f} ms"
+    if r.rate is not None:
+        line += f"  {r.rate:12,.0f} {r.unit}/s"
+    print(line, flush=True)
+
+
+@contextmanager
+def workdir(keep: bool = False) -> Iterator[Path]:
+    """
+    A temporary directory that also holds the application's on-disk
+    caches for the run, so benchmarks neither write into the repository
+    nor start warm from an earlier run.
+    """
+    import compose_generator
+    import project_inventory
+    import project_sync
+
+    path = Path(tempfile.mkdtemp(prefix='ignition-bench-'))
+    cache = path / '.cache'
+    saved = (compose_generator.JINJA_CACHE_DIR, project_inventory.PROJECT_INVENTORY_DIR,
+             project_sync.SYNC_STATE_DIR)
+    compose_generator.JINJA_CACHE_DIR = cache / 'jinja'
+    project_inventory.PROJECT_INVENTORY_DIR = cache / 'projects'
+    project_sync.SYNC_STATE_DIR = cache / 'sync'
+    try:
+        yield path
+    finally:
+        (compose_generator.JINJA_CACHE_DIR, project_inventory.PROJECT_INVENTORY_DIR,
+         project_sync.SYNC_STATE_DIR) = saved
+        if not keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        cp = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=str(BASE_DIR),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+    except OSError:
+        return None
+    return cp.stdout.strip() or None
+
+
+# --- results ---------------------------------------------------------------
+
+def results_document(profile: Profile, results: List[Result]) -> dict:
+    return {
+        'version': RESULTS_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'profile': profile.name,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {r.name: r.to_dict() for r in results},
+    }
+
+
+def save_results(doc: dict, out_dir: Path = RESULTS_DIR) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = doc['created'].replace(':', '').replace('-', '')
+    path = out_dir / f"{stamp}-{doc.get('commit') or 'nocommit'}-{doc['profile']}.json"
+    path.write_text(json.dumps(doc, indent=2), encoding='utf-8')
+    return path
+
+
+def load_results(path: Path) -> dict:
+    return json.loads(Path(path).read_text(encoding='utf-8'))
+
+
+def latest_results(profile: str, exclude: Optional[Path] = None, out_dir: Path = RESULTS_DIR) -> Optional[Path]:
+    candidates = sorted(p for p in out_dir.glob(f"*-{profile}.json") if p != exclude) if out_dir.is_dir() else []
+    return candidates[-1] if candidates else None
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else 0.0
+
+
+def compare(current: dict, baseline: dict) -> List[Comparison]:
+    """
+    Benchmarks measured in both documents (not skipped or failed), with
+    the relative change of the median time. Positive change = slower.
+    """
+    rows = []
+    for name, cur in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base or any(r.get('skipped') or r.get('error') for r in (cur, base)):
+            continue
+        rows.append(Comparison(name, base['median'], cur['median']))
+    return rows
+
+
+def print_comparison(rows: List[Comparison], threshold: float, baseline_label: str) -> List[Comparison]:
+    """
+    Print the table and return the regressions beyond `threshold`.
+    """
+    print(f"\nCompared with {baseline_label} (threshold {threshold:.0%}):")
+    regressions = []
+    for row in rows:
+        flag = ''
+        if row.change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(row)
+        elif row.change < -threshold:
+            flag = '  faster'
+        print(f"  {row.name:<40} {row.baseline * 1000:10.1f} -> {row.current * 1000:10.1f} ms "
+              f"({row.change:+.1%}){flag}")
+    return regressions
@@ -0,0 +1,88 @@
+# benchmarks/run.py
+"""
+Offline benchmarks for the spin-up hot paths.
+
+    python benchmarks/run.py                      # quick profile, compare with the last quick run
+    python benchmarks/run.py --profile full       # baseline-sized workloads
+    python benchmarks/run.py --only files.unzip   # a subset (substring match)
+    python benchmarks/run.py --baseline benchmarks/results/<file>.json --threshold 0.15
+
+Results are written to benchmarks/results/ as JSON. The exit status is 1
+when any benchmark failed or its median time regressed by more than the
+threshold.
+"""
+
+import argparse
+import logging
+import sys
+import traceback
+from pathlib import Path
+
+import harness
+from harness import DEFAULT_THRESHOLD, PROFILES, Bench
+
+# Registers the benchmarks
+import bench_config  # noqa: F401
+import bench_files  # noqa: F401
+import bench_logs  # noqa: F401
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick')
+    parser.add_argument('--only', action='append', default=[], help="run benchmarks whose name contains this")
+    parser.add_argument('--baseline', type=Path, help="results file to compare with (default: previous run)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown of the median before failing (default: %(default).2f)")
+    parser.add_argument('--no-save', action='store_true', help="do not write a results file")
+    parser.add_argument('--keep-workdir', action='store_true')
+    args = parser.parse_args(argv)
+
+    # The code under test logs a lot at INFO; keep it out of the timings
+    logging.basicConfig(level=logging.WARNING)
+    profile = PROFILES[args.profile]
+    selected = {
+        name: fn for name, fn in harness.registered().items()
+        if not args.only or any(part in name for part in args.only)
+    }
+    if not selected:
+        parser.error("no benchmark matches --only")
+
+    results = []
+    with harness.workdir(keep=args.keep_workdir) as work:
+        print(f"Profile '{profile.name}', work dir {work}")
+        for name, fn in selected.items():
+            print(f"{name}:")
+            bench = Bench(profile, work)
+            try:
+                fn(bench)
+            except Exception as e:
+                traceback.print_exc()
+                bench.fail(name, e)
+            results.extend(bench.results)
+    failures = [r for r in results if r.error]
+
+    doc = harness.results_document(profile, results)
+    saved = None
+    if not args.no_save:
+        saved = harness.save_results(doc)
+        print(f"\nResults written to {saved}")
+
+    status = 0
+    baseline_path = args.baseline or harness.latest_results(profile.name, exclude=saved)
+    if baseline_path is None:
+        print("No baseline to compare with yet.")
+    else:
+        rows = harness.compare(doc, harness.load_results(baseline_path))
+        regressions = harness.print_comparison(rows, args.threshold, baseline_path.name)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}.")
+            status = 1
+    if failures:
+        print(f"\n{len(failures)} benchmark(s) failed: {', '.join(r.name for r in failures)}")
+        status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
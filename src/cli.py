@@ -0,0 +1,403 @@
+# src/cli.py
+"""
+Headless front end: spin up, probe, tail and tear down gateways without Qt.
+
+Every command prints JSON on stdout (`logs` prints one JSON object per
+line); progress goes to stderr. Exit status is 0 on success, 1 when a
+gateway failed or is not ready, 2 for usage errors.
+
+    python src/cli.py up --name line-a --mode backup --backup base.gwbk
+    python src/cli.py wait --name line-a --name line-b --timeout 600
+    python src/cli.py logs --name line-a --query "level:ERROR since:10m"
+    python src/cli.py down --name line-a
+    python src/cli.py diff-tags tags/old.json tags/new.json --delta delta.json
+    python src/cli.py log-usage --prune --max-age-days 7
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import perf
+from docker_backends import DOCKER_BIN_ENV, LogRecord
+from docker_manager import PLAN_CREATE, PLAN_RECREATE, PLAN_RESET, PLAN_TAG_DELTA
+from errors import AppError
+from gateway_logs import DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_TOTAL_BYTES, LogRetention, maintain, usage
+from gateway import (
+    DEFAULT_GATEWAY, apply_plan, base_raw, capture_snapshot, gateway_dir,
+    known_gateways, load_state, manager_for, save_state,
+)
+from images import ImageCache, image_reference
+from log_filter import LogFilter, parse_spec
+from log_index import LogIndex, parse_line
+from logging_config import setup_logging
+from readiness import DEFAULT_DEADLINE
+from snapshots import SnapshotStore
+from spinup import SpinUpRequest, prepare_gateway
+from tag_diff import TagDiff
+from utils import find_free_port, slugify
+
+logger = logging.getLogger(__name__)
+
+# Directories
+BASE_DIR = Path(__file__).resolve().parent.parent
+LOG_FILE = BASE_DIR / 'logs' / 'ignition-admin-cli.log'
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+# Read when --admin-pass is not given, so passwords stay out of `ps`
+ADMIN_PASS_ENV = 'IGNITION_ADMIN_PASS'
+
+
+def _emit(obj) -> None:
+    sys.stdout.write(json.dumps(obj, default=str) + '\n')
+    sys.stdout.flush()
+
+
+def _progress(args: argparse.Namespace) -> Callable[[str], None]:
+    def _say(line: str) -> None:
+        if not args.quiet:
+            print(line, file=sys.stderr, flush=True)
+    return _say
+
+
+def _names(args: argparse.Namespace) -> List[Optional[str]]:
+    return [slugify(n) for n in args.name] if args.name else [None]
+
+
+def _parallel(fn: Callable[[Optional[str]], dict], names: List[Optional[str]]) -> List[dict]:
+    """
+    Run `fn` per gateway concurrently; errors become {'ok': False} entries.
+    """
+    def _safe(name: Optional[str]) -> dict:
+        try:
+            return fn(name)
+        except AppError as e:
+            return {'gateway': name or DEFAULT_GATEWAY, 'ok': False, 'error': str(e)}
+
+    if len(names) == 1:
+        return [_safe(names[0])]
+    with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix='cli') as pool:
+        return list(pool.map(_safe, names))
+
+
+def _probe(name: Optional[str], timeout: float, port: Optional[int] = None) -> dict:
+    port = port or load_state(name).get('http_port')
+    if not port:
+        raise AppError(f"Unknown HTTP port for '{name or DEFAULT_GATEWAY}'; pass --port")
+    result = manager_for(name).probe_gateway(int(port), deadline=timeout)
+    return {
+        'gateway': name or DEFAULT_GATEWAY,
+        'ok': result.ready,
+        'ready': result.ready,
+        'http_port': int(port),
+        'elapsed': round(result.elapsed, 3),
+        'phases': [asdict(m) for m in result.phases],
+        'failure': result.failure,
+    }
+
+
+# --- commands --------------------------------------------------------------
+
+def cmd_up(args: argparse.Namespace) -> int:
+    say = _progress(args)
+    name = slugify(args.name[0]) if args.name else None
+    if args.mode == 'backup' and not args.backup:
+        raise AppError("--mode backup needs --backup")
+    # Keep the ports of an earlier spin-up so its container can be reused
+    previous = load_state(name)
+    http_port = args.http_port or previous.get('http_port') or find_free_port()
+    https_port = args.https_port or previous.get('https_port') or find_free_port()
+    raw = base_raw(
+        mode=args.mode,
+        http_port=str(http_port),
+        https_port=str(https_port),
+        admin_user=args.admin_user,
+        admin_pass=args.admin_pass or os.environ.get(ADMIN_PASS_ENV, ''),
+        gateway_name=args.gateway_name or name or 'dev-gateway',
+        edition=args.edition,
+        timezone=args.timezone,
+        image=image_reference(args.version),
+        container_name=name or DEFAULT_GATEWAY,
+    )
+    limits = {
+        'heap_init_mb': args.heap_init_mb, 'heap_max_mb': args.heap_max_mb,
+        'mem_limit_mb': args.mem_limit_mb, 'cpus': args.cpus,
+    }
+    if any(v is not None for v in limits.values()):
+        raw['resources'] = 'manual'
+        raw.update({k: str(v) for k, v in limits.items() if v is not None})
+    request = SpinUpRequest(
+        raw=raw,
+        http_port=http_port,
+        backup_src=args.backup,
+        project_src=args.project,
+        tag_src=args.tags,
+        use_snapshots=args.snapshots,
+        own_port=previous.get('http_port'),
+        out_dir=gateway_dir(name),
+    )
+    snapshots = SnapshotStore()
+    perf.start_launch('cli', mode=args.mode, image=raw['image'], gateways=1)
+    outcome = 'failed'
+    try:
+        prepared = prepare_gateway(request, ImageCache(), snapshots, on_log=say)
+        cfg = prepared.config
+        save_state(cfg, gateway_dir(name))
+        mgr = manager_for(name, prepared.rendered)
+        plan = apply_plan(mgr, cfg, prepared.snapshot, snapshots, on_line=say, wipe=args.fresh)
+        if plan in (PLAN_CREATE, PLAN_RECREATE, PLAN_RESET, PLAN_TAG_DELTA):
+            say("▶ Starting Docker Compose…")
+            mgr.up_detached()
+        result = {
+            'gateway': name or DEFAULT_GATEWAY,
+            'ok': True,
+            'plan': plan,
+            'http_port': cfg.http_port,
+            'https_port': cfg.https_port,
+            'url': f"http://localhost:{cfg.http_port}/web/",
+            'image': cfg.image_ref,
+            'resources': asdict(cfg.resources),
+            'compose_file': str(mgr.compose_file),
+            'snapshot': prepared.snapshot.key if prepared.snapshot else None,
+            'stages': {k: round(v, 3) for k, v in prepared.timings.items()},
+        }
+        outcome = 'started'
+        if args.wait:
+            ready = _probe(name, args.timeout, cfg.http_port)
+            result.update(ok=ready['ok'], ready=ready['ready'], phases=ready['phases'], failure=ready['failure'])
+            outcome = 'ready' if ready['ok'] else ready['failure']
+            fresh_restore = plan in (PLAN_CREATE, PLAN_RESET) and not prepared.snapshot
+            if ready['ok'] and args.snapshots and cfg.mode == 'backup' and fresh_restore:
+                say("❄ Saving a warm snapshot of the restored gateway (it restarts briefly)…")
+                info = capture_snapshot(mgr, cfg, snapshots)
+                result['snapshot'] = info.key
+    finally:
+        launch = perf.current()
+        if launch is not None:
+            launch.set_meta(outcome=outcome)
+        report = perf.end_launch()
+    result['perf_report'] = str(report) if report else None
+    _emit(result)
+    return EXIT_OK if result['ok'] else EXIT_FAILED
+
+
+def cmd_down(args: argparse.Namespace) -> int:
+    def _down(name: Optional[str]) -> dict:
+        mgr = manager_for(name)
+        if args.keep_data:
+            mgr.stop()
+        else:
+            mgr.down()
+        return {'gateway': name or DEFAULT_GATEWAY, 'ok': True, 'action': 'stop' if args.keep_data else 'down'}
+
+    results = _parallel(_down, _names(args))
+    _emit(results if len(results) > 1 else results[0])
+    return EXIT_OK if all(r['ok'] for r in results) else EXIT_FAILED
+
+
+def cmd_status(args: argparse.Namespace) -> int:
+    def _status(name: Optional[str]) -> dict:
+        info = manager_for(name).container_info()
+        state = load_state(name)
+        return {
+            'gateway': name or DEFAULT_GATEWAY,
+            'ok': True,
+            'state': info.get('state'),
+            'exit_code': info.get('exit_code'),
+            'health': info.get('health'),
+            'started_at': info.get('started_at'),
+            'http_port': state.get('http_port'),
+            'https_port': state.get('https_port'),
+            'image': state.get('image'),
+        }
+
+    names = _names(args) if args.name else [
+        None if n == DEFAULT_GATEWAY else n for n in known_gateways()
+    ]
+    results = _parallel(_status, names) if names else []
+    _emit(results)
+    return EXIT_OK if all(r['ok'] for r in results) else EXIT_FAILED
+
+
+def cmd_wait(args: argparse.Namespace) -> int:
+    results = _parallel(lambda name: _probe(name, args.timeout, args.port), _names(args))
+    _emit(results if len(results) > 1 else results[0])
+    return EXIT_OK if all(r['ok'] for r in results) else EXIT_FAILED
+
+
+def _entry_json(gateway: str, line: str, received: Optional[float] = None) -> Dict[str, object]:
+    entry = parse_line(line, received)
+    return {
+        'gateway': gateway, 'ts': entry.ts, 'level': entry.level,
+        'logger': entry.logger, 'message': entry.message,
+    }
+
+
+def cmd_logs(args: argparse.Namespace) -> int:
+    name = args.name[0] if args.name else None
+    gateway = slugify(name) if name else DEFAULT_GATEWAY
+    if not args.follow:
+        entries, _secs = LogIndex.for_gateway(gateway).search(args.query or '', limit=args.limit)
+        for e in reversed(entries):
+            _emit({'gateway': gateway, 'ts': e.ts, 'level': e.level, 'logger': e.logger,
+                   'message': e.message, 'session': e.session})
+        return EXIT_OK
+
+    log_filter = LogFilter(parse_spec(args.level or '', args.logger or '', '', args.grep or ''))
+    stop = threading.Event()
+
+    def _on_record(rec: LogRecord) -> None:
+        if log_filter.accept(rec.text):
+            _emit(_entry_json(gateway, rec.text, rec.time))
+
+    try:
+        manager_for(name).stream_records(_on_record, stop)
+    except KeyboardInterrupt:
+        stop.set()
+    except BrokenPipeError:
+        # Reader went away (e.g. `| head`)
+        stop.set()
+    return EXIT_OK
+
+
+def cmd_diff_tags(args: argparse.Namespace) -> int:
+    with TagDiff(Path(args.old), Path(args.new)) as diff:
+        if args.list:
+            for change in diff.changes():
+                _emit(asdict(change))
+        result = {
+            'ok': True,
+            'format': diff.format,
+            'added': diff.summary.added,
+            'removed': diff.summary.removed,
+            'changed': diff.summary.changed,
+            'unchanged': diff.summary.unchanged,
+        }
+        if args.delta:
+            result['delta'] = str(args.delta)
+            result['delta_entries'] = diff.write_delta(Path(args.delta))
+    _emit(result)
+    return EXIT_OK
+
+
+def cmd_log_usage(args: argparse.Namespace) -> int:
+    result = {'ok': True}
+    if args.prune:
+        policy = LogRetention(max_age_days=args.max_age_days, max_total_bytes=args.max_total_mb * 1024 * 1024)
+        result['maintenance'] = asdict(maintain(policy))
+    result.update(usage().to_json())
+    _emit(result)
+    return EXIT_OK
+
+
+# --- argument parsing ------------------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='ignition-admin', description="Headless Ignition gateway control.")
+    parser.add_argument('-q', '--quiet', action='store_true', help="no progress on stderr")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log DEBUG to stderr")
+    parser.add_argument('--docker', help=f"docker executable (default: ${DOCKER_BIN_ENV} or docker)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def _named(p: argparse.ArgumentParser, many: bool) -> None:
+        p.add_argument(
+            '--name', action='append',
+            help="gateway name (default: the GUI's gateway)" + ("; repeat for several" if many else ""),
+        )
+
+    up = sub.add_parser('up', help="prepare, render and start a gateway")
+    _named(up, many=False)
+    up.add_argument('--mode', choices=('clean', 'backup'), default='clean')
+    up.add_argument('--backup', help=".gwbk to restore (backup mode)")
+    up.add_argument('--project', help="project .zip to import")
+    up.add_argument('--tags', help="tag export (.json/.xml) to load")
+    up.add_argument('--http-port', type=int, help="host HTTP port (default: a free one)")
+    up.add_argument('--https-port', type=int, help="host HTTPS port (default: a free one)")
+    up.add_argument('--admin-user', default='admin')
+    up.add_argument('--admin-pass', help=f"admin password (default: ${ADMIN_PASS_ENV})")
+    up.add_argument('--gateway-name', help="gateway system name (default: --name)")
+    up.add_argument('--edition', default='standard')
+    up.add_argument('--timezone', default='America/Chicago')
+    up.add_argument('--version', default='latest', help="Ignition version or full image reference")
+    up.add_argument('--heap-max-mb', type=int, help="max JVM heap (default: sized from host and load)")
+    up.add_argument('--heap-init-mb', type=int, help="initial JVM heap (default: 512 with manual limits)")
+    up.add_argument('--mem-limit-mb', type=int, help="container memory limit (manual default: none)")
+    up.add_argument('--cpus', type=float, help="container CPU limit (manual default: none)")
+    up.add_argument('--fresh', action='store_true', help="discard the gateway's data volume and start over")
+    up.add_argument('--snapshots', action='store_true', help="reuse / capture warm data snapshots")
+    up.add_argument('--no-wait', dest='wait', action='store_false', help="return once compose up is done")
+    up.add_argument('--timeout', type=float, default=DEFAULT_DEADLINE)
+    up.set_defaults(func=cmd_up)
+
+    down = sub.add_parser('down', help="tear gateways down (data volume included)")
+    _named(down, many=True)
+    down.add_argument('--keep-data', action='store_true', help="only stop the container")
+    down.set_defaults(func=cmd_down)
+
+    status = sub.add_parser('status', help="container state of gateways (default: all known)")
+    _named(status, many=True)
+    status.set_defaults(func=cmd_status)
+
+    wait = sub.add_parser('wait', help="wait until gateways report RUNNING")
+    _named(wait, many=True)
+    wait.add_argument('--port', type=int, help="HTTP port (default: from the last spin-up)")
+    wait.add_argument('--timeout', type=float, default=DEFAULT_DEADLINE)
+    wait.set_defaults(func=cmd_wait)
+
+    logs = sub.add_parser('logs', help="search indexed log history, or --follow live logs")
+    _named(logs, many=False)
+    logs.add_argument('--query', help='history search, e.g. "level:ERROR logger:tags.* since:10m"')
+    logs.add_argument('--limit', type=int, default=500)
+    logs.add_argument('-f', '--follow', action='store_true')
+    logs.add_argument('--level', help="with --follow: minimum level")
+    logs.add_argument('--logger', help="with --follow: logger globs, comma-separated")
+    logs.add_argument('--grep', help="with --follow: regexes, comma-separated, !regex hides")
+    logs.set_defaults(func=cmd_logs)
+
+    diff = sub.add_parser('diff-tags', help="compare two tag exports; optionally write the delta to import")
+    diff.add_argument('old', help="tag export the gateway already has")
+    diff.add_argument('new', help="tag export to bring it to")
+    diff.add_argument('--delta', help="write the added and changed tags to this file")
+    diff.add_argument('--list', action='store_true', help="print each change as a JSON line first")
+    diff.set_defaults(func=cmd_diff_tags)
+
+    log_usage = sub.add_parser('log-usage', help="disk used by gateway logs; --prune applies retention first")
+    log_usage.add_argument('--prune', action='store_true', help="compress closed logs and delete old ones")
+    log_usage.add_argument('--max-age-days', type=float, default=DEFAULT_MAX_AGE_DAYS)
+    log_usage.add_argument('--max-total-mb', type=int, default=DEFAULT_MAX_TOTAL_BYTES // (1024 * 1024))
+    log_usage.set_defaults(func=cmd_log_usage)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.docker:
+        # Read by every DockerManager / ImageCache this process creates
+        os.environ[DOCKER_BIN_ENV] = args.docker
+    setup_logging(
+        log_file=LOG_FILE,
+        stream=sys.stderr,
+        console_level=logging.DEBUG if args.verbose else logging.WARNING,
+    )
+    try:
+        return args.func(args)
+    except (AppError, ValueError) as e:
+        _emit({'ok': False, 'error': str(e)})
+    except KeyboardInterrupt:
+        _emit({'ok': False, 'error': 'interrupted'})
+    return EXIT_FAILED
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,20 @@
 # src/compose_generator.py
 
 import logging
+import os
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, select_autoescape
 
+import perf
+from content_store import store_for
 from errors import ConfigBuildError
-from models import Backup, Project, TagFile, ComposeConfig
+from gateway_logs import gateway_log_dir
+from models import DEFAULT_IMAGE, Backup, Project, Resources, TagFile, ComposeConfig
+from sizing import auto_resources
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -16,6 +23,13 @@ logger = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).resolve().parent.parent
 TEMPLATES_DIR = BASE_DIR / 'templates'
 GENERATED_DIR = BASE_DIR / 'generated'
+JINJA_CACHE_DIR = BASE_DIR / '.cache' / 'jinja'
+
+# One Environment per autoescape mode, shared by every render. Jinja keeps
+# compiled templates in memory and re-checks the source mtime on each
+# get_template (auto_reload), and the bytecode cache survives restarts.
+_environments: Dict[str, Environment] = {}
+_env_lock = threading.Lock()
 
 
 def build_config(raw: Dict[str, str]) -> ComposeConfig:
@@ -37,7 +51,7 @@ def build_config(raw: Dict[str, str]) -> ComposeConfig:
             backup_name = raw.get('backup_name')
             if not backup_name:
                 raise ConfigBuildError("Mode 'backup' selected, but no backup file provided.")
-            backup_path = Path(raw.get('backups_dir', 'backups')) / backup_name
+            backup_path = store_for(Path(raw.get('backups_dir', 'backups'))).resolve(backup_name)
             backup = Backup(name=backup_name, path=backup_path)
             backup.validate()
             logger.info("Loaded backup: %s", backup.path)
@@ -55,7 +69,7 @@ def build_config(raw: Dict[str, str]) -> ComposeConfig:
         tag_file: Optional[TagFile] = None
         tag_name = raw.get('tag_name')
         if tag_name:
-            tag_path = Path(raw.get('tags_dir', 'tags')) / tag_name
+            tag_path = store_for(Path(raw.get('tags_dir', 'tags'))).resolve(tag_name)
             tag_file = TagFile(name=tag_name, path=tag_path)
             tag_file.validate()
             logger.info("Loaded tag file: %s", tag_file.path)
@@ -71,12 +85,19 @@ def build_config(raw: Dict[str, str]) -> ComposeConfig:
         gateway_name = raw.get('gateway_name', '').strip()
         edition = raw.get('edition', 'standard').strip()
         timezone = raw.get('timezone', 'America/Chicago').strip()
+        container_name = raw.get('container_name', 'ignition-dev').strip()
+        image = (raw.get('image') or DEFAULT_IMAGE).strip()
+        image_digest = (raw.get('image_digest') or '').strip() or None
 
         if not admin_user or not admin_pass:
             raise ConfigBuildError("Admin username and password must be provided.")
         if not gateway_name:
             raise ConfigBuildError("Gateway name cannot be empty.")
 
+        # Heap and container limits: sized for the gateways sharing the host, or as given
+        resources = _build_resources(raw, project, tag_file)
+        logger.info("Resources: %s", resources.describe())
+
         # ComposeConfig object
         cfg = ComposeConfig(
             mode=mode,
@@ -89,7 +110,11 @@ def build_config(raw: Dict[str, str]) -> ComposeConfig:
             admin_password=admin_pass,
             gateway_name=gateway_name,
             edition=edition,
-            timezone=timezone
+            timezone=timezone,
+            container_name=container_name,
+            image=image,
+            image_digest=image_digest,
+            resources=resources,
         )
         cfg.validate()
         logger.info("Successfully built ComposeConfig: %s", cfg)
@@ -102,58 +127,166 @@ def build_config(raw: Dict[str, str]) -> ComposeConfig:
         raise ConfigBuildError(str(e), underlying=e)
 
 
-def render_compose(cfg: ComposeConfig) -> Path:
+def _build_resources(raw: Dict[str, str], project: Optional[Project], tag_file: Optional[TagFile]) -> Resources:
     """
-    Render docker-compose.yml from template, using absolute host paths for mounts.
+    'resources' is 'auto' (default) or 'manual'; manual takes heap_init_mb,
+    heap_max_mb, mem_limit_mb and cpus, any of which may be blank.
     """
+    mode = (raw.get('resources') or 'auto').strip().lower()
+    if mode not in ('auto', 'manual'):
+        raise ConfigBuildError(f"Invalid resources mode: '{mode}'. Must be 'auto' or 'manual'.")
     try:
-        GENERATED_DIR.mkdir(parents=True, exist_ok=True)
-        env = Environment(
-            loader=FileSystemLoader(str(TEMPLATES_DIR)),
-            autoescape=select_autoescape(['j2'])
+        if mode == 'auto':
+            return auto_resources(project, tag_file, gateways=int(raw.get('gateways') or 1))
+
+        def _value(key: str, kind=int):
+            text = str(raw.get(key) or '').strip()
+            return kind(text) if text else None
+
+        return Resources(
+            heap_init_mb=_value('heap_init_mb') or Resources.heap_init_mb,
+            heap_max_mb=_value('heap_max_mb'),
+            mem_limit_mb=_value('mem_limit_mb'),
+            cpus=_value('cpus', float),
         )
-        template = env.get_template('docker-compose.yml.j2')
-
-        # Prepare context with absolute host directories
-        context = cfg.to_dict()
-        context.update({
-            'projects_dir': str(BASE_DIR / 'projects'),
-            'tags_dir':     str(BASE_DIR / 'tags'),
-            'backups_dir':  str(BASE_DIR / 'backups'),
-            'logs_dir':     str(BASE_DIR / 'logs'),
-        })
-
-        content = template.render(**context)
-        out_path = GENERATED_DIR / 'docker-compose.yml'
-        out_path.write_text(content, encoding='utf-8')
-        logger.info("Rendered compose file to %s", out_path)
-        return out_path
+    except ValueError as ve:
+        raise ConfigBuildError(f"Invalid resource setting: {ve}")
+
 
+@dataclass
+class RenderResult:
+    """
+    Paths of the rendered files and whether either one changed on disk.
+    """
+    compose_path: Path
+    env_path: Path
+    changed: bool
+
+
+def _environment(kind: str) -> Environment:
+    with _env_lock:
+        env = _environments.get(kind)
+        if env is None:
+            bytecode_cache = None
+            try:
+                JINJA_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(str(JINJA_CACHE_DIR))
+            except OSError as e:
+                logger.warning("Jinja bytecode cache disabled: %s", e)
+            env = Environment(
+                loader=FileSystemLoader(str(TEMPLATES_DIR)),
+                autoescape=select_autoescape(['j2']) if kind == 'compose' else False,
+                auto_reload=True,
+                bytecode_cache=bytecode_cache,
+            )
+            _environments[kind] = env
+        return env
+
+
+def _get_template(kind: str, name: str) -> Template:
+    # Environment.get_template is safe to call from several threads
+    return _environment(kind).get_template(name)
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """
+    Atomically write `content` to `path` unless it already holds exactly
+    that text. Returns True if the file was (re)written.
+    """
+    data = content.encode('utf-8')
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+
+def _render_compose(cfg: ComposeConfig, out_dir: Path) -> Tuple[Path, bool]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    template = _get_template('compose', 'docker-compose.yml.j2')
+    # Each gateway gets its own log folder so retention can work per gateway
+    logs_dir = gateway_log_dir(cfg.container_name)
+    logs_dir.mkdir(parents=True, exist_ok=True)
+
+    # Prepare context with absolute host directories
+    context = cfg.to_dict()
+    context.update({
+        'projects_dir': str(BASE_DIR / 'projects'),
+        'tags_dir':     str(BASE_DIR / 'tags'),
+        'backups_dir':  str(BASE_DIR / 'backups'),
+        'logs_dir':     str(logs_dir),
+        'fingerprint':  cfg.fingerprint(),
+        'base_fingerprint': cfg.base_fingerprint(),
+        'data_fingerprint': cfg.data_fingerprint(),
+        'tag_hash':     cfg.tag_file.content_hash() if cfg.tag_file else None,
+    })
+
+    content = template.render(**context)
+    out_path = out_dir / 'docker-compose.yml'
+    changed = write_if_changed(out_path, content)
+    logger.info("Rendered compose file to %s (%s)", out_path, 'changed' if changed else 'unchanged')
+    return out_path, changed
+
+
+def _render_env(cfg: ComposeConfig, out_dir: Path) -> Tuple[Path, bool]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    template = _get_template('env', '.env.j2')
+    content = template.render(**cfg.to_dict())
+    out_path = out_dir / '.env'
+    changed = write_if_changed(out_path, content)
+    logger.info("Rendered env file to %s (%s)", out_path, 'changed' if changed else 'unchanged')
+    return out_path, changed
+
+
+def render_compose(cfg: ComposeConfig, out_dir: Optional[Path] = None) -> Path:
+    """
+    Render docker-compose.yml from template, using absolute host paths for mounts.
+    `out_dir` defaults to generated/; fleet instances pass their own subfolder.
+    The file is only rewritten when its content changes.
+    """
+    try:
+        return _render_compose(cfg, Path(out_dir) if out_dir else GENERATED_DIR)[0]
     except Exception as e:
         logger.exception("Failed to render docker-compose.yml")
         raise ConfigBuildError(f"Compose template rendering error: {e}", underlying=e)
 
 
-def render_env(cfg: ComposeConfig) -> Path:
+def render_env(cfg: ComposeConfig, out_dir: Optional[Path] = None) -> Path:
     """
-    Render .env file from template.
+    Render .env file from template into `out_dir` (defaults to generated/).
+    The file is only rewritten when its content changes.
     """
     try:
-        GENERATED_DIR.mkdir(parents=True, exist_ok=True)
-        env = Environment(
-            loader=FileSystemLoader(str(TEMPLATES_DIR)),
-            autoescape=False
-        )
-        template = env.get_template('.env.j2')
-        content = template.render(**cfg.to_dict())
-        out_path = GENERATED_DIR / '.env'
-        out_path.write_text(content, encoding='utf-8')
-        logger.info("Rendered env file to %s", out_path)
-        return out_path
+        return _render_env(cfg, Path(out_dir) if out_dir else GENERATED_DIR)[0]
+    except Exception as e:
+        logger.exception("Failed to render .env file")
+        raise ConfigBuildError(f"Env template rendering error: {e}", underlying=e)
 
+
+@perf.timed('render')
+def render_all(cfg: ComposeConfig, out_dir: Optional[Path] = None) -> RenderResult:
+    """
+    Render both docker-compose.yml and .env, reporting whether anything
+    on disk actually changed. Idempotent: re-rendering the same config
+    leaves files and their mtimes untouched.
+    """
+    out_dir = Path(out_dir) if out_dir else GENERATED_DIR
+    try:
+        compose_path, compose_changed = _render_compose(cfg, out_dir)
+    except Exception as e:
+        logger.exception("Failed to render docker-compose.yml")
+        raise ConfigBuildError(f"Compose template rendering error: {e}", underlying=e)
+    try:
+        env_path, env_changed = _render_env(cfg, out_dir)
     except Exception as e:
         logger.exception("Failed to render .env file")
         raise ConfigBuildError(f"Env template rendering error: {e}", underlying=e)
+    return RenderResult(compose_path, env_path, compose_changed or env_changed)
+
 
 def cleanup_generated_files() -> None:
     """
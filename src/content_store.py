@@ -0,0 +1,283 @@
+# src/content_store.py
+
+import errno
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from errors import FileSaveError
+
+logger = logging.getLogger(__name__)
+
+# Linux FICLONE ioctl (reflink / copy-on-write clone on btrfs, xfs, ...)
+_FICLONE = 0x40049409
+_CHUNK = 1024 * 1024
+
+MANIFEST_NAME = 'manifest.json'
+OBJECTS_NAME = '.objects'
+
+
+def file_sha256(path: Path) -> str:
+    """
+    Stream a file through SHA-256 and return the hex digest.
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _reflink(src: Path, dest: Path) -> bool:
+    """
+    Try a copy-on-write clone of src into dest. Returns False if the
+    filesystem does not support it (dest is left absent).
+    """
+    try:
+        with open(src, 'rb') as fs, open(dest, 'wb') as fd:
+            fcntl.ioctl(fd.fileno(), _FICLONE, fs.fileno())
+        return True
+    except OSError:
+        try:
+            dest.unlink()
+        except FileNotFoundError:
+            pass
+        return False
+
+
+def _clone_or_copy(src: Path, dest: Path) -> str:
+    """
+    Populate dest from src as cheaply as the filesystem allows.
+    Returns which method was used ('reflink' or 'copy').
+    """
+    if _reflink(src, dest):
+        return 'reflink'
+    # copyfile uses sendfile/copy_file_range on Linux, so it stays in-kernel
+    shutil.copyfile(src, dest)
+    return 'copy'
+
+
+def _link_or_copy(blob: Path, dest: Path) -> str:
+    """
+    Expose a stored blob under a friendly name, preferring a hardlink.
+    Returns which method was used ('hardlink', 'reflink' or 'copy').
+    """
+    try:
+        os.link(blob, dest)
+        return 'hardlink'
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EACCES):
+            raise
+    return _clone_or_copy(blob, dest)
+
+
+class ContentStore:
+    """
+    Hash-keyed, deduplicating file store.
+
+    Blobs live under <root>/.objects/<aa>/<sha256>; every friendly name in
+    <root>/ is a hardlink (or reflink/copy) of its blob, and
+    <root>/manifest.json maps friendly names to content hashes. Importing
+    identical content again is a no-op.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects_dir = self.root / OBJECTS_NAME
+        self.manifest_path = self.root / MANIFEST_NAME
+        self._lock = threading.RLock()
+
+    # --- manifest -------------------------------------------------------
+
+    def _load(self) -> dict:
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            data = {}
+        except ValueError:
+            logger.warning("Corrupt manifest %s; rebuilding", self.manifest_path)
+            data = {}
+        data.setdefault('names', {})
+        data.setdefault('sources', {})
+        return data
+
+    def _save(self, data: dict) -> None:
+        tmp = self.manifest_path.with_name(f".{MANIFEST_NAME}.tmp")
+        tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding='utf-8')
+        os.replace(tmp, self.manifest_path)
+
+    def blob_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    # --- hashing --------------------------------------------------------
+
+    def _hash_source(self, src: Path, data: dict) -> str:
+        """
+        Hash src, reusing the cached digest when size and mtime are unchanged.
+        """
+        st = src.stat()
+        key = str(src.resolve())
+        cached = data['sources'].get(key)
+        if cached and cached['size'] == st.st_size and cached['mtime_ns'] == st.st_mtime_ns:
+            return cached['hash']
+        digest = file_sha256(src)
+        data['sources'][key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': digest}
+        return digest
+
+    # --- public API -----------------------------------------------------
+
+    def import_file(self, src: Path) -> str:
+        """
+        Add src to the store and return the friendly name it is available
+        under in <root>/. Re-importing identical content is free; a name
+        clash with different content gets a hash-derived suffix.
+        """
+        src = Path(src)
+        if not src.is_file():
+            raise FileNotFoundError(f"File not found: {src}")
+        with self._lock:
+            try:
+                self.root.mkdir(parents=True, exist_ok=True)
+                data = self._load()
+                digest = self._hash_source(src, data)
+                self._ensure_blob(src, digest)
+
+                name = self._choose_name(src, digest, data)
+                dest = self.root / name
+                if not self._points_at(dest, digest, data['names'].get(name)):
+                    self._materialize(digest, dest)
+                data['names'][name] = {'hash': digest, 'size': src.stat().st_size}
+                self._save(data)
+                return name
+            except FileNotFoundError:
+                raise
+            except OSError as e:
+                logger.exception("Failed to import %s into %s", src, self.root)
+                raise FileSaveError(f"Could not store {src.name}: {e}", underlying=e)
+
+    def resolve(self, name: str) -> Path:
+        """
+        Return the on-disk path for a friendly name, re-creating the link
+        from its blob if the friendly file has gone missing.
+        """
+        dest = self.root / name
+        with self._lock:
+            entry = self._load()['names'].get(name)
+            if entry is None:
+                # Not managed by the store; hand back the plain path
+                return dest
+            if not dest.is_file():
+                if not self.blob_path(entry['hash']).is_file():
+                    raise FileNotFoundError(f"Stored content for '{name}' is missing")
+                self._materialize(entry['hash'], dest)
+            return dest
+
+    def hash_of(self, name: str) -> Optional[str]:
+        """
+        Content hash recorded for a friendly name, or None if unknown.
+        """
+        with self._lock:
+            entry = self._load()['names'].get(name)
+        return entry['hash'] if entry else None
+
+    def names(self) -> Dict[str, str]:
+        """
+        Map of every friendly name to its content hash.
+        """
+        with self._lock:
+            return {n: e['hash'] for n, e in self._load()['names'].items()}
+
+    def gc(self) -> int:
+        """
+        Delete blobs no friendly name refers to. Returns the number removed.
+        """
+        removed = 0
+        with self._lock:
+            live = {e['hash'] for e in self._load()['names'].values()}
+            if not self.objects_dir.is_dir():
+                return 0
+            for blob in self.objects_dir.glob('*/*'):
+                if blob.name not in live:
+                    blob.unlink()
+                    removed += 1
+        return removed
+
+    # --- internals ------------------------------------------------------
+
+    def _ensure_blob(self, src: Path, digest: str) -> None:
+        blob = self.blob_path(digest)
+        if blob.is_file():
+            logger.info("Content %s already stored; skipping copy", digest[:12])
+            return
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp = blob.with_name(f".{digest}.tmp")
+        method = _clone_or_copy(src, tmp)
+        os.replace(tmp, blob)
+        logger.info("Stored %s as %s (%s)", src.name, digest[:12], method)
+
+    def _points_at(self, dest: Path, digest: str, entry: Optional[dict]) -> bool:
+        """
+        True if dest already exposes the blob, without re-reading its bytes.
+        """
+        if not dest.is_file():
+            return False
+        try:
+            if os.path.samefile(dest, self.blob_path(digest)):
+                return True
+        except OSError:
+            return False
+        # Cross-device copies cannot be hardlinked; trust the manifest
+        return (
+            entry is not None
+            and entry['hash'] == digest
+            and dest.stat().st_size == entry['size']
+        )
+
+    def _materialize(self, digest: str, dest: Path) -> None:
+        tmp = dest.with_name(f".{dest.name}.tmp")
+        if tmp.exists():
+            tmp.unlink()
+        method = _link_or_copy(self.blob_path(digest), tmp)
+        os.replace(tmp, dest)
+        logger.debug("Linked %s -> %s (%s)", dest.name, digest[:12], method)
+
+    def _choose_name(self, src: Path, digest: str, data: dict) -> str:
+        """
+        Keep the source file name unless it is taken by different content.
+        """
+        name = src.name
+        entry = data['names'].get(name)
+        if entry is not None:
+            if entry['hash'] == digest:
+                return name
+        elif not (self.root / name).exists():
+            return name
+        elif file_sha256(self.root / name) == digest:
+            # Pre-existing unmanaged file with identical content: adopt it
+            return name
+        return f"{src.stem}_{digest[:12]}{src.suffix}"
+
+
+_stores: Dict[Path, ContentStore] = {}
+_stores_lock = threading.Lock()
+
+
+def store_for(root: Path) -> ContentStore:
+    """
+    Shared ContentStore instance for a directory.
+    """
+    key = Path(root).resolve()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ContentStore(key)
+        return store
@@ -0,0 +1,457 @@
+# src/docker_backends.py
+
+import abc
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from errors import DockerManagerError
+
+logger = logging.getLogger(__name__)
+
+# RFC 3339 timestamp docker prepends to each line when timestamps are requested
+_TS_RE = re.compile(rb'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})) ')
+_PROJECT_RE = re.compile(r'[^a-z0-9_-]+')
+_FRACTION_RE = re.compile(r'\.(\d+)')
+
+# Overrides the docker executable, e.g. tools/fake_docker.py for load tests
+DOCKER_BIN_ENV = 'IGNITION_ADMIN_DOCKER'
+
+
+@dataclass
+class LogRecord:
+    """
+    One container log line: which stream it came from, the daemon's
+    timestamp (if known) and the raw bytes without the trailing newline.
+    """
+    stream: str                 # 'stdout', 'stderr' or 'combined'
+    timestamp: Optional[str]
+    data: bytes
+
+    @property
+    def text(self) -> str:
+        return self.data.decode('utf-8', 'replace').rstrip('\r')
+
+    @property
+    def time(self) -> Optional[float]:
+        """
+        The daemon timestamp as seconds since the epoch.
+        """
+        return parse_timestamp(self.timestamp)
+
+
+def parse_timestamp(ts: Optional[str]) -> Optional[float]:
+    """
+    Seconds since the epoch for a docker RFC 3339 timestamp (nanoseconds
+    are cut to microseconds); None for a missing or zero time.
+    """
+    if not ts or ts.startswith('0001-'):
+        return None
+    ts = _FRACTION_RE.sub(lambda m: '.' + m.group(1)[:6], ts, count=1)
+    try:
+        return datetime.fromisoformat(ts.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def _split_timestamp(line: bytes):
+    m = _TS_RE.match(line)
+    if not m:
+        return None, line
+    return m.group(1).decode('ascii'), line[m.end():]
+
+
+def docker_binary() -> str:
+    """
+    The docker executable to run: $IGNITION_ADMIN_DOCKER, or `docker`.
+    """
+    return os.environ.get(DOCKER_BIN_ENV) or 'docker'
+
+
+def compose_project_name(compose_file: Path, project_name: Optional[str]) -> str:
+    """
+    The project name compose will use: explicit -p, otherwise the
+    normalized name of the compose file's directory.
+    """
+    name = project_name or compose_file.resolve().parent.name
+    return _PROJECT_RE.sub('', name.lower())
+
+
+def _absent() -> Dict[str, object]:
+    return {'state': 'absent', 'exit_code': None, 'health': None, 'started_at': None, 'labels': {}}
+
+
+class DockerBackend(abc.ABC):
+    """
+    Operations on the running gateway container that do not need compose
+    itself: state inspection, stop/start, log streaming and events.
+    """
+    name = 'base'
+
+    @abc.abstractmethod
+    def container_info(self) -> Dict[str, object]:
+        """
+        {'state': 'running'|'exited'|...|'absent', 'exit_code': int|None,
+         'health': str|None, 'started_at': str|None, 'labels': dict}
+        """
+
+    def container_state(self) -> str:
+        return str(self.container_info()['state'])
+
+    @abc.abstractmethod
+    def stop(self, timeout: int = 30) -> None:
+        ...
+
+    @abc.abstractmethod
+    def start(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    def stream_records(
+        self,
+        on_record: Callable[[LogRecord], None],
+        stop_event: threading.Event,
+        tail: str = 'all',
+        since: Optional[float] = None,
+    ) -> None:
+        """
+        Follow the container's log, from `since` (epoch seconds) when set.
+        """
+
+    def stream_logs(
+        self,
+        on_line: Callable[[str], None],
+        stop_event: threading.Event,
+        tail: str = 'all',
+        since: Optional[float] = None,
+    ) -> None:
+        self.stream_records(lambda rec: on_line(rec.text), stop_event, tail=tail, since=since)
+
+    @abc.abstractmethod
+    def events(self, on_event: Callable[[dict], None], stop_event: threading.Event) -> None:
+        ...
+
+
+class CliBackend(DockerBackend):
+    """
+    Fallback backend: shells out to `docker compose`.
+    """
+    name = 'cli'
+
+    def __init__(self, base_cmd: Callable[[], List[str]], service: str, working_dir: Path):
+        self._base_cmd = base_cmd
+        self.service = service
+        self.working_dir = working_dir
+
+    def _run(self, args: List[str]) -> str:
+        cmd = self._base_cmd() + args
+        try:
+            cp = subprocess.run(
+                cmd,
+                cwd=str(self.working_dir),
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except subprocess.CalledProcessError as e:
+            logger.error("%s failed: %s", ' '.join(cmd), e.stderr.strip())
+            raise DockerManagerError(f"'docker compose {args[0]}' failed: {e.stderr.strip()}")
+        except OSError as e:
+            raise DockerManagerError(f"Could not run {cmd[0]}: {e}", underlying=e)
+        return cp.stdout
+
+    def container_info(self) -> Dict[str, object]:
+        out = self._run(['ps', '-a', '--format', 'json', self.service]).strip()
+        # Older compose releases print a JSON array, newer ones one object per line
+        if not out:
+            entries = []
+        elif out.startswith('['):
+            entries = json.loads(out)
+        else:
+            entries = [json.loads(line) for line in out.splitlines() if line.strip()]
+        if not entries:
+            return _absent()
+        e = entries[0]
+        labels = e.get('Labels') or {}
+        if isinstance(labels, str):
+            # compose ps prints labels as "k=v,k=v"
+            labels = dict(item.partition('=')[::2] for item in labels.split(',') if item)
+        return {
+            'state': str(e.get('State', 'unknown')).lower(),
+            'exit_code': e.get('ExitCode'),
+            'health': e.get('Health') or None,
+            'started_at': None,
+            'labels': labels,
+        }
+
+    def stop(self, timeout: int = 30) -> None:
+        self._run(['stop', '-t', str(timeout), self.service])
+
+    def start(self) -> None:
+        self._run(['start', self.service])
+
+    def _follow(self, args: List[str], on_text: Callable[[str], None], stop_event: threading.Event) -> None:
+        cmd = self._base_cmd() + args
+        logger.info("Streaming with: %s", ' '.join(cmd))
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                cwd=str(self.working_dir),
+            )
+        except Exception as e:
+            logger.exception("Failed to start streaming process")
+            raise DockerManagerError(f"Could not start log streaming: {e}")
+
+        # Terminate promptly on stop, even if the container is silent
+        def _watch_stop():
+            while not stop_event.wait(0.25):
+                if proc.poll() is not None:
+                    return
+            if proc.poll() is None:
+                proc.terminate()
+        threading.Thread(target=_watch_stop, daemon=True).start()
+
+        try:
+            if proc.stdout is None:
+                raise DockerManagerError("Failed to capture logs: stdout is None")
+            for line in proc.stdout:
+                on_text(line.rstrip('\n'))
+                if stop_event.is_set():
+                    logger.info("Stop event set, terminating stream")
+                    break
+        except DockerManagerError:
+            raise
+        except Exception as e:
+            logger.exception("Error while streaming")
+            raise DockerManagerError(f"Error streaming logs: {e}")
+        finally:
+            if proc.poll() is None:
+                proc.terminate()
+            proc.wait()
+            logger.info("Streaming process ended with code %s", proc.returncode)
+
+    def stream_records(self, on_record, stop_event, tail='all', since=None):
+        def _on_text(text: str):
+            ts, data = _split_timestamp(text.encode('utf-8'))
+            on_record(LogRecord('combined', ts, data))
+        args = ['logs', '-f', '--timestamps', '--no-log-prefix', '--tail', tail]
+        if since:
+            args += ['--since', f"{since:.6f}"]
+        self._follow(args + [self.service], _on_text, stop_event)
+
+    def events(self, on_event, stop_event):
+        def _on_text(text: str):
+            try:
+                on_event(json.loads(text))
+            except ValueError:
+                logger.debug("Ignoring non-JSON event line: %s", text)
+        self._follow(['events', '--json', self.service], _on_text, stop_event)
+
+
+class EngineBackend(DockerBackend):
+    """
+    Talks to the Docker Engine API directly (docker-py) over the local
+    socket — unix socket on Linux/macOS, named pipe on Windows, or any
+    `base_url` such as unix:///tmp/fake-docker.sock for testing.
+    The container is found by its compose project/service labels.
+    """
+    name = 'engine'
+
+    def __init__(self, project: str, service: str, base_url: Optional[str] = None, timeout: int = 60):
+        try:
+            import docker
+        except ImportError as e:
+            raise DockerManagerError("docker-py is not installed", underlying=e)
+        try:
+            if base_url:
+                self.api = docker.APIClient(base_url=base_url, timeout=timeout)
+            else:
+                self.api = docker.from_env(timeout=timeout).api
+            self.api.ping()
+        except Exception as e:
+            raise DockerManagerError(f"Docker Engine API unreachable: {e}", underlying=e)
+        self.project = project
+        self.service = service
+
+    def _labels(self) -> List[str]:
+        return [
+            f'com.docker.compose.project={self.project}',
+            f'com.docker.compose.service={self.service}',
+        ]
+
+    def _container_id(self) -> Optional[str]:
+        found = self.api.containers(all=True, filters={'label': self._labels()})
+        return found[0]['Id'] if found else None
+
+    def _require_container(self) -> str:
+        cid = self._container_id()
+        if cid is None:
+            raise DockerManagerError(
+                f"No container for service '{self.service}' in project '{self.project}'"
+            )
+        return cid
+
+    def container_info(self) -> Dict[str, object]:
+        try:
+            cid = self._container_id()
+            if cid is None:
+                return _absent()
+            details = self.api.inspect_container(cid)
+            st = details['State']
+        except DockerManagerError:
+            raise
+        except Exception as e:
+            raise DockerManagerError(f"Container inspect failed: {e}", underlying=e)
+        health = st.get('Health') or {}
+        return {
+            'state': str(st.get('Status', 'unknown')).lower(),
+            'exit_code': st.get('ExitCode'),
+            'health': health.get('Status'),
+            'started_at': st.get('StartedAt'),
+            'labels': (details.get('Config') or {}).get('Labels') or {},
+        }
+
+    def stop(self, timeout: int = 30) -> None:
+        try:
+            self.api.stop(self._require_container(), timeout=timeout)
+        except DockerManagerError:
+            raise
+        except Exception as e:
+            raise DockerManagerError(f"Container stop failed: {e}", underlying=e)
+
+    def start(self) -> None:
+        try:
+            self.api.start(self._require_container())
+        except DockerManagerError:
+            raise
+        except Exception as e:
+            raise DockerManagerError(f"Container start failed: {e}", underlying=e)
+
+    def _close_on_stop(self, streams: list, stop_event: threading.Event, done: threading.Event) -> None:
+        def _watch():
+            while not stop_event.wait(0.25) and not done.is_set():
+                pass
+            for s in streams:
+                try:
+                    s.close()
+                except Exception:
+                    pass
+        threading.Thread(target=_watch, daemon=True).start()
+
+    def stream_records(self, on_record, stop_event, tail='all', since=None):
+        """
+        Follow stdout and stderr as two daemon-side demultiplexed streams,
+        so every record keeps its stream of origin and timestamp.
+        """
+        cid = self._require_container()
+        tail_arg = tail if tail == 'all' else int(tail)
+        deliver_lock = threading.Lock()
+        streams = []
+        try:
+            for name in ('stdout', 'stderr'):
+                streams.append((name, self.api.logs(
+                    cid, stream=True, follow=True, timestamps=True,
+                    stdout=(name == 'stdout'), stderr=(name == 'stderr'), tail=tail_arg,
+                    since=since or None,
+                )))
+        except Exception as e:
+            raise DockerManagerError(f"Could not start log streaming: {e}", underlying=e)
+        done = threading.Event()
+        self._close_on_stop([s for _, s in streams], stop_event, done)
+
+        errors: List[Exception] = []
+
+        def _pump(name: str, stream) -> None:
+            partial = b''
+            try:
+                for chunk in stream:
+                    partial += chunk
+                    *lines, partial = partial.split(b'\n')
+                    for raw in lines:
+                        ts, data = _split_timestamp(raw)
+                        with deliver_lock:
+                            on_record(LogRecord(name, ts, data))
+                    if stop_event.is_set() or done.is_set():
+                        break
+                if partial:
+                    ts, data = _split_timestamp(partial)
+                    with deliver_lock:
+                        on_record(LogRecord(name, ts, data))
+            except Exception as e:
+                if not stop_event.is_set() and not done.is_set():
+                    errors.append(e)
+            finally:
+                # Either stream ending (container gone) ends the session
+                done.set()
+
+        pumps = [
+            threading.Thread(target=_pump, args=(n, s), name=f"engine-{n}", daemon=True)
+            for n, s in streams
+        ]
+        for t in pumps:
+            t.start()
+        for t in pumps:
+            t.join()
+        logger.info("Engine log stream for %s ended", cid[:12])
+        if errors:
+            raise DockerManagerError(f"Error streaming logs: {errors[0]}", underlying=errors[0])
+
+    def events(self, on_event, stop_event):
+        try:
+            stream = self.api.events(
+                decode=True,
+                filters={'label': [f'com.docker.compose.project={self.project}']},
+            )
+        except Exception as e:
+            raise DockerManagerError(f"Could not subscribe to events: {e}", underlying=e)
+        done = threading.Event()
+        self._close_on_stop([stream], stop_event, done)
+        try:
+            for event in stream:
+                on_event(event)
+                if stop_event.is_set():
+                    break
+        except Exception as e:
+            if not stop_event.is_set():
+                raise DockerManagerError(f"Event stream failed: {e}", underlying=e)
+        finally:
+            done.set()
+
+
+def make_backend(
+    kind: str,
+    *,
+    base_cmd: Callable[[], List[str]],
+    service: str,
+    working_dir: Path,
+    project: str,
+    docker_host: Optional[str] = None,
+) -> DockerBackend:
+    """
+    Build the requested backend. 'auto' prefers the Engine API and falls
+    back to the CLI when docker-py or the socket is unavailable.
+    """
+    if kind not in ('auto', 'engine', 'cli'):
+        raise DockerManagerError(f"Unknown docker backend: {kind}")
+    if kind in ('auto', 'engine'):
+        try:
+            backend = EngineBackend(project, service, base_url=docker_host)
+            logger.info("Using Docker Engine API backend for project %s", project)
+            return backend
+        except DockerManagerError as e:
+            if kind == 'engine':
+                raise
+            logger.info("Engine API unavailable (%s); using docker CLI", e)
+    return CliBackend(base_cmd, service, working_dir)
@@ -1,21 +1,50 @@
 # src/docker_manager.py
 
+import re
 import subprocess
 import threading
 import logging
-import time
 from pathlib import Path
 from typing import Callable, Optional
 
-import requests
-
+import perf
+from docker_backends import (
+    DockerBackend, LogRecord, compose_project_name, docker_binary, make_backend, parse_timestamp,
+)
 from errors import DockerManagerError
+from readiness import DEFAULT_DEADLINE, PhaseMark, ReadinessProbe, ReadinessResult
 
 logger = logging.getLogger(__name__)
 
+# Container label carrying ComposeConfig.fingerprint() (set by the compose template)
+FINGERPRINT_LABEL = 'ignition-admin.fingerprint'
+# ComposeConfig.base_fingerprint() and the tag export's content hash
+BASE_FINGERPRINT_LABEL = 'ignition-admin.base-fingerprint'
+TAGS_LABEL = 'ignition-admin.tags'
+# ComposeConfig.data_fingerprint(): what the data volume was seeded from
+DATA_LABEL = 'ignition-admin.data'
+
+# reuse_plan() outcomes
+PLAN_RUNNING = 'running'      # matching container already up; nothing to do
+PLAN_START = 'start'          # matching container stopped; start it, data intact
+PLAN_RECREATE = 'recreate'    # container from a different config; recreate it on its data
+PLAN_RESET = 'reset'          # data from another backup, or a wipe was asked; tear down with the data
+PLAN_CREATE = 'create'        # nothing there yet
+PLAN_TAG_DELTA = 'tag-delta'  # only the tags changed; recreate keeping data, import a delta
+
+# Compose progress lines once the container is up: what `up -d` waits for
+_COMPOSE_STARTED_RE = re.compile(r'^\s*(?:Container \S+\s+(?:Started|Running)\b|Attaching to )')
+
+# Named volume (in the compose template) holding the gateway's data directory
+DATA_VOLUME = 'ign-data'
+
 class DockerManager:
     """
     Manages Docker Compose lifecycle for the Ignition dev gateway.
+
+    `compose up/down` always go through the docker CLI; container state,
+    stop/start, logs and events go through a pluggable backend ('engine'
+    for the Docker Engine API, 'cli' for `docker compose`, or 'auto').
     """
 
     def __init__(
@@ -24,15 +53,47 @@ class DockerManager:
         env_file: Optional[Path] = None,
         service_name: str = 'ignition-dev',
         working_dir: Optional[Path] = None,
+        project_name: Optional[str] = None,
+        backend: str = 'auto',
+        docker_host: Optional[str] = None,
+        docker_bin: Optional[str] = None,
     ):
         self.compose_file = compose_file
         self.env_file = env_file
         self.service = service_name
         # Where to run docker compose from (so volumes resolve correctly)
         self.working_dir = working_dir or compose_file.parent
+        # Compose project name; isolates containers, networks and volumes per gateway
+        self.project_name = project_name
+        # Executable for every CLI call; a stand-in such as tools/fake_docker.py
+        # has no Engine API behind it, so 'auto' then means the CLI backend
+        self.docker_bin = docker_bin or docker_binary()
+        if backend == 'auto' and self.docker_bin != 'docker':
+            backend = 'cli'
+        self.backend_kind = backend
+        self.docker_host = docker_host
+        self._backend: Optional[DockerBackend] = None
+        self._backend_lock = threading.Lock()
+
+    @property
+    def backend(self) -> DockerBackend:
+        """Container backend, created on first use."""
+        with self._backend_lock:
+            if self._backend is None:
+                self._backend = make_backend(
+                    self.backend_kind,
+                    base_cmd=self._build_base_cmd,
+                    service=self.service,
+                    working_dir=self.working_dir,
+                    project=compose_project_name(self.compose_file, self.project_name),
+                    docker_host=self.docker_host,
+                )
+            return self._backend
 
     def _build_base_cmd(self) -> list:
-        cmd = ['docker', 'compose', '-f', str(self.compose_file)]
+        cmd = [self.docker_bin, 'compose', '-f', str(self.compose_file)]
+        if self.project_name:
+            cmd += ['-p', self.project_name]
         if self.env_file:
             cmd += ['--env-file', str(self.env_file)]
         return cmd
@@ -40,8 +101,11 @@ class DockerManager:
     def up_stream(self, on_line: Callable[[str], None]) -> None:
         """
         Runs `docker compose up` (foreground) and streams stdout/stderr
-        to the provided callback.
+        to the provided callback. Returns when the container exits; the
+        'compose.up' span ends once compose reports it started, like
+        `up_detached`.
         """
+        up_span = perf.OpenSpan('compose.up')
         cmd = self._build_base_cmd() + ['up']
         logger.info("Streaming compose up with: %s", ' '.join(cmd))
         try:
@@ -55,6 +119,7 @@ class DockerManager:
             )
         except Exception as e:
             logger.exception("Failed to start docker compose up")
+            up_span.end(ok=False)
             raise DockerManagerError(f"Could not start docker compose up: {e}")
 
         # Stream lines
@@ -63,6 +128,9 @@ class DockerManager:
                 raise DockerManagerError("Failed to capture compose output: stdout is None")
             for line in proc.stdout:
                 clean = line.rstrip()
+                perf.mark('compose.first_output')
+                if _COMPOSE_STARTED_RE.match(clean):
+                    up_span.end()
                 logger.debug("ComposeUp> %s", clean)
                 on_line(clean)
         except Exception as e:
@@ -71,10 +139,13 @@ class DockerManager:
             raise DockerManagerError(f"Error during compose up streaming: {e}")
         finally:
             ret = proc.wait()
+            # A no-op after the start line; without one compose failed
+            up_span.end(ok=ret == 0)
             if ret != 0:
                 raise DockerManagerError(f"docker compose up exited with code {ret}")
             logger.info("Compose up completed successfully.")
 
+    @perf.timed('compose.up')
     def up_detached(self) -> None:
         """
         Runs `docker compose up -d` detached.
@@ -96,22 +167,65 @@ class DockerManager:
             logger.error("Compose up -d failed: %s", e.stderr.strip())
             raise DockerManagerError(f"'docker compose up -d' failed: {e.stderr.strip()}")
 
-    def wait_for_gateway(self, port: int, timeout: int = 30) -> bool:
-        url = f'http://localhost:{port}/main/system/status/Ping'
-        end = time.time() + timeout
-        while time.time() < end:
-            try:
-                r = requests.get(url, timeout=2)
-                if r.status_code == 200:
-                    return True
-            except Exception:
-                pass
-            time.sleep(1)
-        return False
+    def probe_gateway(
+        self,
+        port: int,
+        deadline: float = DEFAULT_DEADLINE,
+        on_phase: Optional[Callable[[PhaseMark], None]] = None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> ReadinessResult:
+        """
+        Wait for the gateway to report RUNNING on `port`, failing fast if
+        its container stops. Returns the phase timeline.
+        """
+        def _on_phase(mark: PhaseMark) -> None:
+            # e.g. "readiness.ping_ok": time of the first Ping success
+            perf.mark('readiness.' + mark.phase.lower().replace(' ', '_'))
+            if on_phase:
+                on_phase(mark)
+
+        probe = ReadinessProbe(
+            port,
+            deadline=deadline,
+            container_info=self.container_info,
+            on_phase=_on_phase,
+        )
+        with perf.span('readiness') as attrs:
+            result = probe.run(stop_event)
+            attrs.update(ready=result.ready, failure=result.failure)
+        return result
 
+    def wait_for_gateway(self, port: int, timeout: float = DEFAULT_DEADLINE) -> bool:
+        return self.probe_gateway(port, deadline=timeout).ready
+
+    @perf.timed('compose.recreate')
+    def recreate(self) -> None:
+        """
+        Replace the gateway container with one built from the current
+        compose file, keeping the data volume. The new container is left
+        created but not started, for the caller's `compose up`.
+        """
+        cmd = self._build_base_cmd() + ['up', '--no-start', '--force-recreate']
+        logger.info("Recreating containers with: %s", ' '.join(cmd))
+        try:
+            cp = subprocess.run(
+                cmd,
+                cwd=str(self.working_dir),
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+            logger.debug("Compose recreate stderr: %s", cp.stderr.strip())
+        except subprocess.CalledProcessError as e:
+            logger.error("Compose recreate failed: %s", e.stderr.strip())
+            raise DockerManagerError(f"'docker compose up --force-recreate' failed: {e.stderr.strip()}")
+
+    @perf.timed('compose.down')
     def down(self) -> None:
         """
-        Runs `docker compose down -v` to tear down the stack.
+        Runs `docker compose down -v` to tear down the stack, data volume
+        included.
         """
         cmd = self._build_base_cmd() + ['down', '-v']
         logger.info("Tearing down containers with: %s", ' '.join(cmd))
@@ -130,41 +244,200 @@ class DockerManager:
             logger.error("Compose down failed: %s", e.stderr.strip())
             raise DockerManagerError(f"'docker compose down' failed: {e.stderr.strip()}")
 
-    def stream_logs(self, on_line: Callable[[str], None], stop_event: threading.Event) -> None:
+    def status(self) -> str:
+        """
+        Return the state of the gateway service container (e.g. 'running',
+        'exited'), or 'absent' if it has not been created.
+        """
+        return self.backend.container_state()
+
+    def container_info(self) -> dict:
+        """
+        State, exit code, health and start time of the gateway container.
+        """
+        return self.backend.container_info()
+
+    def started_at(self) -> Optional[float]:
+        """
+        When the container last started (epoch seconds), if the backend
+        reports it; the CLI backend does not.
+        """
+        return parse_timestamp(self.backend.container_info().get('started_at'))
+
+    def running_fingerprint(self) -> Optional[str]:
+        """
+        Fingerprint label of the existing gateway container, if any.
+        """
+        labels = self.container_info().get('labels') or {}
+        return labels.get(FINGERPRINT_LABEL)
+
+    def running_tag_hash(self) -> Optional[str]:
+        """
+        Content hash of the tag export the existing gateway imported, if any.
+        """
+        labels = self.container_info().get('labels') or {}
+        return labels.get(TAGS_LABEL)
+
+    def reuse_plan(
+        self,
+        fingerprint: str,
+        base_fingerprint: Optional[str] = None,
+        data_fingerprint: Optional[str] = None,
+        wipe: bool = False,
+    ) -> str:
+        """
+        Decide how to bring up a config with the given fingerprint:
+        PLAN_RUNNING, PLAN_START (soft-stopped, same config), PLAN_TAG_DELTA
+        (same config but for the tags, when `base_fingerprint` is given),
+        PLAN_RECREATE (container built from another config, same data),
+        PLAN_RESET (`wipe`, or a data volume seeded from something other
+        than `data_fingerprint`) or PLAN_CREATE.
+        """
+        info = self.container_info()
+        if info['state'] == 'absent':
+            return PLAN_CREATE
+        if wipe:
+            return PLAN_RESET
+        labels = info.get('labels') or {}
+        if labels.get(FINGERPRINT_LABEL) != fingerprint:
+            if (base_fingerprint and labels.get(TAGS_LABEL)
+                    and labels.get(BASE_FINGERPRINT_LABEL) == base_fingerprint):
+                return PLAN_TAG_DELTA
+            # Containers from before the data label are treated as foreign data
+            if data_fingerprint and labels.get(DATA_LABEL) != data_fingerprint:
+                return PLAN_RESET
+            return PLAN_RECREATE
+        return PLAN_RUNNING if info['state'] == 'running' else PLAN_START
+
+    def stop(self, timeout: int = 30) -> None:
+        """
+        Soft stop: stop the gateway container, keeping the container and
+        its data volume so a matching config can start it again quickly.
+        """
+        logger.info("Stopping %s via %s backend", self.service, self.backend.name)
+        self.backend.stop(timeout=timeout)
+
+    @perf.timed('compose.start')
+    def start(self) -> None:
         """
-        docker compose logs -f <service_name>
-        Streams each line into the callback until stop_event is set.
+        Start a previously stopped gateway container.
         """
-        cmd = self._build_base_cmd() + ['logs', '-f', self.service]
-        logger.info("Streaming logs with: %s", ' '.join(cmd))
+        logger.info("Starting %s via %s backend", self.service, self.backend.name)
+        self.backend.start()
+
+    # --- data volume snapshots -----------------------------------------
+
+    def data_volume(self) -> str:
+        """
+        Docker name of this stack's data volume (compose prefixes the project).
+        """
+        return f"{compose_project_name(self.compose_file, self.project_name)}_{DATA_VOLUME}"
+
+    def _docker(self, args: list, action: str) -> str:
+        cmd = [self.docker_bin] + args
+        logger.info("%s with: %s", action, ' '.join(cmd))
         try:
-            proc = subprocess.Popen(
+            cp = subprocess.run(
                 cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
                 cwd=str(self.working_dir),
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
             )
-        except Exception as e:
-            logger.exception("Failed to start log streaming process")
-            raise DockerManagerError(f"Could not start log streaming: {e}")
+        except subprocess.CalledProcessError as e:
+            logger.error("%s failed: %s", action, e.stderr.strip())
+            raise DockerManagerError(f"{action} failed: {e.stderr.strip()}")
+        except OSError as e:
+            raise DockerManagerError(f"{action} failed: {e}", underlying=e)
+        return cp.stdout
 
+    @perf.timed('snapshot.export')
+    def export_data_snapshot(self, dest: Path, image: str) -> None:
+        """
+        Archive the data volume to `dest` (.tar.gz). The gateway is stopped
+        for the copy so its internal database is consistent, then started
+        again if it was running. `image` (the gateway image) provides tar.
+        """
+        was_running = self.status() == 'running'
+        if was_running:
+            self.stop()
         try:
-            if proc.stdout is None:
-                raise DockerManagerError("Failed to capture logs: stdout is None")
-            for line in proc.stdout:
-                clean = line.rstrip()
-                logger.debug("Log> %s", clean)
-                on_line(clean)
-                if stop_event.is_set():
-                    logger.info("Stop event set, terminating log stream")
-                    proc.terminate()
-                    break
-        except Exception as e:
-            logger.exception("Error while streaming logs")
-            proc.terminate()
-            raise DockerManagerError(f"Error streaming logs: {e}")
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            self._docker([
+                'run', '--rm', '--user', '0:0', '--entrypoint', 'tar',
+                '-v', f"{self.data_volume()}:/data:ro",
+                '-v', f"{dest.parent.resolve()}:/snap",
+                image, '--numeric-owner', '-czf', f"/snap/{dest.name}", '-C', '/data', '.',
+            ], "Snapshot export")
         finally:
-            proc.wait()
-            logger.info("Log streaming process ended with code %s", proc.returncode)
\ No newline at end of file
+            if was_running:
+                self.start()
+
+    @perf.timed('snapshot.seed')
+    def seed_data_volume(self, archive: Path, image: str) -> None:
+        """
+        Replace the data volume with the contents of a snapshot archive.
+        The stack must be down. The volume carries compose's labels so
+        `compose up` adopts it as its own.
+        """
+        volume = self.data_volume()
+        project = compose_project_name(self.compose_file, self.project_name)
+        self._docker(['volume', 'rm', '-f', volume], "Data volume removal")
+        self._docker([
+            'volume', 'create',
+            '--label', f"com.docker.compose.project={project}",
+            '--label', f"com.docker.compose.volume={DATA_VOLUME}",
+            volume,
+        ], "Data volume creation")
+        self._docker([
+            'run', '--rm', '--user', '0:0', '--entrypoint', 'tar',
+            '-v', f"{volume}:/data",
+            '-v', f"{archive.parent.resolve()}:/snap:ro",
+            image, '--numeric-owner', '-xzpf', f"/snap/{archive.name}", '-C', '/data',
+        ], "Snapshot restore")
+
+    def stream_logs(
+        self,
+        on_line: Callable[[str], None],
+        stop_event: threading.Event,
+        since: Optional[float] = None,
+    ) -> None:
+        """
+        Follow the gateway container's logs, calling on_line for each line
+        until stop_event is set or the container goes away. With `since`
+        (epoch seconds), only lines the daemon stamped after it.
+        """
+        self.stream_records(lambda rec: on_line(rec.text), stop_event, since=since)
+
+    def stream_records(
+        self,
+        on_record: Callable[[LogRecord], None],
+        stop_event: threading.Event,
+        since: Optional[float] = None,
+    ) -> None:
+        """
+        Like stream_logs, but delivers LogRecord objects (stream of origin,
+        daemon timestamp, raw bytes).
+        """
+        def _on_record(rec: LogRecord) -> None:
+            if since is not None:
+                # docker's --since is inclusive; the line stamped exactly
+                # `since` was already seen
+                at = rec.time
+                if at is not None and at <= since:
+                    return
+            logger.debug("Log> %s", rec.text)
+            perf.mark(perf.FIRST_LOG_LINE)
+            perf.count('logs.lines')
+            perf.count('logs.bytes', len(rec.data) + 1)
+            on_record(rec)
+        logger.info("Streaming logs via %s backend%s", self.backend.name,
+                    f" since {since:.3f}" if since else "")
+        self.backend.stream_records(_on_record, stop_event, since=since)
+
+    def events(self, on_event: Callable[[dict], None], stop_event: threading.Event) -> None:
+        """
+        Deliver container lifecycle events for this compose project.
+        """
+        self.backend.events(on_event, stop_event)
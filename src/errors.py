@@ -56,4 +56,10 @@ class DockerManagerError(AppError):
 class CleanupError(AppError):
     """
     Raised when generated files or directories cannot be cleaned up.
-    """
\ No newline at end of file
+    """
+
+
+class SpinUpCancelled(AppError):
+    """
+    Raised inside spin-up stages when the user cancels the spin-up.
+    """
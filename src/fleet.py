@@ -0,0 +1,297 @@
+# src/fleet.py
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from compose_generator import render_all
+from docker_manager import DockerManager, PLAN_CREATE, PLAN_RECREATE, PLAN_RESET, PLAN_TAG_DELTA
+from errors import DockerManagerError
+from gateway import apply_plan, read_state, save_state
+from models import ComposeConfig
+from snapshots import SnapshotInfo, SnapshotStore
+from utils import FLEET_DIR, allocate_port_pairs, slugify
+
+logger = logging.getLogger(__name__)
+
+# Directories
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def replica_names(gateway_name: str, count: int) -> List[str]:
+    """
+    Names (and container names) of the gateways add_replicas creates.
+    """
+    base = slugify(gateway_name)
+    return [f"{base}-{idx}" for idx in range(1, count + 1)]
+
+
+@dataclass
+class GatewayInstance:
+    """
+    One gateway of the fleet: its own compose project, generated directory,
+    data volume (scoped by the project name) and host port pair.
+    """
+    name: str
+    config: ComposeConfig
+    generated_dir: Path
+    manager: Optional[DockerManager] = None
+    snapshot: Optional[SnapshotInfo] = None
+    status: str = 'pending'
+    error: Optional[str] = None
+    stop_evt: threading.Event = field(default_factory=threading.Event, repr=False)
+    log_thread: Optional[threading.Thread] = field(default=None, repr=False)
+
+    @property
+    def http_port(self) -> int:
+        return self.config.http_port
+
+    @property
+    def https_port(self) -> int:
+        return self.config.https_port
+
+
+class Fleet:
+    """
+    Renders, starts, stops and tails N gateways concurrently.
+    Each instance gets its own compose project so containers, networks and
+    the `ign-data` volume never collide.
+    """
+
+    def __init__(
+        self,
+        base_dir: Path = FLEET_DIR,
+        max_workers: Optional[int] = None,
+        snapshots: Optional[SnapshotStore] = None,
+    ):
+        self.base_dir = base_dir
+        self.max_workers = max_workers
+        # When set, backup-mode gateways boot from a warm snapshot if one exists
+        self.snapshots = snapshots
+        self.instances: Dict[str, GatewayInstance] = {}
+        self._lock = threading.Lock()
+
+    # --- building -------------------------------------------------------
+
+    def add(self, cfg: ComposeConfig, name: Optional[str] = None) -> GatewayInstance:
+        """
+        Register a gateway and render its compose/env files (and the state
+        `status` / `wait` and the next launch read) into generated/fleet/<name>/.
+        """
+        name = slugify(name or cfg.gateway_name)
+        if name in self.instances:
+            raise DockerManagerError(f"Gateway '{name}' is already part of the fleet")
+        cfg = replace(cfg, container_name=name)
+        cfg.validate()
+        snapshot = None
+        if self.snapshots and cfg.mode == 'backup' and cfg.backup:
+            snapshot = self.snapshots.find(cfg.backup.content_hash(), cfg.image_ref)
+        cfg.restore_from_snapshot = snapshot is not None
+
+        out_dir = self.base_dir / name
+        rendered = render_all(cfg, out_dir)
+        save_state(cfg, out_dir)
+        manager = DockerManager(
+            compose_file=rendered.compose_path,
+            env_file=rendered.env_path,
+            service_name='ignition-dev',
+            working_dir=BASE_DIR,
+            project_name=name,
+        )
+        inst = GatewayInstance(
+            name=name, config=cfg, generated_dir=out_dir, manager=manager, snapshot=snapshot
+        )
+        with self._lock:
+            self.instances[name] = inst
+        logger.info("Added gateway '%s' on ports %s/%s", name, cfg.http_port, cfg.https_port)
+        return inst
+
+    def add_replicas(self, cfg: ComposeConfig, count: int) -> List[GatewayInstance]:
+        """
+        Clone `cfg` into `count` gateways named <gateway>-1..N. A replica
+        keeps the port pair of its last launch (its container may still hold
+        it, and new ports would force a recreate); the others get a free
+        pair starting from the config's own ports.
+        """
+        taken = [i.http_port for i in self.instances.values()]
+        taken += [i.https_port for i in self.instances.values()]
+        names = replica_names(cfg.gateway_name, count)
+        saved = {}
+        for name in names:
+            state = read_state(self.base_dir / name)
+            ports = (state.get('http_port'), state.get('https_port'))
+            if all(ports) and not set(ports) & set(taken):
+                saved[name] = ports
+                taken += ports
+        pairs = iter(allocate_port_pairs(count - len(saved), cfg.http_port, cfg.https_port, taken))
+        added = []
+        for idx, name in enumerate(names, start=1):
+            http, https = saved.get(name) or next(pairs)
+            replica = replace(
+                cfg,
+                gateway_name=f"{cfg.gateway_name}-{idx}",
+                http_port=http,
+                https_port=https,
+            )
+            added.append(self.add(replica, name=name))
+        return added
+
+    def _select(self, names: Optional[Iterable[str]]) -> List[GatewayInstance]:
+        if names is None:
+            return list(self.instances.values())
+        return [self.instances[n] for n in names]
+
+    def _run_parallel(
+        self,
+        action: Callable[[GatewayInstance], None],
+        names: Optional[Iterable[str]],
+    ) -> Dict[str, Optional[Exception]]:
+        targets = self._select(names)
+        results: Dict[str, Optional[Exception]] = {}
+        if not targets:
+            return results
+        workers = self.max_workers or len(targets)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fleet') as pool:
+            futures = {pool.submit(action, inst): inst for inst in targets}
+            for fut, inst in futures.items():
+                try:
+                    fut.result()
+                    results[inst.name] = None
+                except Exception as e:
+                    logger.exception("Fleet action failed for '%s'", inst.name)
+                    inst.error = str(e)
+                    results[inst.name] = e
+        return results
+
+    # --- lifecycle ------------------------------------------------------
+
+    def up_all(
+        self,
+        on_line: Optional[Callable[[str, str], None]] = None,
+        names: Optional[Iterable[str]] = None,
+        wait: bool = True,
+        wipe: bool = False,
+    ) -> Dict[str, Optional[Exception]]:
+        """
+        Start the selected gateways in parallel, optionally
+        wait for each to answer on HTTP, then tail their container logs.
+        Each gateway goes through the same plan as a single one (see
+        gateway.apply_plan): reused, restarted, updated with a tag delta or
+        recreated on its data; `wipe` starts them all from fresh data.
+        `on_line(name, line)` receives every log line tagged with its gateway.
+        Returns a map of gateway name -> exception (None on success).
+        """
+        def _up(inst: GatewayInstance) -> None:
+            assert inst.manager is not None
+            inst.status = 'starting'
+            inst.error = None
+            say = (lambda line: on_line(inst.name, line)) if on_line else None
+            try:
+                plan = apply_plan(
+                    inst.manager, inst.config, inst.snapshot, self.snapshots, on_line=say, wipe=wipe,
+                )
+                if plan in (PLAN_CREATE, PLAN_RECREATE, PLAN_RESET, PLAN_TAG_DELTA):
+                    inst.manager.up_detached()
+            except Exception:
+                inst.status = 'failed'
+                raise
+            if on_line:
+                self._start_log_stream(inst, on_line)
+            if wait:
+                ready = inst.manager.wait_for_gateway(inst.http_port)
+                inst.status = 'running' if ready else 'unresponsive'
+            else:
+                inst.status = 'running'
+
+        return self._run_parallel(_up, names)
+
+    def down_all(
+        self,
+        names: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Optional[Exception]]:
+        """
+        Tear the selected gateways down in parallel and stop their log streams.
+        """
+        def _down(inst: GatewayInstance) -> None:
+            assert inst.manager is not None
+            self._stop_log_stream(inst)
+            inst.status = 'stopping'
+            try:
+                inst.manager.down()
+            except Exception:
+                inst.status = 'failed'
+                raise
+            inst.status = 'stopped'
+
+        return self._run_parallel(_down, names)
+
+    def stop_all(
+        self,
+        names: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Optional[Exception]]:
+        """
+        Soft-stop the selected gateways in parallel, keeping containers and data.
+        """
+        def _stop(inst: GatewayInstance) -> None:
+            assert inst.manager is not None
+            self._stop_log_stream(inst)
+            inst.manager.stop()
+            inst.status = 'stopped'
+
+        return self._run_parallel(_stop, names)
+
+    def remove(self, name: str) -> None:
+        """
+        Forget a gateway (it should already be down).
+        """
+        with self._lock:
+            inst = self.instances.pop(name, None)
+        if inst:
+            self._stop_log_stream(inst)
+
+    def refresh_status(self) -> Dict[str, str]:
+        """
+        Query compose for every gateway's container state, in parallel.
+        """
+        def _status(inst: GatewayInstance) -> None:
+            assert inst.manager is not None
+            inst.status = inst.manager.status()
+
+        self._run_parallel(_status, None)
+        return self.status()
+
+    def status(self) -> Dict[str, str]:
+        """
+        Last known state of every gateway, without touching Docker.
+        """
+        return {name: inst.status for name, inst in self.instances.items()}
+
+    # --- logs -----------------------------------------------------------
+
+    def _start_log_stream(self, inst: GatewayInstance, on_line: Callable[[str, str], None]) -> None:
+        if inst.log_thread and inst.log_thread.is_alive():
+            return
+        assert inst.manager is not None
+        inst.stop_evt = threading.Event()
+
+        def _run() -> None:
+            try:
+                # Only the current run; earlier ones were shown when they ran
+                since = inst.manager.started_at()
+                inst.manager.stream_logs(lambda line: on_line(inst.name, line), inst.stop_evt, since=since)
+            except DockerManagerError as e:
+                on_line(inst.name, f"❌ Log stream ended: {e}")
+
+        inst.log_thread = threading.Thread(
+            target=_run, name=f"logs-{inst.name}", daemon=True
+        )
+        inst.log_thread.start()
+
+    def _stop_log_stream(self, inst: GatewayInstance, timeout: float = 5.0) -> None:
+        inst.stop_evt.set()
+        if inst.log_thread:
+            inst.log_thread.join(timeout=timeout)
+            inst.log_thread = None
@@ -0,0 +1,255 @@
+# src/gateway.py
+
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+from compose_generator import GENERATED_DIR, RenderResult, render_all
+from content_store import store_for
+from docker_manager import (
+    DockerManager, PLAN_CREATE, PLAN_RECREATE, PLAN_RESET, PLAN_RUNNING, PLAN_START, PLAN_TAG_DELTA,
+)
+from errors import AppError, DockerManagerError, TagValidationError
+from models import ComposeConfig
+from snapshots import SnapshotInfo, SnapshotStore
+from tag_diff import DELTA_NAME, REMOVED, TagDiff, write_empty_delta
+from utils import FLEET_DIR, slugify
+
+logger = logging.getLogger(__name__)
+
+# Directories
+BASE_DIR = Path(__file__).resolve().parent.parent
+BACKUPS_DIR = BASE_DIR / 'backups'
+PROJECTS_DIR = BASE_DIR / 'projects'
+TAGS_DIR = BASE_DIR / 'tags'
+
+# The unnamed gateway the GUI starts, rendered straight into generated/
+DEFAULT_GATEWAY = 'ignition-dev'
+SERVICE_NAME = 'ignition-dev'
+# Written next to the compose file so later commands know ports and image
+STATE_FILE = 'gateway.json'
+
+LineCallback = Callable[[str], None]
+
+# Core of a single-gateway spin-up shared by the GUI and the CLI. Named
+# gateways live in generated/fleet/<name>/ under their own compose project,
+# exactly like fleet instances, so either front end can manage the other's.
+
+
+def base_raw(**fields: str) -> dict:
+    """
+    Raw build_config inputs with the standard store directories filled in.
+    """
+    raw = {
+        'backups_dir': str(BACKUPS_DIR),
+        'projects_dir': str(PROJECTS_DIR),
+        'tags_dir': str(TAGS_DIR),
+    }
+    raw.update(fields)
+    return raw
+
+
+def gateway_dir(name: Optional[str] = None) -> Path:
+    if not name or slugify(name) == DEFAULT_GATEWAY:
+        return GENERATED_DIR
+    return FLEET_DIR / slugify(name)
+
+
+def manager_for(name: Optional[str] = None, rendered: Optional[RenderResult] = None) -> DockerManager:
+    """
+    DockerManager for a gateway, from its freshly rendered files or from
+    the ones a previous spin-up left in its generated directory.
+    """
+    named = bool(name) and slugify(name) != DEFAULT_GATEWAY
+    out_dir = gateway_dir(name)
+    compose_file = rendered.compose_path if rendered else out_dir / 'docker-compose.yml'
+    env_file = rendered.env_path if rendered else out_dir / '.env'
+    if not compose_file.is_file():
+        raise AppError(f"Gateway '{name or DEFAULT_GATEWAY}' has not been spun up here ({compose_file} missing)")
+    return DockerManager(
+        compose_file=compose_file,
+        env_file=env_file if env_file.is_file() else None,
+        service_name=SERVICE_NAME,
+        working_dir=BASE_DIR,
+        project_name=slugify(name) if named else None,
+    )
+
+
+def save_state(cfg: ComposeConfig, out_dir: Path) -> Path:
+    """
+    Record what was spun up (no credentials) for `status` / `wait`.
+    """
+    state = {
+        'gateway': cfg.container_name,
+        'gateway_name': cfg.gateway_name,
+        'mode': cfg.mode,
+        'http_port': cfg.http_port,
+        'https_port': cfg.https_port,
+        'image': cfg.image_ref,
+        'fingerprint': cfg.fingerprint(),
+    }
+    path = out_dir / STATE_FILE
+    path.write_text(json.dumps(state, indent=2), encoding='utf-8')
+    return path
+
+
+def load_state(name: Optional[str] = None) -> dict:
+    return read_state(gateway_dir(name))
+
+
+def read_state(out_dir: Path) -> dict:
+    """
+    What save_state recorded in `out_dir`; empty if nothing (readable) was.
+    """
+    path = out_dir / STATE_FILE
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable gateway state %s: %s", path, e)
+        return {}
+
+
+def known_gateways() -> List[str]:
+    """
+    Gateways with rendered compose files, the default one first.
+    """
+    names = []
+    if (GENERATED_DIR / 'docker-compose.yml').is_file():
+        names.append(DEFAULT_GATEWAY)
+    if FLEET_DIR.is_dir():
+        names += sorted(p.parent.name for p in FLEET_DIR.glob('*/docker-compose.yml'))
+    return names
+
+
+def running_gateways(exclude: Iterable[str] = ()) -> List[str]:
+    """
+    Known gateways (other than `exclude`) whose container is running, for
+    sizing a new one. Gateways whose state cannot be read are skipped.
+    """
+    skip = set(exclude)
+    running = []
+    for name in known_gateways():
+        if name in skip:
+            continue
+        try:
+            if manager_for(name).status() == 'running':
+                running.append(name)
+        except AppError as e:
+            logger.debug("Skipping %s when counting running gateways: %s", name, e)
+    return running
+
+
+def use_tag_delta(cfg: ComposeConfig, base_hash: str, out_dir: Path, on_line: Optional[LineCallback] = None) -> bool:
+    """
+    Diff `cfg`'s tag export against the one with content hash `base_hash`
+    (already imported by the gateway), write the delta next to the compose
+    file and re-render it to mount the delta instead of the full export.
+    Returns False, leaving `cfg` as it was, when no delta can be made.
+    """
+    say = on_line or (lambda _line: None)
+    assert cfg.tag_file is not None
+    fmt = cfg.tag_file.format
+    dest = out_dir / f"{DELTA_NAME}.{fmt}"
+    try:
+        if cfg.tag_file.content_hash() == base_hash:
+            write_empty_delta(dest, fmt)
+            say("🏷 Tags unchanged since the gateway's last import.")
+        else:
+            base = store_for(TAGS_DIR).blob_path(base_hash)
+            if not base.is_file():
+                say("⚠ The previously imported tag export is gone; importing all tags.")
+                return False
+            with TagDiff(base, cfg.tag_file.path, fmt=fmt, work_dir=out_dir) as diff:
+                diff.write_delta(dest)
+                say(f"🏷 Importing only the tag changes: {diff.summary.describe()}")
+                if diff.summary.removed:
+                    say("⚠ Removed tags stay on the gateway until it is recreated: "
+                        + ", ".join(c.path for _, c in zip(range(10), diff.changes(REMOVED))))
+    except (TagValidationError, OSError, sqlite3.Error) as e:
+        logger.warning("Tag delta for %s failed: %s", cfg.tag_file.name, e)
+        say(f"⚠ Could not diff the tag exports ({e}); importing all tags.")
+        return False
+    cfg.tag_delta = str(dest.resolve())
+    render_all(cfg, out_dir)
+    return True
+
+
+def apply_plan(
+    mgr: DockerManager,
+    cfg: ComposeConfig,
+    snapshot: Optional[SnapshotInfo] = None,
+    snapshots: Optional[SnapshotStore] = None,
+    on_line: Optional[LineCallback] = None,
+    wipe: bool = False,
+) -> str:
+    """
+    Reuse, recreate or prepare the gateway container for `cfg` and return
+    the plan. PLAN_START / PLAN_RUNNING leave a running gateway behind;
+    for the other plans the caller still runs compose up:
+    PLAN_RECREATE has replaced the container, keeping its data;
+    PLAN_TAG_DELTA leaves compose to do so with a delta of the tags
+    mounted; PLAN_RESET (another backup, or `wipe`) has torn the old stack
+    down with its data; for it and PLAN_CREATE the data volume is seeded
+    from `snapshot`.
+    """
+    say = on_line or (lambda _line: None)
+    out_dir = mgr.compose_file.parent
+    try:
+        plan = mgr.reuse_plan(
+            cfg.fingerprint(), cfg.base_fingerprint() if cfg.tag_file else None,
+            cfg.data_fingerprint(), wipe=wipe,
+        )
+    except DockerManagerError as e:
+        say(f"⚠ Could not inspect existing gateway ({e}); creating it.")
+        plan = PLAN_CREATE
+
+    if plan == PLAN_START:
+        say("♻ Configuration unchanged; restarting the existing gateway with its data…")
+        mgr.start()
+        return plan
+    if plan == PLAN_RUNNING:
+        say("♻ Configuration unchanged; gateway is already running.")
+        return plan
+    if plan == PLAN_TAG_DELTA:
+        base_hash = mgr.running_tag_hash()
+        if base_hash and use_tag_delta(cfg, base_hash, out_dir, say):
+            return plan
+        plan = PLAN_RECREATE
+
+    if plan == PLAN_RECREATE:
+        say("Configuration changed; recreating the gateway on its data…")
+        mgr.recreate()
+        return plan
+    if plan == PLAN_RESET:
+        say("Different backup or fresh data requested; removing the gateway and its data…")
+        mgr.down()
+    if snapshot:
+        say("❄ Seeding data volume from snapshot…")
+        mgr.seed_data_volume(snapshot.path, cfg.image_ref)
+        if snapshots:
+            snapshots.touch(snapshot)
+        if cfg.tag_file and snapshot.tag_hash:
+            # The snapshot already holds the tags imported when it was taken
+            use_tag_delta(cfg, snapshot.tag_hash, out_dir, say)
+    return plan
+
+
+def capture_snapshot(mgr: DockerManager, cfg: ComposeConfig, snapshots: SnapshotStore) -> SnapshotInfo:
+    """
+    Save the running gateway's restored data volume as a warm snapshot of
+    its backup. The gateway restarts briefly.
+    """
+    assert cfg.backup is not None
+    backup_hash = cfg.backup.content_hash()
+    staged = snapshots.staging_path(backup_hash, cfg.image_ref)
+    try:
+        mgr.export_data_snapshot(staged, cfg.image_ref)
+        tag_hash = cfg.tag_file.content_hash() if cfg.tag_file else None
+        return snapshots.commit(staged, backup_hash, cfg.backup.name, cfg.image_ref, tag_hash)
+    except BaseException:
+        staged.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,380 @@
+# src/gateway_logs.py
+"""
+Per-gateway log folders, with retention and compression.
+
+Each gateway mounts logs/gateways/<container name>/ as its data/logs.
+Closed log files (untouched for an hour) are gzip-compressed in the
+background; files older than the age limit are deleted, then the oldest
+closed files go until the total fits the size limit. Files a running
+gateway keeps open (wrapper.log, the system_logs.idb database) are never
+touched. Wrapper logs left in logs/ by the old shared mount are aged out
+too.
+"""
+
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import perf
+from utils import format_size
+
+logger = logging.getLogger(__name__)
+
+# Directories
+BASE_DIR = Path(__file__).resolve().parent.parent
+LOGS_DIR = BASE_DIR / 'logs'
+GATEWAY_LOGS_DIR = LOGS_DIR / 'gateways'
+
+# Retention defaults: whichever limit is hit first
+DEFAULT_MAX_AGE_DAYS = 14
+DEFAULT_MAX_TOTAL_BYTES = 2 * 1024 ** 3
+# A log file untouched this long is closed and may be compressed
+DEFAULT_COMPRESS_AFTER = 3600
+MAINTENANCE_INTERVAL = 3600
+
+# Written by a running gateway: never compressed, removed or counted as closed
+_ACTIVE_NAMES = {'wrapper.log'}
+_ACTIVE_SUFFIXES = ('.idb', '.idb-journal', '.idb-wal', '.idb-shm')
+# Gateway files the shared mount left directly in logs/
+_LEGACY_PREFIXES = ('wrapper.log', 'system_logs.idb')
+LEGACY_GROUP = '(shared)'
+_CHUNK = 1024 * 1024
+
+
+def gateway_log_dir(container_name: str) -> Path:
+    """
+    Host folder mounted as a gateway's data/logs. Container names are
+    already valid folder names.
+    """
+    if not container_name or '/' in container_name or container_name in ('.', '..'):
+        raise ValueError(f"Invalid container name for a log folder: {container_name!r}")
+    return GATEWAY_LOGS_DIR / container_name
+
+
+def _is_active(name: str) -> bool:
+    return name in _ACTIVE_NAMES or name.endswith(_ACTIVE_SUFFIXES)
+
+
+@dataclass
+class LogRetention:
+    max_age_days: float = DEFAULT_MAX_AGE_DAYS
+    max_total_bytes: int = DEFAULT_MAX_TOTAL_BYTES
+    compress_after: float = DEFAULT_COMPRESS_AFTER
+
+
+@dataclass
+class LogUsage:
+    """
+    Log files of one gateway folder ('(shared)' for the old shared mount).
+    """
+    gateway: str
+    files: int = 0
+    bytes: int = 0
+    compressed_files: int = 0
+    compressed_bytes: int = 0
+    oldest: Optional[float] = None
+
+
+@dataclass
+class UsageReport:
+    gateways: List[LogUsage] = field(default_factory=list)
+    # Panel logs, perf reports and log indexes elsewhere in logs/
+    other_bytes: int = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.other_bytes + sum(g.bytes for g in self.gateways)
+
+    def describe(self) -> str:
+        gateway_bytes = sum(g.bytes for g in self.gateways)
+        return (
+            f"{format_size(self.total_bytes)} of logs "
+            f"({format_size(gateway_bytes)} in {len(self.gateways)} gateway folder(s))"
+        )
+
+    def details(self) -> str:
+        """
+        One line per gateway folder, largest first.
+        """
+        lines = []
+        for g in self.gateways:
+            oldest = time.strftime('%Y-%m-%d', time.localtime(g.oldest)) if g.oldest else '-'
+            lines.append(
+                f"{g.gateway}: {format_size(g.bytes)} in {g.files} file(s), "
+                f"{g.compressed_files} compressed, oldest {oldest}"
+            )
+        lines.append(f"Panel logs, perf reports and indexes: {format_size(self.other_bytes)}")
+        return '\n'.join(lines)
+
+    def to_json(self) -> dict:
+        data = asdict(self)
+        data['total_bytes'] = self.total_bytes
+        return data
+
+
+@dataclass
+class MaintenanceResult:
+    compressed: int = 0
+    removed: int = 0
+    freed_bytes: int = 0
+
+    def describe(self) -> str:
+        return f"{self.compressed} compressed, {self.removed} removed, {format_size(self.freed_bytes)} freed"
+
+
+# --- scanning ----------------------------------------------------------------
+
+# (group, path, size, mtime)
+_Entry = Tuple[str, Path, int, float]
+
+
+def _walk(directory: Path) -> List[Tuple[Path, os.stat_result]]:
+    found = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    found.extend(_walk(Path(entry.path)))
+                elif entry.is_file(follow_symlinks=False):
+                    found.append((Path(entry.path), entry.stat(follow_symlinks=False)))
+    except FileNotFoundError:
+        pass
+    return found
+
+
+def _legacy_files(logs_dir: Optional[Path]) -> List[_Entry]:
+    files: List[_Entry] = []
+    if logs_dir is None:
+        return files
+    try:
+        with os.scandir(logs_dir) as it:
+            for e in it:
+                if e.is_file(follow_symlinks=False) and e.name.startswith(_LEGACY_PREFIXES):
+                    st = e.stat(follow_symlinks=False)
+                    files.append((LEGACY_GROUP, Path(e.path), st.st_size, st.st_mtime))
+    except FileNotFoundError:
+        pass
+    return files
+
+
+def _gateway_files(root: Path, legacy_dir: Optional[Path]) -> List[_Entry]:
+    files: List[_Entry] = []
+    try:
+        groups = [Path(e.path) for e in os.scandir(root) if e.is_dir(follow_symlinks=False)]
+    except FileNotFoundError:
+        groups = []
+    for group in groups:
+        files.extend((group.name, p, st.st_size, st.st_mtime) for p, st in _walk(group))
+    return files + _legacy_files(legacy_dir)
+
+
+def usage(root: Path = GATEWAY_LOGS_DIR, logs_dir: Optional[Path] = LOGS_DIR) -> UsageReport:
+    """
+    Sizes of every gateway log folder and of the rest of logs/, from one
+    directory scan (no file is opened).
+    """
+    report = UsageReport()
+    by_group = {}
+    for group, path, size, mtime in _gateway_files(root, logs_dir):
+        u = by_group.setdefault(group, LogUsage(gateway=group))
+        u.files += 1
+        u.bytes += size
+        if path.name.endswith('.gz'):
+            u.compressed_files += 1
+            u.compressed_bytes += size
+        u.oldest = mtime if u.oldest is None else min(u.oldest, mtime)
+    report.gateways = sorted(by_group.values(), key=lambda u: -u.bytes)
+    if logs_dir is not None:
+        counted = {path for _, path, _, _ in _legacy_files(logs_dir)}
+        for path, st in _walk(logs_dir):
+            if path not in counted and root not in path.parents:
+                report.other_bytes += st.st_size
+    return report
+
+
+# --- maintenance -------------------------------------------------------------
+
+def _compress(path: Path) -> int:
+    """
+    Gzip a closed log file next to itself, keeping its mtime for the age
+    limit. Returns the bytes saved.
+    """
+    st = path.stat()
+    target = path.with_name(f"{path.name}.gz")
+    tmp = path.with_name(f".{path.name}.gz.tmp")
+    try:
+        with open(path, 'rb') as src, gzip.open(tmp, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, _CHUNK)
+        os.utime(tmp, (st.st_atime, st.st_mtime))
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    path.unlink()
+    return st.st_size - target.stat().st_size
+
+
+def _remove(path: Path, size: int, result: MaintenanceResult) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        return
+    result.removed += 1
+    result.freed_bytes += size
+
+
+_maintain_lock = threading.Lock()
+
+
+def maintain(
+    policy: Optional[LogRetention] = None,
+    root: Path = GATEWAY_LOGS_DIR,
+    logs_dir: Optional[Path] = LOGS_DIR,
+    now: Optional[float] = None,
+) -> MaintenanceResult:
+    """
+    Compress closed log files, then apply the age and total size limits.
+    A run already in progress (another thread) makes this a no-op.
+    """
+    policy = policy or LogRetention()
+    result = MaintenanceResult()
+    if not _maintain_lock.acquire(blocking=False):
+        return result
+    try:
+        with perf.span('logs.maintain') as attrs:
+            now = time.time() if now is None else now
+            closed_before = now - policy.compress_after
+            for group, path, size, mtime in _gateway_files(root, None):
+                name = path.name
+                if mtime < closed_before and not _is_active(name) and not name.endswith('.gz') \
+                        and not name.startswith('.'):
+                    try:
+                        result.freed_bytes += _compress(path)
+                        result.compressed += 1
+                    except OSError as e:
+                        logger.warning("Could not compress %s: %s", path, e)
+
+            # Rescan: compression changed names and sizes
+            files = _gateway_files(root, logs_dir)
+            expire_before = now - policy.max_age_days * 86400
+            total = sum(size for _, _, size, _ in files)
+            candidates = []
+            for group, path, size, mtime in files:
+                # The shared folder has no running gateway once re-rendered,
+                # but its files only go by age
+                if _is_active(path.name) and group != LEGACY_GROUP:
+                    continue
+                if mtime < expire_before:
+                    _remove(path, size, result)
+                    total -= size
+                elif group != LEGACY_GROUP:
+                    candidates.append((mtime, size, path))
+            for mtime, size, path in sorted(candidates):
+                if total <= policy.max_total_bytes:
+                    break
+                _remove(path, size, result)
+                total -= size
+            if total > policy.max_total_bytes:
+                logger.warning(
+                    "Gateway logs still use %s (limit %s): only open files are left",
+                    format_size(total), format_size(policy.max_total_bytes),
+                )
+            _prune_empty_dirs(root, expire_before)
+            attrs.update(compressed=result.compressed, removed=result.removed, freed=result.freed_bytes)
+    finally:
+        _maintain_lock.release()
+    if result.compressed or result.removed:
+        logger.info("Log maintenance: %s", result.describe())
+    return result
+
+
+def _prune_empty_dirs(root: Path, expire_before: float) -> None:
+    try:
+        groups = [Path(e.path) for e in os.scandir(root) if e.is_dir(follow_symlinks=False)]
+    except FileNotFoundError:
+        return
+    for group in groups:
+        for dirpath, dirnames, filenames in os.walk(group, topdown=False):
+            if dirnames or filenames:
+                continue
+            try:
+                if os.stat(dirpath).st_mtime < expire_before:
+                    os.rmdir(dirpath)
+            except OSError:
+                pass
+
+
+def clear_gateway_logs(container_name: str) -> int:
+    """
+    Delete a gateway's closed and compressed log files and empty its
+    wrapper.log (a running gateway keeps appending to it). The log
+    database is left alone. Returns the bytes freed.
+    """
+    freed = 0
+    for path, st in _walk(gateway_log_dir(container_name)):
+        try:
+            if path.name in _ACTIVE_NAMES:
+                with open(path, 'r+b') as f:
+                    f.truncate(0)
+            elif not _is_active(path.name):
+                path.unlink()
+            else:
+                continue
+        except OSError as e:
+            logger.warning("Could not clear %s: %s", path, e)
+            continue
+        freed += st.st_size
+    logger.info("Cleared %s of logs for %s", format_size(freed), container_name)
+    return freed
+
+
+class LogJanitor:
+    """
+    Runs `maintain` on a background thread at start and then every
+    `interval` seconds, passing each usage report to `on_report`.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[LogRetention] = None,
+        interval: float = MAINTENANCE_INTERVAL,
+        on_report: Optional[Callable[[UsageReport, MaintenanceResult], None]] = None,
+    ):
+        self.policy = policy or LogRetention()
+        self.interval = interval
+        self.on_report = on_report
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='log-janitor', daemon=True)
+            self._thread.start()
+
+    def run_now(self) -> None:
+        """
+        Run a pass (and report) as soon as possible.
+        """
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                result = maintain(self.policy)
+                if self.on_report:
+                    self.on_report(usage(), result)
+            except Exception:
+                logger.exception("Log maintenance failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
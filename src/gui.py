@@ -1,9 +1,10 @@
 # src/gui.py
 
-import socket
 import subprocess
 import sys
 import threading
+import time
+from datetime import datetime
 from pathlib import Path
 import typing
 import webbrowser
@@ -11,19 +12,38 @@ import webbrowser
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QFormLayout, QVBoxLayout,
     QLabel, QLineEdit, QPushButton, QFileDialog, QComboBox,
-    QTextEdit, QMessageBox
+    QPlainTextEdit, QMessageBox, QSpinBox, QDoubleSpinBox, QProgressBar, QCheckBox,
+    QDialog, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QHBoxLayout
 )
 from PyQt5.QtGui import QPalette, QColor
-from PyQt5.QtCore import Qt, QMetaObject, Q_ARG, QTimer
-from PyQt5.QtGui import QCloseEvent, QTextCursor
+from PyQt5.QtCore import Qt, QMetaObject, Q_ARG, QTimer, pyqtSignal
+from PyQt5.QtGui import QCloseEvent
 
 # application modules
+import perf
+from gateway_logs import LogJanitor, clear_gateway_logs
+from log_buffer import LineBuffer
+from log_filter import LogFilter, parse_spec
+from log_index import INDEX_DIR, LogIndex, LogIndexWriter
 from log_watcher import FileWatcher
 from logging_config import setup_logging
-from utils import save_backup, save_tag_file, unzip_project, clear_generated
-from compose_generator import build_config, render_compose, render_env
-from docker_manager import DockerManager
-from errors import AppError, DockerManagerError
+from utils import find_free_port, is_port_free
+from docker_backends import LogRecord, docker_binary
+from docker_manager import DockerManager, PLAN_CREATE, PLAN_RESET, PLAN_RUNNING, PLAN_START
+from readiness import PhaseMark, ReadinessResult
+from fleet import Fleet, replica_names
+from gateway import apply_plan, base_raw, capture_snapshot, load_state, manager_for, save_state
+from images import IGNITION_REPOSITORY, KNOWN_TAGS, ImageCache, image_reference
+from sizing import describe_host
+from snapshots import SnapshotStore
+from tag_inventory import INVENTORY_DIR_NAME, load_inventory
+from project_inventory import load_project_inventory
+from spinup import (
+    STAGE_CANCELLED, STAGE_DONE, STAGE_FAILED, STAGE_RUNNING, STAGE_SKIPPED,
+    SpinUpRequest, prepare_gateway,
+)
+from errors import AppError, DockerManagerError, SpinUpCancelled
 
 # Constants for directories
 BASE_DIR     = Path(__file__).resolve().parent.parent
@@ -32,9 +52,37 @@ PROJECTS_DIR = BASE_DIR / 'projects'
 TAGS_DIR     = BASE_DIR / 'tags'
 GENERATED    = BASE_DIR / 'generated'
 
+# Log console rendering
+DEFAULT_MAX_LOG_LINES = 20_000
+LOG_FLUSH_INTERVAL_MS = 16   # roughly once per frame
+# Progress bar updates from workers: whole-percent steps, at most ~30 per second
+PROGRESS_MIN_INTERVAL = 1 / 30
+
+# How spin-up stage states are shown
+STAGE_MARKS = {
+    STAGE_RUNNING: '…',
+    STAGE_DONE: '✔',
+    STAGE_FAILED: '✖',
+    STAGE_CANCELLED: '⏹',
+    STAGE_SKIPPED: '–',
+}
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # (title, message) from worker threads, shown as a dialog on the GUI thread
+    error_raised = pyqtSignal(str, str)
+    # (request generation, summary, warnings) from the tag inventory thread
+    tag_inventory_ready = pyqtSignal(int, str, str)
+    # (request generation, summary, details) from the project inventory thread
+    project_inventory_ready = pyqtSignal(int, str, str)
+    # (resources summary, what auto sizing was based on) after preparation
+    resources_ready = pyqtSignal(str, str)
+    # (summary, per-gateway details) from the log maintenance thread
+    log_usage_ready = pyqtSignal(str, str)
+    # (done, total) from worker threads, throttled by set_progress
+    progress_changed = pyqtSignal(int, int)
+
+    def __init__(self, max_log_lines: int = DEFAULT_MAX_LOG_LINES):
         super().__init__()
         self.setWindowTitle("Ignition Dev Gateway Admin Panel")
         self.resize(800, 1000)
@@ -64,14 +112,24 @@ class MainWindow(QMainWindow):
         self.project_le = QLineEdit()
         self.project_btn = QPushButton("Browse…")
         self.project_btn.clicked.connect(self._pick_project)
+        self.project_le.editingFinished.connect(self._inspect_project)
         self.form.addRow("Project ZIP:", self._hbox(self.project_le, self.project_btn))
+        # Inventory of the project folder the ZIP was last synced into
+        self.project_info_lbl = QLabel("")
+        self.project_info_lbl.setWordWrap(True)
+        self.form.addRow("", self.project_info_lbl)
 
 
         # Tag file picker
         self.tag_le = QLineEdit()
         self.tag_btn = QPushButton("Browse…")
         self.tag_btn.clicked.connect(self._pick_tag)
+        self.tag_le.editingFinished.connect(self._inspect_tag_file)
         self.form.addRow("Tag JSON/XML:", self._hbox(self.tag_le, self.tag_btn))
+        # Inventory of the chosen export, analyzed in the background
+        self.tag_info_lbl = QLabel("")
+        self.tag_info_lbl.setWordWrap(True)
+        self.form.addRow("", self.tag_info_lbl)
 
 
         # Ports & credentials
@@ -92,6 +150,57 @@ class MainWindow(QMainWindow):
         self.form.addRow("Edition:", self.edition_le)
         self.form.addRow("Timezone:", self.tz_le)
 
+        # Gateway version: picking one starts pulling it in the background
+        self.images = ImageCache()
+        self.version_cb = QComboBox()
+        self.version_cb.setEditable(True)
+        self.version_cb.addItems(KNOWN_TAGS)
+        self.version_cb.activated.connect(lambda _idx: self.prefetch_image())
+        self.version_cb.lineEdit().editingFinished.connect(self.prefetch_image)
+        self.images_btn = QPushButton("Images…")
+        self.images_btn.clicked.connect(self.on_manage_images)
+        self.form.addRow("Ignition Version:", self._hbox(self.version_cb, self.images_btn))
+
+        # Fleet size: >1 spins up that many isolated gateways in parallel
+        self.count_sb = QSpinBox()
+        self.count_sb.setRange(1, 20)
+        self.count_sb.setValue(1)
+        self.form.addRow("Gateways:", self.count_sb)
+
+        # JVM heap and container limits: auto sizes them from the host, the
+        # number of gateways and the project and tag sizes at spin-up
+        self.resources_cb = QComboBox()
+        self.resources_cb.addItems(["auto", "manual"])
+        self.resources_cb.currentTextChanged.connect(self._on_resources_change)
+        self.heap_sb = QSpinBox()
+        self.heap_sb.setRange(512, 65_536)
+        self.heap_sb.setSingleStep(256)
+        self.heap_sb.setValue(2048)
+        self.heap_sb.setSuffix(" MB")
+        self.mem_limit_sb = QSpinBox()
+        self.mem_limit_sb.setRange(0, 131_072)
+        self.mem_limit_sb.setSingleStep(256)
+        self.mem_limit_sb.setSuffix(" MB")
+        self.mem_limit_sb.setSpecialValueText("no limit")
+        self.cpus_sb = QDoubleSpinBox()
+        self.cpus_sb.setRange(0, 256)
+        self.cpus_sb.setSingleStep(0.5)
+        self.cpus_sb.setDecimals(1)
+        self.cpus_sb.setSpecialValueText("all")
+        self.form.addRow("Resources:", self._hbox(
+            self.resources_cb, QLabel("Max heap:"), self.heap_sb,
+            QLabel("Memory limit:"), self.mem_limit_sb, QLabel("CPUs:"), self.cpus_sb,
+        ))
+        self.resources_lbl = QLabel(f"Sized at spin-up for this host ({describe_host()}).")
+        self.resources_lbl.setWordWrap(True)
+        self.form.addRow("", self.resources_lbl)
+        self._on_resources_change(self.resources_cb.currentText())
+
+        # Warm snapshots: boot backup-mode gateways from a saved data volume
+        self.snapshot_cb = QCheckBox("Use warm snapshot of restored backup (save one if missing)")
+        self.snapshot_cb.setChecked(True)
+        self.form.addRow("Snapshots:", self.snapshot_cb)
+
         # Connection Type selector
         self.conn_type_cb = QComboBox()
         self.conn_type_cb.addItems(["Ethernet", "Serial"])
@@ -118,6 +227,10 @@ class MainWindow(QMainWindow):
         # Buttons
         self.spin_btn = QPushButton("Spin Up Gateway")
         self.spin_btn.clicked.connect(self.on_spin_up)
+        self.cancel_btn = QPushButton("Cancel Spin Up")
+        self.cancel_btn.clicked.connect(self.on_cancel_spin_up)
+        self.stop_btn = QPushButton("Stop Gateway (Keep Data)")
+        self.stop_btn.clicked.connect(self.on_soft_stop)
         self.down_btn = QPushButton("Tear Down Gateway")
         self.down_btn.clicked.connect(self.on_tear_down)
         self.purge_btn = QPushButton("Purge All Docker Resources")
@@ -126,25 +239,100 @@ class MainWindow(QMainWindow):
         self.clear_btn.clicked.connect(self.on_clear_logs)
         self.open_btn = QPushButton("Open Gateway")
         self.open_btn.clicked.connect(self.on_open_gateway)
+        self.snapshots_btn = QPushButton("Manage Snapshots…")
+        self.snapshots_btn.clicked.connect(self.on_manage_snapshots)
     
 
         self.down_btn.setEnabled(False)
+        self.stop_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(False)
         self.purge_btn.setEnabled(True)
         self.spin_btn.setEnabled(True)
         self.open_btn.setEnabled(False)
 
         layout.addWidget(self.clear_btn)
         layout.addWidget(self.spin_btn)
+        layout.addWidget(self.cancel_btn)
+        layout.addWidget(self.stop_btn)
         layout.addWidget(self.down_btn)
         layout.addWidget(self.purge_btn) 
         layout.addWidget(self.open_btn)
-
-        # Log console
-        self.log_console = QTextEdit()
+        layout.addWidget(self.snapshots_btn)
+
+        # Spin-up pipeline stages (file preparation, image, rendering)
+        self.stages_lbl = QLabel("")
+        self.stages_lbl.setStyleSheet("font-family: monospace;")
+        self.stages_lbl.setWordWrap(True)
+        layout.addWidget(self.stages_lbl)
+
+        # Startup phase timeline from the readiness probe
+        self.startup_lbl = QLabel("")
+        self.startup_lbl.setStyleSheet("font-family: monospace;")
+        layout.addWidget(self.startup_lbl)
+
+        # Where the last launch spent its time, compared with the one before
+        self.perf_view = QPlainTextEdit()
+        self.perf_view.setReadOnly(True)
+        self.perf_view.setStyleSheet("font-family: monospace;")
+        self.perf_view.setMaximumHeight(140)
+        layout.addWidget(QLabel("Last Launch Performance:"))
+        layout.addWidget(self.perf_view)
+
+        # Progress of long file operations (project extraction)
+        self.progress = QProgressBar()
+        self.progress.setVisible(False)
+        layout.addWidget(self.progress)
+
+        # Log console: plain text, bounded, fed from a buffer once per frame
+        self.log_console = QPlainTextEdit()
         self.log_console.setReadOnly(True)
-        layout.addWidget(QLabel("Gateway Logs:"))
+        self.log_console.setUndoRedoEnabled(False)
+        self.max_lines_sb = QSpinBox()
+        self.max_lines_sb.setRange(1_000, 1_000_000)
+        self.max_lines_sb.setSingleStep(10_000)
+        self.max_lines_sb.valueChanged.connect(self.set_max_log_lines)
+        self.log_buffer = LineBuffer(maxlen=max_log_lines)
+        self.log_console.setMaximumBlockCount(max_log_lines)
+        self.max_lines_sb.setValue(max_log_lines)
+        self.log_usage_lbl = QLabel("")
+        layout.addWidget(self._hbox(
+            QLabel("Gateway Logs:"), self.log_usage_lbl, QLabel("Max lines:"), self.max_lines_sb,
+        ))
+
+        # Console filter, applied on the reader threads; edits apply live
+        self.log_filter = LogFilter()
+        self.filter_level_cb = QComboBox()
+        self.filter_level_cb.addItems(["ALL", "DEBUG", "INFO", "WARN", "ERROR"])
+        self.filter_level_cb.currentTextChanged.connect(self.on_filter_changed)
+        self.filter_include_le = QLineEdit()
+        self.filter_include_le.setPlaceholderText("Only loggers, e.g. tags.*, gateway.*")
+        self.filter_exclude_le = QLineEdit()
+        self.filter_exclude_le.setPlaceholderText("Hide loggers, e.g. *Metrics*")
+        self.filter_regex_le = QLineEdit()
+        self.filter_regex_le.setPlaceholderText("Regex, !regex to hide")
+        for le in (self.filter_include_le, self.filter_exclude_le, self.filter_regex_le):
+            le.editingFinished.connect(self.on_filter_changed)
+        self.filter_lbl = QLabel("")
+        layout.addWidget(self._hbox(
+            QLabel("Min level:"), self.filter_level_cb, self.filter_include_le,
+            self.filter_exclude_le, self.filter_regex_le, self.filter_lbl,
+        ))
+        self._filter_counts = (0, 0)
+
+        # Search the indexed log history of every gateway session
+        self.search_le = QLineEdit()
+        self.search_le.setPlaceholderText("level:ERROR logger:tags.* since:10m words…")
+        self.search_le.returnPressed.connect(self.on_search_logs)
+        self.search_btn = QPushButton("Search History")
+        self.search_btn.clicked.connect(self.on_search_logs)
+        layout.addWidget(self._hbox(self.search_le, self.search_btn))
         layout.addWidget(self.log_console, 1)
 
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self.log_timer.timeout.connect(self._flush_log)
+        self.log_timer.start()
+
         # Initial state
         self._on_mode_change(self.mode_cb.currentText())
 
@@ -153,10 +341,34 @@ class MainWindow(QMainWindow):
         self.stop_evt   = None
         self.log_thread = None
         self.file_watcher = None
+        self.fleet = None
+        self.snapshots = SnapshotStore()
+        self.pipeline = None
+        self._stage_states = {}
+        self._stage_lock = threading.Lock()
+        self._tag_inspect_gen = 0
+        self._project_inspect_gen = 0
+        self.error_raised.connect(self._show_error)
+        self.tag_inventory_ready.connect(self._show_tag_inventory)
+        self.project_inventory_ready.connect(self._show_project_inventory)
+        self.log_usage_ready.connect(self._show_log_usage)
+        self.resources_ready.connect(self._show_resources)
+        self.progress_changed.connect(self._show_progress)
+        # (percent, total, monotonic time) of the last progress update sent
+        self._progress_sent = (-1, 0, 0.0)
+        # One log index writer (= session) per gateway and launch
+        self.log_writers = {}
+        self._writers_lock = threading.Lock()
+        self.gateway_key = 'ignition-dev'
+        self.search_dialog = None
+        self._show_perf_summary()
+
+        # Compress and age out gateway log files now and every hour
+        self.log_janitor = LogJanitor(on_report=self._report_log_usage)
+        self.log_janitor.start()
 
     def _hbox(self, *widgets):
         """Helper to put widgets in an inline layout."""
-        from PyQt5.QtWidgets import QHBoxLayout
         box = QWidget()
         layout = QHBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
@@ -169,6 +381,7 @@ class MainWindow(QMainWindow):
         is_backup = (mode == "backup")
         self.backup_le.setEnabled(is_backup)
         self.backup_btn.setEnabled(is_backup)
+        self.snapshot_cb.setEnabled(is_backup)
         self.project_le.setEnabled(not is_backup)
         self.project_btn.setEnabled(not is_backup)
         self.tag_le.setEnabled(not is_backup)
@@ -183,46 +396,222 @@ class MainWindow(QMainWindow):
         path, _ = QFileDialog.getOpenFileName(self, "Select Project ZIP", str(PROJECTS_DIR), "ZIP Archive (*.zip)")
         if path:
             self.project_le.setText(path)
+            self._inspect_project()
 
     def _pick_tag(self):
         path, _ = QFileDialog.getOpenFileName(self, "Select Tag JSON/XML", str(TAGS_DIR), "Tags (*.json *.xml)")
         if path:
             self.tag_le.setText(path)
+            self._inspect_tag_file()
+
+    def _inspect_tag_file(self):
+        """Analyze the chosen tag export off the GUI thread and show its inventory."""
+        path = self.tag_le.text().strip()
+        self._tag_inspect_gen += 1
+        gen = self._tag_inspect_gen
+        self.tag_info_lbl.setToolTip("")
+        if not path:
+            self.tag_info_lbl.setText("")
+            return
+        self.tag_info_lbl.setText("Analyzing tag export…")
+
+        def _work():
+            warnings = []
+            try:
+                inventory = load_inventory(Path(path), TAGS_DIR / INVENTORY_DIR_NAME)
+                text = f"🏷 {inventory.summary()}"
+                warnings = inventory.warnings
+            except AppError as e:
+                text = f"⚠ {e}"
+            except Exception as e:
+                text = f"⚠ Could not analyze tag export: {e}"
+            self.tag_inventory_ready.emit(gen, text, "\n".join(warnings))
+        threading.Thread(target=_work, name="tag-inventory", daemon=True).start()
+
+    def _show_tag_inventory(self, gen: int, text: str, warnings: str):
+        # A newer pick supersedes this result
+        if gen != self._tag_inspect_gen:
+            return
+        self.tag_info_lbl.setText(text)
+        self.tag_info_lbl.setToolTip(warnings)
+
+    def _report_log_usage(self, report, result):
+        # Runs on the janitor thread; widgets are updated by the slot
+        self.log_usage_ready.emit(report.describe(), report.details())
+
+    def _show_log_usage(self, text: str, details: str):
+        self.log_usage_lbl.setText(text)
+        self.log_usage_lbl.setToolTip(details)
+
+    def _inspect_project(self):
+        """Show the inventory of the folder the chosen ZIP was last synced into, off the GUI thread."""
+        self._project_inspect_gen += 1
+        gen = self._project_inspect_gen
+        self.project_info_lbl.setToolTip("")
+        zip_path = self.project_le.text().strip()
+        if not zip_path:
+            self.project_info_lbl.setText("")
+            return
+        folder = PROJECTS_DIR / Path(zip_path).stem
+        if not folder.is_dir():
+            self.project_info_lbl.setText("Not imported yet; inventoried during spin-up.")
+            return
+        self.project_info_lbl.setText("Analyzing project…")
+
+        def _work():
+            try:
+                self._report_project(gen, load_project_inventory(folder), " (last import)")
+            except AppError as e:
+                self.project_inventory_ready.emit(gen, f"⚠ {e}", "")
+            except Exception as e:
+                self.project_inventory_ready.emit(gen, f"⚠ Could not analyze project: {e}", "")
+        threading.Thread(target=_work, name="project-inventory", daemon=True).start()
+
+    def _report_project(self, gen: int, inventory, suffix: str = ""):
+        """Thread-safe: show a project inventory, largest resources and warnings in the tooltip."""
+        details = [f"{name}: {size:,} bytes" for name, size in inventory.largest]
+        if details:
+            details.insert(0, "Largest resources:")
+        details += inventory.warnings
+        self.project_inventory_ready.emit(gen, f"📁 {inventory.summary()}{suffix}", "\n".join(details))
+
+    def _show_project_inventory(self, gen: int, text: str, details: str):
+        # A newer pick supersedes this result
+        if gen != self._project_inspect_gen:
+            return
+        self.project_info_lbl.setText(text)
+        self.project_info_lbl.setToolTip(details)
 
     def append_log(self, line: str):
-        """Thread-safe append to log console and auto-scroll to the bottom."""
-        # Append the line in the Qt event loop
-        QMetaObject.invokeMethod(
-            self.log_console,
-            "append",
-            Qt.ConnectionType.QueuedConnection,
-            Q_ARG(str, line)
-        )
-        # Use QTimer.singleShot to scroll after appending
-        def _scroll():
-            cursor = self.log_console.textCursor()
-            cursor.movePosition(QTextCursor.End)
-            self.log_console.setTextCursor(cursor)
-            self.log_console.ensureCursorVisible()
-        QTimer.singleShot(0, _scroll)
+        """Thread-safe: queue a line for the next console flush."""
+        self.log_buffer.push(line)
+
+    def clear_log(self):
+        """Drop pending and displayed console lines."""
+        self.log_buffer.clear()
+        self.log_console.clear()
+
+    def set_max_log_lines(self, count: int):
+        """Bound both the console and the pending-line buffer."""
+        self.log_console.setMaximumBlockCount(count)
+        self.log_buffer.resize(count)
+
+    def _flush_log(self):
+        """Render everything buffered since the last frame in one append."""
+        self._show_filter_counts()
+        lines, dropped = self.log_buffer.drain_with_dropped()
+        if not lines:
+            return
+        if dropped:
+            lines.insert(0, f"… {dropped} lines skipped (console could not keep up) …")
+        limit = self.log_console.maximumBlockCount()
+        if limit and len(lines) > limit:
+            lines = lines[-limit:]
+
+        bar = self.log_console.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum() - 2
+        self.log_console.appendPlainText('\n'.join(lines))
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+    def _show_filter_counts(self):
+        counts = self.log_filter.counts()
+        if counts == self._filter_counts:
+            return
+        self._filter_counts = counts
+        passed, dropped = counts
+        self.filter_lbl.setText(f"{dropped} hidden" if dropped else "")
+
+    def on_filter_changed(self, *_):
+        """Swap in the filter from the form; streams pick it up on their next line."""
+        try:
+            spec = parse_spec(
+                self.filter_level_cb.currentText(),
+                self.filter_include_le.text(),
+                self.filter_exclude_le.text(),
+                self.filter_regex_le.text(),
+            )
+            if spec == self.log_filter.spec:
+                return
+            self.log_filter.update(spec)
+        except ValueError as e:
+            QMessageBox.warning(self, "Log Filter", str(e))
+            return
+        self.log_filter.reset_counts()
+
+    def set_progress(self, done: int, total: int):
+        """
+        Thread-safe progress bar update; hides the bar once complete. Called
+        per archive entry, so only whole-percent steps (at most ~30 a
+        second) and completion reach the GUI thread.
+        """
+        percent = done * 100 // total if total else 100
+        now = time.monotonic()
+        last_percent, last_total, last_at = self._progress_sent
+        if done < total and total == last_total and (
+            percent == last_percent or now - last_at < PROGRESS_MIN_INTERVAL
+        ):
+            return
+        self._progress_sent = (percent, total, now)
+        self.progress_changed.emit(done, total)
+
+    def _show_progress(self, done: int, total: int):
+        self.progress.setMaximum(total)
+        self.progress.setValue(done)
+        self.progress.setVisible(done < total)
 
     def find_free_port(self):
-        with socket.socket() as s:
-            s.bind(('', 0))
-            return s.getsockname()[1]
+        return find_free_port()
 
     def is_port_free(self, port, timeout=10):
-        with socket.socket() as s:
-            s.settimeout(timeout)
-            return s.connect_ex(('127.0.0.1', port)) != 0
+        return is_port_free(port, timeout)
+
+    def append_fleet_log(self, name: str, line: str):
+        """Thread-safe append of a log line tagged with its gateway."""
+        self._log_writer(name).add(line)
+        if self.log_filter.accept(line):
+            self.append_log(f"[{name}] {line}")
+
+    def _log_writer(self, gateway: str) -> LogIndexWriter:
+        """The history index writer for a gateway's current session."""
+        with self._writers_lock:
+            writer = self.log_writers.get(gateway)
+            if writer is None:
+                writer = self.log_writers[gateway] = LogIndexWriter(LogIndex.for_gateway(gateway), gateway)
+            return writer
+
+    def _close_log_writers(self):
+        with self._writers_lock:
+            writers, self.log_writers = list(self.log_writers.values()), {}
+        for writer in writers:
+            writer.close()
+
+    def _on_container_record(self, rec: LogRecord):
+        # Everything is indexed, dated by the daemon; only what passes the
+        # filter is rendered
+        line = rec.text
+        self._log_writer(self.gateway_key).add(line, rec.time)
+        if self.log_filter.accept(line):
+            self.append_log(line)
+
+    def _stream_container_logs(self, mgr: DockerManager, stop_evt: threading.Event):
+        """Worker thread: follow the logs from where the index left off."""
+        # Neither lines already indexed nor earlier runs of the container
+        seen = self._log_writer(self.gateway_key).last_seen
+        try:
+            started = mgr.started_at()
+        except DockerManagerError:
+            started = None
+        since = max((t for t in (seen, started) if t is not None), default=None)
+        mgr.stream_records(self._on_container_record, stop_evt, since=since)
     
     def start_log_stream(self):
         """Begin tailing container logs after compose up."""
         self.stop_evt = threading.Event()
         if self.docker_mgr is not None:
             self.log_thread = threading.Thread(
-                target=self.docker_mgr.stream_logs,
-                args=(self.append_log, self.stop_evt),
+                target=self._stream_container_logs,
+                args=(self.docker_mgr, self.stop_evt),
                 daemon=True
             )
             self.log_thread.start()
@@ -242,6 +631,23 @@ class MainWindow(QMainWindow):
         self.com_le        .setVisible(not is_eth)
         self.baud_le       .setVisible(not is_eth)
 
+    def _on_resources_change(self, mode: str):
+        manual = mode == "manual"
+        for w in (self.heap_sb, self.mem_limit_sb, self.cpus_sb):
+            w.setEnabled(manual)
+
+    def _gather_resources(self, raw: dict):
+        """Heap and limits for build_config; 0 means unset."""
+        raw['resources'] = self.resources_cb.currentText()
+        if raw['resources'] == 'manual':
+            raw['heap_max_mb'] = str(self.heap_sb.value())
+            raw['mem_limit_mb'] = str(self.mem_limit_sb.value() or '')
+            raw['cpus'] = str(self.cpus_sb.value() or '')
+
+    def _show_resources(self, text: str, basis: str):
+        self.resources_lbl.setText(text)
+        self.resources_lbl.setToolTip(basis)
+
     def _gather_connection(self, raw: dict):
         """When building the raw dict, add only the relevant keys."""
         conn = self.conn_type_cb.currentText().lower()
@@ -254,117 +660,351 @@ class MainWindow(QMainWindow):
             raw['baud_rate']    = self.baud_le.text().strip()
 
 
+    def selected_image(self) -> str:
+        return image_reference(self.version_cb.currentText())
+
+    def prefetch_image(self):
+        """Start pulling the selected gateway image while the user keeps working."""
+        image = self.selected_image()
+        fut = self.images.ensure(image, on_line=lambda line: self.append_log(f"[pull] {line}"))
+        if not fut.done():
+            self.append_log(f"⬇ Pulling {image} in the background…")
+        return fut
+
+    def _set_enabled(self, widget, enabled: bool):
+        """Thread-safe setEnabled."""
+        QMetaObject.invokeMethod(
+            widget, "setEnabled", Qt.ConnectionType.QueuedConnection, Q_ARG(bool, enabled)
+        )
+
+    def _show_error(self, title: str, message: str):
+        QMessageBox.critical(self, title, message)
+
+    def _on_stage(self, name: str, state: str, elapsed: float):
+        """Mirror pipeline stage states into the stage label (any thread)."""
+        with self._stage_lock:
+            self._stage_states[name] = (state, elapsed)
+            parts = []
+            for stage, (st, secs) in self._stage_states.items():
+                mark = STAGE_MARKS.get(st, st)
+                parts.append(f"{stage} {mark} {secs:.1f}s" if st == STAGE_DONE else f"{stage} {mark}")
+            text = "   ".join(parts)
+        QMetaObject.invokeMethod(
+            self.stages_lbl, "setText", Qt.ConnectionType.QueuedConnection, Q_ARG(str, text)
+        )
+
     def on_spin_up(self):
-        """Spin up the Ignition dev gateway."""
+        """Capture the form, then prepare and start the gateway off the GUI thread."""
         try:
-            clear_generated()  # Prepare filesystem
+            self.clear_log()
+            # The image pull overlaps with the file preparation stages
+            self.prefetch_image()
 
-            # Check if ports are free
             if not self.http_le.text().strip():
                 http_port = self.find_free_port()
                 self.http_le.setText(str(http_port))
             else:
                 http_port = int(self.http_le.text().strip())
 
-            if not self.is_port_free(http_port):
-                raise AppError(f"Host port {http_port} is already in use.")
-
-            # Save user inputs to known dirs
             mode = self.mode_cb.currentText()
-            raw = {
-                'mode': mode,
-                'backups_dir': str(BACKUPS_DIR),
-                'projects_dir': str(PROJECTS_DIR),
-                'tags_dir': str(TAGS_DIR),
-                'http_port': self.http_le.text(),
-                'https_port': self.https_le.text(),
-                'admin_user': self.admin_le.text(),
-                'admin_pass': self.pass_le.text(),
-                'gateway_name': self.gateway_le.text(),
-                'edition': self.edition_le.text(),
-                'timezone': self.tz_le.text(),
-            }
+            raw = base_raw(
+                mode=mode,
+                http_port=self.http_le.text(),
+                https_port=self.https_le.text(),
+                admin_user=self.admin_le.text(),
+                admin_pass=self.pass_le.text(),
+                gateway_name=self.gateway_le.text(),
+                edition=self.edition_le.text(),
+                timezone=self.tz_le.text(),
+                image=self.selected_image(),
+            )
 
             # Gather connection info
             self._gather_connection(raw)
 
-            # backup/project/tag handling
-            if mode == 'backup':
-                backup_file = save_backup(self.backup_le.text())
-                raw['backup_name'] = backup_file
-            if self.project_le.text():
-                proj_name = unzip_project(self.project_le.text())
-                raw['project_name'] = proj_name
-            if self.tag_le.text():
-                tag_file = save_tag_file(self.tag_le.text())
-                raw['tag_name'] = tag_file
-
-            # Build config and render compose & env
-            cfg = build_config(raw)
-            compose_path = render_compose(cfg)      # writes generated/docker-compose.yml
-            env_path     = render_env(cfg)          # writes generated/.env
-            self.log_console.append(f"Generated compose file: {compose_path}")
-            self.log_console.append(f"Generated env file: {env_path}")
-            self.log_console.append("Starting Docker containers…")
-
-            # initialize the manager (with working_dir baked in if needed)
-            self.docker_mgr = DockerManager(
-                compose_file=compose_path,
-                env_file=env_path,
-                service_name='ignition-dev',
-                working_dir=BASE_DIR
+            count = self.count_sb.value()
+            raw['gateways'] = str(count)
+            self._gather_resources(raw)
+            request = SpinUpRequest(
+                raw=raw,
+                http_port=http_port,
+                backup_src=self.backup_le.text() if mode == 'backup' else None,
+                project_src=self.project_le.text() or None,
+                tag_src=self.tag_le.text() or None,
+                use_snapshots=self.snapshot_cb.isChecked(),
+                # A fleet's first replica normally holds the base port
+                own_port=load_state(
+                    None if count == 1 else replica_names(self.gateway_le.text(), count)[0]
+                ).get('http_port'),
+                render=count == 1,
             )
+        except ValueError as e:
+            QMessageBox.critical(self, "Error", f"Invalid port: {e}")
+            return
+        except AppError as e:
+            QMessageBox.critical(self, "Error", str(e))
+            return
 
-            # Clear existing console and show progress
-            self.log_console.clear()
-            self.log_console.append("▶ Starting Docker Compose…")
-            # Run `docker compose up` in the foreground and stream its lines
-            def do_compose_up():
-                try:
-                    if self.docker_mgr is not None:
-                        self.docker_mgr.up_stream(self.append_log)
-                        self.append_log("✅ Compose up completed.")
-                    else:
-                        self.append_log("❌ Docker manager is not initialized.")
-                        QMessageBox.critical(self, "Docker Error", "Docker manager is not initialized.")
-                        return
-
-                    # Now fall back to HTTP readiness probe
-                    port = int(self.http_le.text().strip())
-                    if self.docker_mgr.wait_for_gateway(port):
-                        self.append_log("✔️ Gateway responded on HTTP.")
-                        self.open_btn.setEnabled(True)
-                    else:
-                        self.append_log("❗ Gateway did not respond within timeout.")
-                        QMessageBox.warning(self, "Warning",
-                            "Gateway did not respond within timeout.")
-                        self.open_btn.setEnabled(False)
-
-                    # After compose up, still start the container-log tail
-                    self.start_log_stream()
-
-                except DockerManagerError as e:
-                    self.append_log(f"❌ Compose up failed: {e}")
-                    QMessageBox.critical(self, "Docker Error", str(e))
-                    # revert button state
-                    self.spin_btn.setEnabled(True)
-                    self.down_btn.setEnabled(False)
+        # Each launch starts a new log history session
+        self._close_log_writers()
+        with self._stage_lock:
+            self._stage_states.clear()
+        self.stages_lbl.setText("")
+        self.spin_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        perf.start_launch(
+            'fleet' if count > 1 else 'gateway',
+            mode=mode, image=raw['image'], gateways=count,
+            backup=bool(request.backup_src), project=bool(request.project_src), tags=bool(request.tag_src),
+        )
+        threading.Thread(target=self._run_spin_up, args=(request, count), daemon=True).start()
 
-            
-            threading.Thread(target=do_compose_up, daemon=True).start()
+    def on_cancel_spin_up(self):
+        pipeline = self.pipeline
+        if pipeline is not None:
+            self.append_log("⏹ Cancelling spin-up…")
+            pipeline.cancel()
 
-            # Update button states
-            self.open_btn.setEnabled(True)
-            self.spin_btn.setEnabled(False)
-            self.down_btn.setEnabled(True)
-            self.log_console.append("Gateway is starting up…")
+    def _keep_pipeline(self, pipeline):
+        self.pipeline = pipeline
 
+    def _run_spin_up(self, request: SpinUpRequest, count: int):
+        """Worker thread: run the preparation stages, then Docker."""
+        try:
+            prepared = prepare_gateway(
+                request, self.images, self.snapshots,
+                pipeline_hook=self._keep_pipeline,
+                on_stage=self._on_stage,
+                on_progress=lambda _stage, done, total: self.set_progress(done, total),
+                on_log=self.append_log,
+            )
+        except SpinUpCancelled:
+            self.append_log("⏹ Spin-up cancelled.")
+            self._set_enabled(self.spin_btn, True)
+            self._finish_launch('cancelled')
+            return
         except AppError as e:
-            QMessageBox.critical(self, "Error", str(e))
+            self.append_log(f"❌ {e}")
+            self.error_raised.emit("Error", str(e))
+            self._set_enabled(self.spin_btn, True)
+            self._finish_launch('failed')
+            return
         except Exception as e:
-            QMessageBox.critical(self, "Unexpected Error", str(e))
+            self.append_log(f"❌ {e}")
+            self.error_raised.emit("Unexpected Error", str(e))
+            self._set_enabled(self.spin_btn, True)
+            self._finish_launch('failed')
+            return
+        finally:
+            self.pipeline = None
+            self._set_enabled(self.cancel_btn, False)
+            self.set_progress(1, 1)
+
+        resources = prepared.config.resources
+        self.resources_ready.emit(
+            resources.describe() + (" per gateway" if count > 1 else ""), resources.basis,
+        )
+        if prepared.config.project:
+            # Freshly synced; the inventory is already cached
+            self._report_project(self._project_inspect_gen, prepared.config.project.inventory())
+        self._set_enabled(self.down_btn, True)
+        self._set_enabled(self.stop_btn, True)
+        if count > 1:
+            self._spin_up_fleet(prepared.config, count, request.use_snapshots)
+        else:
+            self._compose_up(prepared, request.use_snapshots)
+        # No-op if the readiness probe already closed the launch
+        self._finish_launch('failed')
+
+    def _compose_up(self, prepared, use_snapshots: bool):
+        """Worker thread: reuse, recreate or create the gateway and stream its startup."""
+        cfg, snapshot = prepared.config, prepared.snapshot
+        port = cfg.http_port
+        self.gateway_key = cfg.container_name
+        self.docker_mgr = mgr = manager_for(rendered=prepared.rendered)
+        save_state(cfg, prepared.rendered.compose_path.parent)
+        self._set_enabled(self.open_btn, True)
+        self.append_log("▶ Starting Docker Compose…")
+
+        try:
+            plan = apply_plan(mgr, cfg, snapshot, self.snapshots, on_line=self.append_log)
+        except DockerManagerError as e:
+            self.append_log(f"❌ Start failed: {e}")
+            return
+
+        # Same configuration as the existing container: its data was kept
+        if plan in (PLAN_START, PLAN_RUNNING):
+            self.start_log_stream()
+            self._run_readiness_probe(mgr, port, threading.Event())
+            return
+
+        if use_snapshots and cfg.mode == 'backup' and not snapshot and plan in (PLAN_CREATE, PLAN_RESET):
+            # First restore of this backup: run detached so the gateway
+            # can be stopped for the snapshot without ending compose up
+            self._up_and_capture_snapshot(mgr, port, cfg)
+            return
+
+        # Probe readiness while compose up streams in the foreground
+        probe_stop = threading.Event()
+        threading.Thread(
+            target=self._run_readiness_probe,
+            args=(mgr, port, probe_stop),
+            daemon=True
+        ).start()
+        try:
+            mgr.up_stream(self.log_filter.wrap(self.append_log))
+            self.append_log("✅ Compose up completed.")
+
+            # After compose up, still start the container-log tail
+            self.start_log_stream()
+
+        except DockerManagerError as e:
+            self.append_log(f"❌ Compose up failed: {e}")
+            self.error_raised.emit("Docker Error", str(e))
+            # revert button state
+            self._set_enabled(self.spin_btn, True)
+            self._set_enabled(self.down_btn, False)
+        finally:
+            probe_stop.set()
     
+    def _set_startup_timeline(self, text: str):
+        """Thread-safe update of the startup phase timeline."""
+        QMetaObject.invokeMethod(
+            self.startup_lbl, "setText", Qt.ConnectionType.QueuedConnection, Q_ARG(str, text)
+        )
+
+    def _run_readiness_probe(
+        self, mgr: DockerManager, port: int, stop_event: threading.Event, finish_launch: bool = True
+    ) -> ReadinessResult:
+        """Probe the gateway and mirror its phase timeline into the UI."""
+        partial = ReadinessResult(ready=False, elapsed=0.0)
+        self._set_startup_timeline(partial.timeline())
+
+        def on_phase(mark: PhaseMark):
+            partial.phases.append(mark)
+            self._set_startup_timeline(partial.timeline())
+            self.append_log(f"⏱ {mark.phase} (+{mark.at:.1f}s)")
+
+        result = mgr.probe_gateway(port, on_phase=on_phase, stop_event=stop_event)
+        self._set_startup_timeline(result.timeline())
+        if result.ready:
+            self.append_log(f"✔️ Gateway RUNNING after {result.elapsed:.1f}s.")
+        elif result.failure != 'cancelled':
+            self.append_log(f"❗ Gateway did not become ready: {result.failure}")
+        QMetaObject.invokeMethod(
+            self.open_btn, "setEnabled", Qt.ConnectionType.QueuedConnection,
+            Q_ARG(bool, result.ready)
+        )
+        if finish_launch:
+            self._finish_launch('ready' if result.ready else result.failure)
+        return result
+
+    def _finish_launch(self, outcome: typing.Optional[str] = None):
+        """Write the launch's performance report and show its summary (any thread)."""
+        report = perf.current()
+        if report is None:
+            return
+        if outcome:
+            report.set_meta(outcome=outcome)
+        path = perf.end_launch()
+        if path is None:
+            return
+        self.append_log(f"⏱ Performance report written to {path}")
+        self._show_perf_summary()
+
+    def _show_perf_summary(self):
+        reports = perf.load_reports(limit=2)
+        if not reports:
+            return
+        latest, previous = reports[0], (reports[1] if len(reports) > 1 else None)
+        header = f"{latest.get('label')} {latest.get('started_at')} ({latest.get('meta', {}).get('outcome', '?')})"
+        if previous:
+            header += f" vs {previous.get('started_at')}"
+        QMetaObject.invokeMethod(
+            self.perf_view, "setPlainText", Qt.ConnectionType.QueuedConnection,
+            Q_ARG(str, header + "\n" + perf.summarize(latest, previous))
+        )
+
+    def _up_and_capture_snapshot(self, mgr: DockerManager, port: int, cfg):
+        """Start detached, wait for RUNNING, then save the restored data volume."""
+        try:
+            mgr.up_detached()
+        except DockerManagerError as e:
+            self.append_log(f"❌ Compose up failed: {e}")
+            return
+        self.append_log("✅ Compose up completed.")
+        self.start_log_stream()
+        result = self._run_readiness_probe(mgr, port, threading.Event(), finish_launch=False)
+        if not result.ready:
+            self._finish_launch(result.failure)
+            return
+
+        self.append_log("❄ Saving a warm snapshot of the restored gateway (it restarts briefly)…")
+        try:
+            info = capture_snapshot(mgr, cfg, self.snapshots)
+            self.append_log(f"❄ Snapshot {info.key} saved ({info.size / 1e6:.1f} MB).")
+        except (DockerManagerError, OSError) as e:
+            self.append_log(f"⚠ Snapshot export failed: {e}")
+        finally:
+            # The log follower ends when the container stops; pick it up again
+            if self.log_thread is None or not self.log_thread.is_alive():
+                self.start_log_stream()
+        self._run_readiness_probe(mgr, port, threading.Event())
+
+    def on_search_logs(self):
+        """Query the indexed log history of the current (or any indexed) gateway."""
+        gateways = sorted(p.stem for p in INDEX_DIR.glob('*.sqlite')) if INDEX_DIR.is_dir() else []
+        if not gateways:
+            QMessageBox.information(self, "Log Search", "No log history has been indexed yet.")
+            return
+        gateway = self.gateway_key if self.gateway_key in gateways else gateways[0]
+        if self.search_dialog is None:
+            self.search_dialog = LogSearchDialog(self)
+        self.search_dialog.set_gateways(gateways, gateway)
+        self.search_dialog.run(self.search_le.text())
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+
+    def on_manage_images(self):
+        dlg = ImageCacheDialog(self.images, self)
+        dlg.exec_()
+        if dlg.chosen:
+            self.version_cb.setEditText(dlg.chosen)
+            self.prefetch_image()
+
+    def on_manage_snapshots(self):
+        SnapshotDialog(self.snapshots, self).exec_()
+
+    def _spin_up_fleet(self, cfg, count: int, use_snapshots: bool):
+        """Worker thread: render and start `count` isolated gateways in parallel."""
+        self.fleet = fleet = Fleet(snapshots=self.snapshots if use_snapshots else None)
+        try:
+            instances = fleet.add_replicas(cfg, count)
+        except AppError as e:
+            self.append_log(f"❌ {e}")
+            self._set_enabled(self.spin_btn, True)
+            return
+        for inst in instances:
+            self.append_log(
+                f"Prepared {inst.name}: http {inst.http_port}, https {inst.https_port} "
+                f"({inst.generated_dir})"
+            )
+        self._set_enabled(self.open_btn, True)
+        self.append_log(f"▶ Starting {count} gateways in parallel…")
+        results = fleet.up_all(on_line=self.append_fleet_log)
+        for name, err in results.items():
+            if err:
+                self.append_log(f"❌ {name} failed: {err}")
+            else:
+                self.append_log(f"✔️ {name}: {fleet.instances[name].status}")
+        failed = sum(1 for err in results.values() if err)
+        self._finish_launch('ready' if not failed else f"{failed} of {count} failed")
+
     def on_open_gateway(self):
+        if self.fleet and self.fleet.instances:
+            for inst in self.fleet.instances.values():
+                webbrowser.open_new_tab(f"http://localhost:{inst.http_port}/web/")
+            return
         url = f"http://localhost:{self.http_le.text().strip()}/web/"
         webbrowser.open_new_tab(url)
 
@@ -375,18 +1015,28 @@ class MainWindow(QMainWindow):
                 self.stop_evt.set()
             if self.docker_mgr:
                 self.docker_mgr.down()
-                self.log_console.append("Gateway torn down successfully.")
+                self.append_log("Gateway torn down successfully.")
+            if self.fleet:
+                results = self.fleet.down_all()
+                for name, err in results.items():
+                    if err:
+                        self.append_log(f"❌ {name} tear down failed: {err}")
+                    else:
+                        self.append_log(f"{name} torn down.")
+                self.fleet = None
 
             if self.log_thread:
                 self.log_thread.join(timeout=5.0)
-                self.log_console.append("Log streaming stopped.")
+                self.append_log("Log streaming stopped.")
+            self._close_log_writers()
 
             self.down_btn.setEnabled(False)
+            self.stop_btn.setEnabled(False)
             self.spin_btn.setEnabled(True)
             self.open_btn.setEnabled(False)
 
-            self.log_console.append("Gateway is shutting down…")
-            self.log_console.append("Waiting for logs to finish…")
+            self.append_log("Gateway is shutting down…")
+            self.append_log("Waiting for logs to finish…")
             
             if self.file_watcher:
                 self.file_watcher.stop()
@@ -394,7 +1044,7 @@ class MainWindow(QMainWindow):
             self.open_btn.setEnabled(False)
 
         except KeyboardInterrupt:
-            self.log_console.append("Tear down interrupted.")
+            self.append_log("Tear down interrupted.")
         except DockerManagerError as e:
             QMessageBox.critical(self, "Error", str(e))
         except AppError as e:
@@ -402,6 +1052,32 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Unexpected Error", str(e))
 
+    def on_soft_stop(self):
+        """Stop the gateway but keep its container and data volume."""
+        try:
+            if self.stop_evt:
+                self.stop_evt.set()
+            if self.docker_mgr:
+                self.docker_mgr.stop()
+                self.append_log("Gateway stopped; data kept. Spin up with the same settings to resume.")
+            if self.fleet:
+                for name, err in self.fleet.stop_all().items():
+                    if err:
+                        self.append_log(f"❌ {name} stop failed: {err}")
+                    else:
+                        self.append_log(f"{name} stopped (data kept).")
+            if self.log_thread:
+                self.log_thread.join(timeout=5.0)
+            self._close_log_writers()
+
+            self.stop_btn.setEnabled(False)
+            self.spin_btn.setEnabled(True)
+            self.open_btn.setEnabled(False)
+        except AppError as e:
+            QMessageBox.critical(self, "Error", str(e))
+        except Exception as e:
+            QMessageBox.critical(self, "Unexpected Error", str(e))
+
     def on_purge_all(self):
         reply = QMessageBox.question(
             self, "Confirm Purge",
@@ -413,14 +1089,14 @@ class MainWindow(QMainWindow):
 
         try:
             subprocess.run(
-                ["docker", "system", "prune", "-a", "-f", "--volumes"],
+                [docker_binary(), "system", "prune", "-a", "-f", "--volumes"],
                 check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
             )
             QMessageBox.information(self, "Purge Complete", "All Docker resources have been pruned.")
-            self.log_console.append("All Docker resources have been pruned.")
+            self.append_log("All Docker resources have been pruned.")
         except subprocess.CalledProcessError as e:
             QMessageBox.critical(self, "Purge Failed", f"Error: {e.stderr.strip()}")
-            self.log_console.append(f"Error during purge: {e.stderr.strip()}")
+            self.append_log(f"Error during purge: {e.stderr.strip()}")
         except Exception as e:
             QMessageBox.critical(self, "Purge Failed", str(e))
 
@@ -428,7 +1104,9 @@ class MainWindow(QMainWindow):
         """
         Prompt teardown if a gateway is running when the window is closed.
         """
-        if self.docker_mgr:
+        if self.pipeline is not None:
+            self.pipeline.cancel()
+        if self.docker_mgr or self.fleet:
             resp = QMessageBox.question(
                 self, "Exit",
                 "A gateway is still running. Tear it down before exiting?",
@@ -441,12 +1119,15 @@ class MainWindow(QMainWindow):
             if resp == QMessageBox.Yes:
                 self.on_tear_down()
 
+        self._close_log_writers()
+        self.log_janitor.stop()
         # Call the base implementation (accepts by default)
         super().closeEvent(a0)
     
     def on_clear_logs(self):
-        # Clear the QTextEdit
-        self.log_console.clear()
+        # Clear the console and anything still queued for it
+        self.clear_log()
+        self.log_filter.reset_counts()
 
         # Truncate the on-disk log file (if it exists)
         log_path = BASE_DIR / 'logs' / 'ignition-admin.log'
@@ -458,6 +1139,198 @@ class MainWindow(QMainWindow):
             # If you want to inform the user on failure:
             QMessageBox.warning(self, "Clear Logs", f"Could not clear log file:\n{e}")
 
+        # The gateway's own files in its log folder, then refresh the usage label
+        try:
+            clear_gateway_logs(self.gateway_key)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Clear Logs", f"Could not clear gateway logs:\n{e}")
+        self.log_janitor.run_now()
+
+
+
+class LogSearchDialog(QDialog):
+    """Results of a log history search, newest first."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Log History Search")
+        self.resize(900, 500)
+        self.gateway_cb = QComboBox()
+        self.query_le = QLineEdit()
+        self.query_le.setPlaceholderText("level:ERROR logger:tags.* since:10m words…")
+        self.query_le.returnPressed.connect(lambda: self.run(self.query_le.text()))
+        self.status_lbl = QLabel("")
+        self.results = QPlainTextEdit()
+        self.results.setReadOnly(True)
+        self.results.setStyleSheet("font-family: monospace;")
+
+        top = QHBoxLayout()
+        top.addWidget(self.gateway_cb)
+        top.addWidget(self.query_le, 1)
+        layout = QVBoxLayout()
+        layout.addLayout(top)
+        layout.addWidget(self.status_lbl)
+        layout.addWidget(self.results, 1)
+        self.setLayout(layout)
+        self.gateway_cb.currentTextChanged.connect(lambda _g: self.run(self.query_le.text()))
+
+    def set_gateways(self, gateways, current: str):
+        self.gateway_cb.blockSignals(True)
+        self.gateway_cb.clear()
+        self.gateway_cb.addItems(gateways)
+        self.gateway_cb.setCurrentText(current)
+        self.gateway_cb.blockSignals(False)
+
+    def run(self, query: str):
+        self.query_le.setText(query)
+        gateway = self.gateway_cb.currentText()
+        if not gateway:
+            return
+        try:
+            entries, elapsed = LogIndex.for_gateway(gateway).search(query)
+        except ValueError as e:
+            self.status_lbl.setText(f"Invalid query: {e}")
+            return
+        self.status_lbl.setText(f"{len(entries)} result(s) in {elapsed * 1000:.1f} ms")
+        self.results.setPlainText("\n".join(e.format() for e in entries))
+
+
+class ImageCacheDialog(QDialog):
+    """Gateway images present in the local Docker cache."""
+
+    COLUMNS = ("Version", "Digest", "Size", "Created")
+
+    def __init__(self, images: ImageCache, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Local Gateway Images")
+        self.resize(700, 300)
+        self.images = images
+        self.chosen = None
+        self._rows = []
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.doubleClicked.connect(lambda _idx: self.on_use())
+
+        use_btn = QPushButton("Use Selected")
+        use_btn.clicked.connect(self.on_use)
+        remove_btn = QPushButton("Remove Selected")
+        remove_btn.clicked.connect(self.on_remove)
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.refresh)
+
+        buttons = QHBoxLayout()
+        for w in (use_btn, remove_btn, refresh_btn):
+            buttons.addWidget(w)
+        layout = QVBoxLayout()
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        try:
+            self._rows = self.images.list_local(IGNITION_REPOSITORY)
+        except DockerManagerError as e:
+            self._rows = []
+            QMessageBox.warning(self, "Images", str(e))
+        self.table.setRowCount(len(self._rows))
+        for row, info in enumerate(self._rows):
+            values = (info.tag, info.digest or "(local build)", info.size, info.created)
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+
+    def _selected(self):
+        rows = sorted({i.row() for i in self.table.selectedIndexes()})
+        return [self._rows[r] for r in rows]
+
+    def on_use(self):
+        selected = self._selected()
+        if selected:
+            self.chosen = selected[0].tag
+            self.accept()
+
+    def on_remove(self):
+        for info in self._selected():
+            try:
+                self.images.remove(info.reference)
+            except DockerManagerError as e:
+                QMessageBox.warning(self, "Images", str(e))
+        self.refresh()
+
+
+class SnapshotDialog(QDialog):
+    """List, invalidate and prune warm gateway snapshots."""
+
+    COLUMNS = ("Backup", "Image", "Size", "Last used", "Key")
+
+    def __init__(self, store: SnapshotStore, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Gateway Snapshots")
+        self.resize(700, 300)
+        self.store = store
+        self._infos = []
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        self.age_sb = QSpinBox()
+        self.age_sb.setRange(1, 365)
+        self.age_sb.setValue(30)
+        self.age_sb.setSuffix(" days")
+        delete_btn = QPushButton("Delete Selected")
+        delete_btn.clicked.connect(self.on_delete)
+        prune_btn = QPushButton("Prune Unused Older Than")
+        prune_btn.clicked.connect(self.on_prune)
+        clear_btn = QPushButton("Delete All")
+        clear_btn.clicked.connect(self.on_clear)
+
+        buttons = QHBoxLayout()
+        for w in (delete_btn, prune_btn, self.age_sb, clear_btn):
+            buttons.addWidget(w)
+        layout = QVBoxLayout()
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        self._infos = self.store.list()
+        self.table.setRowCount(len(self._infos))
+        for row, info in enumerate(self._infos):
+            values = (
+                info.backup_name, info.image, f"{info.size / 1e6:.1f} MB",
+                datetime.fromtimestamp(info.last_used).strftime('%Y-%m-%d %H:%M'), info.key,
+            )
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+
+    def on_delete(self):
+        rows = {i.row() for i in self.table.selectedIndexes()}
+        for row in rows:
+            info = self._infos[row]
+            self.store.invalidate(backup_hash=info.backup_hash, image=info.image)
+        self.refresh()
+
+    def on_prune(self):
+        removed = self.store.prune(max_age_days=self.age_sb.value())
+        QMessageBox.information(self, "Prune", f"Removed {removed} snapshot(s).")
+        self.refresh()
+
+    def on_clear(self):
+        reply = QMessageBox.question(
+            self, "Delete All", "Delete every gateway snapshot?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.store.invalidate()
+            self.refresh()
 
 
 def main():
@@ -488,7 +1361,7 @@ def main():
         }
 
         /* Line edits & text areas */
-        QLineEdit, QTextEdit {
+        QLineEdit, QTextEdit, QPlainTextEdit {
           background-color: #3c3c3c;
           border: 1px solid #555555;
           border-radius: 4px;
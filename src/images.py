@@ -0,0 +1,227 @@
+# src/images.py
+
+import json
+import logging
+import subprocess
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import perf
+from docker_backends import docker_binary
+from errors import DockerManagerError
+
+logger = logging.getLogger(__name__)
+
+IGNITION_REPOSITORY = 'inductiveautomation/ignition'
+# Offered in the version picker next to whatever is already cached locally
+KNOWN_TAGS = ('latest', '8.1', '8.3')
+
+
+def split_reference(image: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Split "repo[:tag][@sha256:…]" into (repo, tag, digest). A colon that
+    belongs to a registry port ("host:5000/repo") is not taken as a tag.
+    """
+    digest = None
+    if '@' in image:
+        image, digest = image.split('@', 1)
+    repo, tag = image, None
+    slash = image.rfind('/')
+    colon = image.rfind(':')
+    if colon > slash:
+        repo, tag = image[:colon], image[colon + 1:]
+    return repo, tag, digest
+
+
+def image_reference(version: str, repository: str = IGNITION_REPOSITORY) -> str:
+    """
+    Accept either a bare version ("8.1.43") or a full image reference.
+    """
+    version = version.strip() or 'latest'
+    if '/' in version or '@' in version or ':' in version:
+        return version
+    return f"{repository}:{version}"
+
+
+def pinned_reference(image: str, digest: str) -> str:
+    """
+    "repo:tag" + "sha256:…" -> "repo@sha256:…", immune to the tag moving.
+    """
+    repo, _tag, _digest = split_reference(image)
+    return f"{repo}@{digest}"
+
+
+@dataclass
+class ImageInfo:
+    repository: str
+    tag: str
+    image_id: str
+    digest: Optional[str]
+    size: str
+    created: str
+
+    @property
+    def reference(self) -> str:
+        return f"{self.repository}:{self.tag}"
+
+
+class ImageCache:
+    """
+    Resolves gateway images to content digests and pulls them in the
+    background, so a pull can overlap with backup copying, project
+    extraction and rendering instead of stalling `compose up`.
+
+    One pull per image reference is in flight at a time; asking again for
+    the same reference returns the pending (or finished) future.
+    """
+
+    def __init__(self, docker_bin: Optional[str] = None):
+        self.docker_bin = docker_bin or docker_binary()
+        self._pulls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    # --- queries --------------------------------------------------------
+
+    def _run(self, args: List[str]) -> subprocess.CompletedProcess:
+        try:
+            return subprocess.run(
+                [self.docker_bin] + args,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+        except OSError as e:
+            raise DockerManagerError(f"Could not run {self.docker_bin}: {e}", underlying=e)
+
+    def local_digest(self, image: str) -> Optional[str]:
+        """
+        Registry digest of a locally present image, or None if the image
+        is missing or was never pulled from a registry.
+        """
+        cp = self._run(['image', 'inspect', '--format', '{{json .RepoDigests}}', image])
+        if cp.returncode != 0:
+            return None
+        try:
+            digests = json.loads(cp.stdout.strip() or '[]') or []
+        except ValueError:
+            return None
+        repo = split_reference(image)[0]
+        for entry in digests:
+            entry_repo, _tag, digest = split_reference(entry)
+            if digest and (entry_repo == repo or entry_repo.endswith('/' + repo)):
+                return digest
+        return None
+
+    def list_local(self, repository: str = IGNITION_REPOSITORY) -> List[ImageInfo]:
+        """
+        Gateway images already present in the local Docker image cache.
+        """
+        cp = self._run(['image', 'ls', '--digests', '--format', '{{json .}}', repository])
+        if cp.returncode != 0:
+            raise DockerManagerError(f"Listing images failed: {cp.stderr.strip()}")
+        images = []
+        for line in cp.stdout.splitlines():
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            digest = row.get('Digest')
+            images.append(ImageInfo(
+                repository=row.get('Repository', repository),
+                tag=row.get('Tag', ''),
+                image_id=row.get('ID', ''),
+                digest=digest if digest and digest != '<none>' else None,
+                size=row.get('Size', ''),
+                created=row.get('CreatedSince', row.get('CreatedAt', '')),
+            ))
+        return images
+
+    def remove(self, image: str) -> None:
+        cp = self._run(['image', 'rm', image])
+        if cp.returncode != 0:
+            raise DockerManagerError(f"Removing {image} failed: {cp.stderr.strip()}")
+        with self._lock:
+            self._pulls.pop(image, None)
+
+    # --- pulling --------------------------------------------------------
+
+    @perf.timed('image.pull')
+    def pull(self, image: str, on_line: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Pull `image`, streaming docker's progress lines, and return its
+        pinned "repo@sha256:…" reference. If the registry is unreachable but
+        the image is cached locally, the local copy is pinned instead.
+        """
+        cmd = [self.docker_bin, 'pull', image]
+        logger.info("Pulling image with: %s", ' '.join(cmd))
+        output = []
+        try:
+            proc = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1,
+            )
+        except OSError as e:
+            raise DockerManagerError(f"Could not start docker pull: {e}", underlying=e)
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            clean = line.rstrip()
+            if not clean:
+                continue
+            output.append(clean)
+            logger.debug("Pull> %s", clean)
+            if on_line:
+                on_line(clean)
+        code = proc.wait()
+
+        digest = self.local_digest(image)
+        if code != 0:
+            if digest is None and split_reference(image)[2] is None:
+                tail = output[-1] if output else f"exit code {code}"
+                raise DockerManagerError(f"Pulling {image} failed: {tail}")
+            logger.warning("Pull of %s failed (exit %s); using the cached image", image, code)
+            if on_line:
+                on_line(f"⚠ Pull failed; using cached {image}")
+        return self._pin(image, digest)
+
+    def _pin(self, image: str, digest: Optional[str]) -> str:
+        if split_reference(image)[2]:
+            return image
+        if digest is None:
+            # Locally built image: nothing to pin to
+            logger.warning("No registry digest for %s; using it unpinned", image)
+            return image
+        return pinned_reference(image, digest)
+
+    def ensure(self, image: str, on_line: Optional[Callable[[str], None]] = None) -> Future:
+        """
+        Start pulling `image` in the background (unless already pulled or
+        pulling) and return a future resolving to the pinned reference.
+        Failed pulls are forgotten so the next call retries.
+        """
+        with self._lock:
+            fut = self._pulls.get(image)
+            if fut is not None and not (fut.done() and fut.exception() is not None):
+                return fut
+            fut = Future()
+            fut.set_running_or_notify_cancel()
+            self._pulls[image] = fut
+
+        def _run() -> None:
+            try:
+                fut.set_result(self.pull(image, on_line))
+            except Exception as e:
+                fut.set_exception(e)
+
+        # Daemon thread: an unfinished pull must not keep the app from exiting
+        threading.Thread(target=_run, name=f"pull-{image}", daemon=True).start()
+        return fut
+
+    def resolve(
+        self,
+        image: str,
+        on_line: Optional[Callable[[str], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """
+        Block until `image` is present and return its pinned reference.
+        """
+        return self.ensure(image, on_line).result(timeout=timeout)
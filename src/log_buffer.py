@@ -0,0 +1,72 @@
+# src/log_buffer.py
+
+import threading
+from collections import deque
+from typing import List, Tuple
+
+
+class LineBuffer:
+    """
+    Thread-safe, bounded hand-off of log lines from reader threads to a
+    consumer that drains them in batches (e.g. once per GUI frame).
+
+    When producers outrun the consumer only the newest `maxlen` lines are
+    kept; the number of discarded lines is reported by `drain_with_dropped`.
+    """
+
+    def __init__(self, maxlen: int = 10_000):
+        self._lines: deque = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._dropped = 0
+
+    @property
+    def maxlen(self) -> int:
+        return self._lines.maxlen or 0
+
+    def push(self, line: str) -> None:
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(line)
+
+    def extend(self, lines: List[str]) -> None:
+        with self._lock:
+            overflow = len(self._lines) + len(lines) - (self._lines.maxlen or 0)
+            if overflow > 0:
+                self._dropped += overflow
+            self._lines.extend(lines)
+
+    def drain(self) -> List[str]:
+        """
+        Take every pending line, oldest first.
+        """
+        return self.drain_with_dropped()[0]
+
+    def drain_with_dropped(self) -> Tuple[List[str], int]:
+        """
+        Take every pending line plus the count of lines that were discarded
+        since the previous drain because the buffer was full.
+        """
+        with self._lock:
+            if not self._lines and not self._dropped:
+                return [], 0
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self._dropped = self._dropped, 0
+        return lines, dropped
+
+    def resize(self, maxlen: int) -> None:
+        """
+        Change the bound, keeping the newest pending lines.
+        """
+        with self._lock:
+            self._lines = deque(self._lines, maxlen=maxlen)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lines.clear()
+            self._dropped = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._lines)
@@ -0,0 +1,178 @@
+# src/log_filter.py
+
+import fnmatch
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional, Pattern, Sequence, Tuple
+
+from log_index import LEVELS, normalize_level, parse_fields
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """
+    What the console should show. Logger patterns are globs matched
+    case-insensitively against the logger name ("tags.*", "*Modbus*");
+    `match` / `suppress` are regular expressions searched in the raw line.
+    """
+    min_level: Optional[str] = None
+    include_loggers: Tuple[str, ...] = ()
+    exclude_loggers: Tuple[str, ...] = ()
+    match: Tuple[str, ...] = ()
+    suppress: Tuple[str, ...] = ()
+
+    @property
+    def active(self) -> bool:
+        return bool(
+            (self.min_level and LEVELS[self.min_level] > min(LEVELS.values()))
+            or self.include_loggers or self.exclude_loggers or self.match or self.suppress
+        )
+
+
+def _split(text: str) -> Tuple[str, ...]:
+    return tuple(p.strip() for p in text.split(',') if p.strip())
+
+
+def parse_spec(
+    min_level: str = '',
+    include_loggers: str = '',
+    exclude_loggers: str = '',
+    patterns: str = '',
+) -> FilterSpec:
+    """
+    Build a FilterSpec from form text: comma-separated logger globs, and
+    comma-separated regexes where a leading "!" hides matching lines.
+    """
+    level = min_level.strip().upper()
+    regexes = _split(patterns)
+    return FilterSpec(
+        min_level=normalize_level(level) if level and level != 'ALL' else None,
+        include_loggers=_split(include_loggers),
+        exclude_loggers=_split(exclude_loggers),
+        match=tuple(r for r in regexes if not r.startswith('!')),
+        suppress=tuple(r[1:] for r in regexes if r.startswith('!') and len(r) > 1),
+    )
+
+
+def _globs(patterns: Sequence[str]) -> Optional[Pattern]:
+    if not patterns:
+        return None
+    return re.compile('|'.join(fnmatch.translate(p) for p in patterns), re.IGNORECASE)
+
+
+def _regexes(patterns: Sequence[str]) -> Optional[Pattern]:
+    if not patterns:
+        return None
+    for p in patterns:
+        try:
+            re.compile(p)
+        except re.error as e:
+            raise ValueError(f"Invalid pattern '{p}': {e}")
+    return re.compile('|'.join(f"(?:{p})" for p in patterns))
+
+
+class _Rules:
+    """
+    A FilterSpec compiled once. Immutable, so readers can use it without
+    locking while the GUI swaps in a new one.
+    """
+
+    def __init__(self, spec: FilterSpec):
+        self.spec = spec
+        self.active = spec.active
+        self.min_level = LEVELS[spec.min_level] if spec.min_level else 0
+        self.include = _globs(spec.include_loggers)
+        self.exclude = _globs(spec.exclude_loggers)
+        self.match = _regexes(spec.match)
+        self.suppress = _regexes(spec.suppress)
+        self.structured = bool(self.min_level or self.include or self.exclude)
+
+    def accepts(self, line: str, fields: Optional[Tuple[str, str]]) -> bool:
+        if fields is not None:
+            level, name = fields
+            if LEVELS[level] < self.min_level:
+                return False
+            if self.include is not None and not self.include.match(name):
+                return False
+            if self.exclude is not None and self.exclude.match(name):
+                return False
+        if self.match is not None and not self.match.search(line):
+            return False
+        if self.suppress is not None and self.suppress.search(line):
+            return False
+        return True
+
+
+class LogFilter:
+    """
+    Drops log lines on the reader thread, before they reach the console
+    buffer. Lines in no known log layout (compose output, stack trace
+    continuations) follow the decision for the last structured line read on
+    the same thread, so a hidden record hides its trace too.
+
+    `update()` takes effect on the next line without restarting the stream;
+    dropped lines are only counted.
+    """
+
+    def __init__(self, spec: FilterSpec = FilterSpec()):
+        self._rules = _Rules(spec)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._passed = 0
+        self._dropped = 0
+
+    @property
+    def spec(self) -> FilterSpec:
+        return self._rules.spec
+
+    def update(self, spec: FilterSpec) -> None:
+        """
+        Compile and swap in new rules. Raises ValueError for bad patterns,
+        leaving the current rules in place.
+        """
+        rules = _Rules(spec)
+        self._rules = rules
+        logger.info("Console log filter set to %s", spec)
+
+    def accept(self, line: str) -> bool:
+        rules = self._rules
+        if not rules.active:
+            ok = True
+        else:
+            fields = parse_fields(line) if rules.structured else None
+            if fields is None and rules.structured:
+                # Continuation of the previous record, or foreign output
+                ok = getattr(self._local, 'last', True) and rules.accepts(line, None)
+            else:
+                ok = rules.accepts(line, fields)
+                self._local.last = ok
+        with self._lock:
+            if ok:
+                self._passed += 1
+            else:
+                self._dropped += 1
+        return ok
+
+    def wrap(self, on_line: Callable[[str], None]) -> Callable[[str], None]:
+        """
+        A callback that forwards only accepted lines to `on_line`.
+        """
+        def _filtered(line: str) -> None:
+            if self.accept(line):
+                on_line(line)
+        return _filtered
+
+    def counts(self) -> Tuple[int, int]:
+        """
+        (passed, dropped) since the last reset.
+        """
+        with self._lock:
+            return self._passed, self._dropped
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self._passed = self._dropped = 0
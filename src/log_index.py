@@ -0,0 +1,545 @@
+# src/log_index.py
+
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, tzinfo
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+logger = logging.getLogger(__name__)
+
+# Directories
+BASE_DIR = Path(__file__).resolve().parent.parent
+INDEX_DIR = BASE_DIR / 'logs' / 'index'
+
+# Retention defaults: whichever limit is hit first
+DEFAULT_MAX_ROWS = 5_000_000
+DEFAULT_MAX_AGE_DAYS = 14
+# Lines queued for the writer thread before add() starts dropping them
+DEFAULT_QUEUE_SIZE = 100_000
+# Gateway clock for lines that carry their own time (ComposeConfig.timezone)
+DEFAULT_TIMEZONE = 'America/Chicago'
+
+# Numeric levels so "level >= WARN" is an index range scan
+LEVELS = {'TRACE': 5, 'DEBUG': 10, 'INFO': 20, 'WARN': 30, 'ERROR': 40}
+LEVEL_NAMES = {v: k for k, v in LEVELS.items()}
+_LEVEL_ALIASES = {
+    'T': 'TRACE', 'D': 'DEBUG', 'I': 'INFO', 'W': 'WARN', 'E': 'ERROR',
+    'WARNING': 'WARN', 'SEVERE': 'ERROR', 'FATAL': 'ERROR', 'CRITICAL': 'ERROR',
+}
+
+# Ignition (wrapper) format, e.g.
+#   jvm 1    | 2024/05/10 14:22:41 | I [t.p.TagProvider   ] [14:22:41]: Started
+_IGNITION_RE = re.compile(
+    r'^(?:\S+\s+\|\s+)?(?:jvm \d+\s+\|\s+)?'
+    r'(?P<ts>\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2})\s+\|\s+'
+    r'(?P<level>[TDIWE])\s+\[(?P<logger>[^\]]+?)\s*\]\s*'
+    r'(?:\[[^\]]*\]:?\s*)?(?P<msg>.*)$'
+)
+# Generic "2024-05-10 14:22:41[,.]123 LEVEL [logger] message"
+_GENERIC_RE = re.compile(
+    r'^(?P<ts>\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2})(?:[.,]\d+)?\S*\s+'
+    r'(?P<level>TRACE|DEBUG|INFO|WARN(?:ING)?|ERROR|SEVERE|FATAL)\s+'
+    r'(?:\[(?P<logger>[^\]]+)\]\s*)?(?:-\s*)?(?P<msg>.*)$'
+)
+_LEVEL_WORD_RE = re.compile(r'\b(TRACE|DEBUG|INFO|WARN(?:ING)?|ERROR|SEVERE|FATAL)\b')
+
+
+@dataclass
+class LogEntry:
+    ts: float
+    level: str
+    logger: str
+    message: str
+    session: Optional[int] = None
+
+    def format(self) -> str:
+        stamp = datetime.fromtimestamp(self.ts).strftime('%Y-%m-%d %H:%M:%S')
+        return f"{stamp} {self.level:<5} [{self.logger}] {self.message}"
+
+
+def normalize_level(level: str) -> str:
+    level = level.strip().upper()
+    level = _LEVEL_ALIASES.get(level, level)
+    if level not in LEVELS:
+        raise ValueError(f"Unknown log level: {level}")
+    return level
+
+
+def parse_fields(line: str) -> Optional[Tuple[str, str]]:
+    """
+    Cheap (level, logger) extraction for filtering; None for lines in no
+    known layout (compose progress, stack trace continuations).
+    """
+    m = _IGNITION_RE.match(line) or _GENERIC_RE.match(line)
+    if not m:
+        return None
+    return normalize_level(m.group('level')), (m.group('logger') or '').strip()
+
+
+@lru_cache(maxsize=None)
+def _zone(name: str) -> Optional[tzinfo]:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Unknown timezone '%s'; reading log times as host-local", name)
+        return None
+
+
+def _line_time(text: str, fmt: str, timezone: str) -> float:
+    ts = datetime.strptime(text, fmt)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=_zone(timezone))
+    return ts.timestamp()
+
+
+def parse_line(line: str, received: Optional[float] = None, timezone: str = DEFAULT_TIMEZONE) -> LogEntry:
+    """
+    Split a container log line into timestamp, level, logger and message.
+    The timestamp is `received` (the daemon's stamp) when given; only
+    without one is the line's own time used, read in the gateway's
+    `timezone` since the container clock is not the host's. Lines that
+    match no known layout keep their text as the message, with INFO (or
+    any level word they contain).
+    """
+    m = _IGNITION_RE.match(line)
+    fmt = '%Y/%m/%d %H:%M:%S'
+    if not m:
+        m = _GENERIC_RE.match(line)
+        fmt = '%Y-%m-%d %H:%M:%S'
+    if m:
+        level, name, message = normalize_level(m.group('level')), (m.group('logger') or '').strip(), m.group('msg')
+    else:
+        word = _LEVEL_WORD_RE.search(line[:64])
+        level, name, message = normalize_level(word.group(1)) if word else 'INFO', '', line
+    if received is None:
+        try:
+            received = _line_time(m.group('ts').replace('T', ' '), fmt, timezone) if m else time.time()
+        except ValueError:
+            received = time.time()
+    return LogEntry(received, level, name, message)
+
+
+_DURATION_RE = re.compile(r'^(\d+(?:\.\d+)?)([smhd])$')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(text: str) -> float:
+    m = _DURATION_RE.match(text.strip().lower())
+    if not m:
+        raise ValueError(f"Invalid duration '{text}' (use e.g. 30s, 10m, 2h, 1d)")
+    return float(m.group(1)) * _UNITS[m.group(2)]
+
+
+def parse_query(text: str) -> Dict[str, object]:
+    """
+    Turn search-box text into `LogIndex.query` arguments:
+
+        level:ERROR logger:tags.* since:10m session:3 disk full
+
+    `level` means that level or worse; `logger` accepts * / ? globs;
+    remaining words are full-text terms (all must match, `word*` = prefix).
+    """
+    args: Dict[str, object] = {}
+    terms = []
+    for token in text.split():
+        key, sep, value = token.partition(':')
+        key = key.lower()
+        if sep and value and key in ('level', 'logger', 'since', 'session', 'limit'):
+            if key == 'level':
+                args['level'] = normalize_level(value)
+            elif key == 'logger':
+                args['logger'] = value
+            elif key == 'since':
+                args['since'] = time.time() - parse_duration(value)
+            else:
+                args[key] = int(value)
+        else:
+            terms.append(token)
+    if terms:
+        args['text'] = ' '.join(terms)
+    return args
+
+
+def _fts_query(text: str) -> str:
+    """
+    Quote user words so FTS syntax characters are taken literally; a
+    trailing * keeps its prefix meaning.
+    """
+    parts = []
+    for word in text.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*').replace('"', '""')
+        if word:
+            parts.append(f'"{word}"' + ('*' if prefix else ''))
+    return ' '.join(parts)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id      INTEGER PRIMARY KEY,
+    gateway TEXT NOT NULL,
+    started REAL NOT NULL,
+    ended   REAL,
+    -- Daemon timestamp of the newest line indexed, to resume streaming after it
+    last_seen REAL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id      INTEGER PRIMARY KEY,
+    session INTEGER NOT NULL,
+    ts      REAL NOT NULL,
+    level   INTEGER NOT NULL,
+    logger  TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries(ts);
+CREATE INDEX IF NOT EXISTS entries_level_ts ON entries(level, ts);
+CREATE INDEX IF NOT EXISTS entries_logger_ts ON entries(logger, ts);
+CREATE INDEX IF NOT EXISTS entries_level_logger_ts ON entries(level, logger, ts);
+CREATE INDEX IF NOT EXISTS entries_session ON entries(session, id);
+-- Distinct logger names, so globs like "tags.*" expand to an IN list
+CREATE TABLE IF NOT EXISTS loggers (name TEXT PRIMARY KEY) WITHOUT ROWID;
+"""
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    message, content='entries', content_rowid='id'
+);
+"""
+
+
+class LogIndex:
+    """
+    SQLite store of parsed container log lines for one gateway, with an
+    FTS5 index on the message text. Each launch is a session; writes come
+    in batches from LogIndexWriter, reads use their own connections (WAL),
+    so searching never blocks the writer.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS,
+    ):
+        self.db_path = Path(db_path)
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(sessions)')}
+            if 'last_seen' not in columns:
+                conn.execute('ALTER TABLE sessions ADD COLUMN last_seen REAL')
+            try:
+                conn.executescript(_FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                logger.warning("SQLite lacks FTS5; log search falls back to LIKE")
+                self.has_fts = False
+
+    @classmethod
+    def for_gateway(cls, gateway: str, root: Path = INDEX_DIR, **kwargs) -> 'LogIndex':
+        return cls(root / f"{gateway}.sqlite", **kwargs)
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    # --- writing --------------------------------------------------------
+
+    def start_session(self, gateway: str) -> int:
+        with self.connect() as conn:
+            cur = conn.execute(
+                'INSERT INTO sessions (gateway, started) VALUES (?, ?)', (gateway, time.time())
+            )
+            return int(cur.lastrowid)
+
+    def end_session(self, session: int) -> None:
+        with self.connect() as conn:
+            conn.execute('UPDATE sessions SET ended = ? WHERE id = ?', (time.time(), session))
+
+    def last_seen(self, gateway: str) -> Optional[float]:
+        """
+        Receive time of the newest line indexed for a gateway, any session.
+        """
+        with self.connect() as conn:
+            row = conn.execute('SELECT MAX(last_seen) FROM sessions WHERE gateway = ?', (gateway,)).fetchone()
+            return row[0]
+
+    def insert(self, conn: sqlite3.Connection, session: int, entries: List[LogEntry]) -> None:
+        """
+        Append a batch in one transaction (caller commits).
+        """
+        rows = [(session, e.ts, LEVELS[e.level], e.logger, e.message) for e in entries]
+        if not conn.in_transaction:
+            # Take the write lock before reading MAX(id) so ids cannot clash
+            conn.execute('BEGIN IMMEDIATE')
+        cur = conn.execute('SELECT COALESCE(MAX(id), 0) FROM entries')
+        first_id = cur.fetchone()[0] + 1
+        conn.executemany(
+            'INSERT INTO entries (id, session, ts, level, logger, message) VALUES (?, ?, ?, ?, ?, ?)',
+            [(first_id + i,) + row for i, row in enumerate(rows)],
+        )
+        conn.executemany(
+            'INSERT OR IGNORE INTO loggers (name) VALUES (?)', [(n,) for n in {e.logger for e in entries}]
+        )
+        if self.has_fts:
+            conn.executemany(
+                'INSERT INTO entries_fts (rowid, message) VALUES (?, ?)',
+                [(first_id + i, e.message) for i, e in enumerate(entries)],
+            )
+
+    def enforce_retention(self, conn: Optional[sqlite3.Connection] = None) -> int:
+        """
+        Drop entries older than max_age_days, then the oldest ones above
+        max_rows. Returns how many entries were removed.
+        """
+        own = conn is None
+        conn = conn or self.connect()
+        try:
+            # Age goes by each entry's own time: ids follow arrival, and a
+            # line can arrive long after newer-stamped ones
+            removed = 0
+            if self.max_age_days is not None:
+                removed += self._delete(conn, 'ts < ?', time.time() - self.max_age_days * 86400)
+            if self.max_rows:
+                row = conn.execute(
+                    'SELECT id FROM entries ORDER BY id DESC LIMIT 1 OFFSET ?', (self.max_rows,)
+                ).fetchone()
+                if row:
+                    removed += self._delete(conn, 'id <= ?', row[0])
+            if removed:
+                conn.execute(
+                    'DELETE FROM sessions WHERE ended IS NOT NULL '
+                    'AND id NOT IN (SELECT DISTINCT session FROM entries)'
+                )
+            conn.commit()
+            if removed:
+                logger.info("Log index %s: retention removed %d entries", self.db_path.name, removed)
+            return removed
+        finally:
+            if own:
+                conn.close()
+
+    def _delete(self, conn: sqlite3.Connection, where: str, value: float) -> int:
+        if self.has_fts:
+            conn.execute(
+                "INSERT INTO entries_fts (entries_fts, rowid, message) "
+                f"SELECT 'delete', id, message FROM entries WHERE {where}", (value,)
+            )
+        return conn.execute(f'DELETE FROM entries WHERE {where}', (value,)).rowcount
+
+    # --- reading --------------------------------------------------------
+
+    def query(
+        self,
+        text: Optional[str] = None,
+        level: Optional[str] = None,
+        logger: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        session: Optional[int] = None,
+        limit: int = 500,
+    ) -> List[LogEntry]:
+        """
+        Newest-first entries matching every given filter. `level` is a
+        minimum ("WARN" also returns ERRORs); `logger` is a glob such as
+        "tags.*"; `text` is full-text (all words must match).
+        """
+        where, params = [], []
+        source = 'entries e'
+        if text:
+            if self.has_fts:
+                source = 'entries_fts f JOIN entries e ON e.id = f.rowid'
+                where.append('entries_fts MATCH ?')
+                params.append(_fts_query(text))
+            else:
+                for word in text.split():
+                    where.append('e.message LIKE ?')
+                    params.append(f"%{word}%")
+        # Equality sets (rather than ranges) let SQLite seek the
+        # (level, logger, ts) index straight to the time window
+        if level:
+            wanted = [v for v in LEVELS.values() if v >= LEVELS[normalize_level(level)]]
+            where.append(f"e.level IN ({','.join('?' * len(wanted))})")
+            params.extend(wanted)
+        if logger:
+            names = self.loggers(logger) if any(c in logger for c in '*?[') else [logger]
+            if not names:
+                return []
+            where.append(f"e.logger IN ({','.join('?' * len(names))})")
+            params.extend(names)
+        if since is not None:
+            where.append('e.ts >= ?')
+            params.append(since)
+        if until is not None:
+            where.append('e.ts <= ?')
+            params.append(until)
+        if session is not None:
+            where.append('e.session = ?')
+            params.append(session)
+        sql = f"SELECT e.ts, e.level, e.logger, e.message, e.session FROM {source}"
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        if text and self.has_fts:
+            # Walk FTS hits newest-first (ids follow arrival order) and stop
+            # at the limit; sorting on ts would materialize every hit
+            sql += ' ORDER BY f.rowid DESC LIMIT ?'
+        else:
+            sql += ' ORDER BY e.ts DESC, e.id DESC LIMIT ?'
+        params.append(limit)
+        with self.connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [LogEntry(ts, LEVEL_NAMES.get(lvl, str(lvl)), lg, msg, sess) for ts, lvl, lg, msg, sess in rows]
+
+    def search(self, text: str, limit: int = 500) -> Tuple[List[LogEntry], float]:
+        """
+        Run a search-box query (see parse_query); returns (entries, seconds).
+        """
+        args = parse_query(text)
+        args.setdefault('limit', limit)
+        start = time.perf_counter()
+        entries = self.query(**args)
+        return entries, time.perf_counter() - start
+
+    def loggers(self, pattern: str = '*') -> List[str]:
+        """
+        Logger names seen so far that match a glob.
+        """
+        with self.connect() as conn:
+            rows = conn.execute('SELECT name FROM loggers WHERE name GLOB ? ORDER BY name', (pattern,))
+            return [r[0] for r in rows]
+
+    def sessions(self) -> List[Tuple[int, str, float, Optional[float]]]:
+        with self.connect() as conn:
+            return conn.execute(
+                'SELECT id, gateway, started, ended FROM sessions ORDER BY id DESC'
+            ).fetchall()
+
+
+class LogIndexWriter:
+    """
+    Parses lines and writes them to a LogIndex in batches from a
+    background thread, so the log reader only pays for a queue put. The
+    queue is bounded: when the writer falls behind, lines below WARN are
+    dropped (and counted) instead of piling up in memory.
+    """
+
+    def __init__(
+        self,
+        index: LogIndex,
+        gateway: str,
+        batch_size: int = 2000,
+        flush_interval: float = 0.5,
+        retention_every: int = 200,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.index = index
+        self.gateway = gateway
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_every = retention_every
+        # Receive time of the newest line indexed or queued; a new log
+        # stream resumes after it instead of replaying the history
+        self.last_seen = index.last_seen(gateway)
+        self.session = index.start_session(gateway)
+        self._queue: 'queue.Queue[Optional[Tuple[str, float]]]' = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._last_notice = 0.0
+        self._thread = threading.Thread(target=self._run, name=f"log-index-{gateway}", daemon=True)
+        self._thread.start()
+
+    def add(self, line: str, received: Optional[float] = None) -> None:
+        """
+        Queue a line; `received` is the daemon's timestamp for it, which
+        also dates lines that carry no timestamp of their own.
+        """
+        received = received if received is not None else time.time()
+        if self.last_seen is None or received > self.last_seen:
+            self.last_seen = received
+        try:
+            self._queue.put_nowait((line, received))
+        except queue.Full:
+            fields = parse_fields(line)
+            if fields and LEVELS[fields[0]] >= LEVELS['WARN']:
+                self._queue.put((line, received))
+                return
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def take_dropped(self) -> int:
+        """
+        The number of lines dropped since the last call.
+        """
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Flush what is queued and end the session.
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+        self._thread.join(timeout=timeout)
+        self.index.end_session(self.session)
+
+    def _run(self) -> None:
+        conn = self.index.connect()
+        batches = 0
+        try:
+            self.index.enforce_retention(conn)
+            done = False
+            while not done:
+                batch: List[LogEntry] = []
+                newest = 0.0
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        done = True
+                        break
+                    batch.append(parse_line(*item))
+                    newest = max(newest, item[1])
+                if not batch:
+                    continue
+                try:
+                    self.index.insert(conn, self.session, batch)
+                    conn.execute(
+                        'UPDATE sessions SET last_seen = MAX(COALESCE(last_seen, 0), ?) WHERE id = ?',
+                        (newest, self.session),
+                    )
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    logger.exception("Failed to index %d log lines", len(batch))
+                    continue
+                batches += 1
+                if self.dropped and (self._queue.empty() or time.monotonic() - self._last_notice >= 1.0):
+                    self._report_dropped()
+                if batches % self.retention_every == 0:
+                    self.index.enforce_retention(conn)
+        finally:
+            conn.close()
+            self._report_dropped()
+
+    def _report_dropped(self) -> None:
+        # Once the queue has drained, at most once a second while it stays
+        # full, and when the writer stops
+        dropped = self.take_dropped()
+        if dropped:
+            self._last_notice = time.monotonic()
+            logger.warning("%s: %d log line(s) not indexed: the index writer fell behind", self.gateway, dropped)
@@ -1,49 +1,354 @@
 # src/log_watcher.py
-import time
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
 import threading
 from pathlib import Path
 import logging
+from typing import Callable, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
-class FileWatcher:
+# inotify event masks (see inotify(7))
+IN_MODIFY      = 0x00000002
+IN_ATTRIB      = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF   = 0x00000800
+IN_Q_OVERFLOW  = 0x00004000
+IN_IGNORED     = 0x00008000
+
+_DIR_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct('iIII')
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+class _Inotify:
+    """
+    Minimal ctypes binding to Linux inotify. Raises OSError when unavailable.
+    """
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify is not available on this platform")
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        return wd
+
+    def read_events(self) -> List[tuple]:
+        """
+        Drain pending events as (wd, mask, name) tuples.
+        """
+        events = []
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+            off = 0
+            while off < len(buf):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, off)
+                off += _EVENT_HEADER.size
+                name = buf[off:off + length].rstrip(b'\0').decode('utf-8', 'replace')
+                off += length
+                events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _Tail:
     """
-    Tails a file and calls `on_line(line)` for each new line appended.
+    Read state for one followed file: open handle, inode, offset and any
+    trailing partial line. Handles truncation, rotation and recreation.
     """
-    def __init__(self, path: Path, on_line, poll_interval: float = 0.5):
+
+    def __init__(self, path: Path, chunk_size: int):
         self.path = path
+        self.chunk_size = chunk_size
+        self._fh = None
+        self._ino = None
+        self._partial = b''
+
+    def open(self, at_end: bool) -> bool:
+        try:
+            fh = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+        st = os.fstat(fh.fileno())
+        if at_end:
+            fh.seek(st.st_size)
+        self._fh, self._ino, self._partial = fh, st.st_ino, b''
+        return True
+
+    def close(self) -> None:
+        if self._fh:
+            self._fh.close()
+        self._fh = None
+        self._ino = None
+
+    def _drain(self) -> List[str]:
+        lines: List[str] = []
+        if self._fh is None:
+            return lines
+        while True:
+            chunk = self._fh.read(self.chunk_size)
+            if not chunk:
+                break
+            data = self._partial + chunk
+            parts = data.split(b'\n')
+            self._partial = parts.pop()
+            lines.extend(p.rstrip(b'\r').decode('utf-8', 'replace') for p in parts)
+        return lines
+
+    def poll(self) -> List[str]:
+        """
+        Return complete lines appended since the last call.
+        """
+        if self._fh is None:
+            # File was missing or rotated away; pick up a recreated one from the start
+            if not self.open(at_end=False):
+                return []
+        lines = []
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+
+        if st is not None and st.st_ino != self._ino:
+            # Rotated: finish the old file, then follow the new one from the start
+            lines.extend(self._drain())
+            self.close()
+            if self.open(at_end=False):
+                lines.extend(self._drain())
+            return lines
+
+        if st is not None and st.st_size < self._fh.tell():
+            # Truncated in place (e.g. "Clear Logs")
+            logger.info("%s was truncated; reading from the start", self.path)
+            self._fh.seek(0)
+            self._partial = b''
+
+        lines.extend(self._drain())
+        if st is None:
+            # Deleted: keep what we read, then wait for it to come back
+            self.close()
+        return lines
+
+
+class FileWatcher:
+    """
+    Tails a file (or every file matching `pattern` in a directory) and
+    delivers appended lines.
+
+    Uses inotify on the parent directory so appends, truncation, rotation
+    and recreation are noticed immediately, and sleeps until an event
+    arrives; falls back to polling every `poll_interval` seconds where
+    inotify is unavailable or the directory is gone. Data is read in
+    large chunks and handed over in batches: `on_batch(path, lines)` if
+    given, otherwise `on_line(line)` per line.
+    """
+    def __init__(
+        self,
+        path: Path,
+        on_line: Optional[Callable[[str], None]] = None,
+        poll_interval: float = 0.5,
+        on_batch: Optional[Callable[[Path, List[str]], None]] = None,
+        pattern: str = '*.log',
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        use_inotify: bool = True,
+    ):
+        if on_line is None and on_batch is None:
+            raise ValueError("FileWatcher needs on_line or on_batch")
+        self.path = Path(path)
         self.on_line = on_line
+        self.on_batch = on_batch
         self.poll = poll_interval
+        self.pattern = pattern
+        self.chunk_size = chunk_size
+        self.use_inotify = use_inotify
         self._stop = threading.Event()
         self._thread = None
+        self._wake_r, self._wake_w = None, None
+        # stop() writes to the wake pipe while _run may be closing it; a
+        # closed fd number can be reused by then, so both hold this lock
+        self._wake_lock = threading.Lock()
+        self._tails: Dict[Path, _Tail] = {}
+        self._dir_mode = False
 
     def start(self):
         if self._thread and self._thread.is_alive():
             return
+        self._stop.clear()
+        self._wake_r, self._wake_w = os.pipe()
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
         logger.info(f"Started watching {self.path}")
 
     def stop(self):
         self._stop.set()
+        with self._wake_lock:
+            if self._wake_w is not None:
+                try:
+                    os.write(self._wake_w, b'x')
+                except OSError:
+                    pass
         if self._thread:
             self._thread.join(timeout=1)
         logger.info(f"Stopped watching {self.path}")
 
+    # --- delivery -------------------------------------------------------
+
+    def _emit(self, path: Path, lines: List[str]) -> None:
+        if not lines:
+            return
+        if self.on_batch:
+            self.on_batch(path, lines)
+        elif self.on_line:
+            for line in lines:
+                self.on_line(line)
+
+    def _watched_dir(self) -> Path:
+        return self.path if self.path.is_dir() else self.path.parent
+
+    def _matches(self, name: str) -> bool:
+        if self._dir_mode:
+            return fnmatch.fnmatch(name, self.pattern)
+        return name == self.path.name
+
+    def _sync_tails(self, initial: bool) -> None:
+        """
+        Start following any matching file we are not tracking yet.
+        Files present when watching starts are followed from their end;
+        files that appear later are read from the beginning.
+        """
+        if self._dir_mode:
+            if not self.path.is_dir():
+                return
+            candidates = [p for p in self.path.iterdir() if p.is_file() and self._matches(p.name)]
+        else:
+            candidates = [self.path] if self.path.exists() else []
+        for p in candidates:
+            if p not in self._tails:
+                tail = _Tail(p, self.chunk_size)
+                if tail.open(at_end=initial):
+                    self._tails[p] = tail
+
+    def _poll_tails(self, names: Optional[set] = None) -> None:
+        for p, tail in list(self._tails.items()):
+            if names is not None and p.name not in names:
+                continue
+            self._emit(p, tail.poll())
+
+    # --- main loop ------------------------------------------------------
+
     def _run(self):
+        inotify = None
         try:
-            # Wait for file to exist
-            while not self.path.exists() and not self._stop.is_set():
-                time.sleep(self.poll)
-            with self.path.open('r', encoding='utf-8') as f:
-                # Seek to end
-                f.seek(0, 2)
-                while not self._stop.is_set():
-                    line = f.readline()
-                    if line:
-                        self.on_line(line.rstrip('\n'))
-                    else:
-                        time.sleep(self.poll)
+            # Wait for the file (or its directory) to exist
+            while not self._stop.is_set() and not self._watched_dir().is_dir():
+                self._stop.wait(self.poll)
+            if self._stop.is_set():
+                return
+            self._dir_mode = self.path.is_dir()
+            watch_dir = self._watched_dir()
+            self._sync_tails(initial=True)
+
+            # Watch descriptor of the directory; None while it is not watched
+            wd = None
+            if self.use_inotify:
+                try:
+                    inotify = _Inotify()
+                    wd = inotify.add_watch(watch_dir, _DIR_MASK)
+                except OSError as e:
+                    logger.info("inotify unavailable (%s); polling %s", e, self.path)
+                    if inotify:
+                        inotify.close()
+                    inotify = None
+
+            fds = [self._wake_r] + ([inotify.fd] if inotify else [])
+            while not self._stop.is_set():
+                if inotify and wd is None and watch_dir.is_dir():
+                    # The directory came back: watch it again, catch up once
+                    try:
+                        wd = inotify.add_watch(watch_dir, _DIR_MASK)
+                        self._sync_tails(initial=False)
+                        self._poll_tails()
+                    except OSError:
+                        wd = None
+                # The stop pipe wakes a blocking wait
+                ready, _, _ = select.select(fds, [], [], None if wd is not None else self.poll)
+                if self._stop.is_set():
+                    break
+                if inotify and inotify.fd in ready:
+                    events = inotify.read_events()
+                    names = set()
+                    rescan = False
+                    for event_wd, mask, name in events:
+                        if mask & IN_Q_OVERFLOW:
+                            # Events were lost: sweep everything
+                            rescan = True
+                            continue
+                        if event_wd != wd:
+                            # From a watch we already gave up on
+                            continue
+                        if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                            # Directory gone or moved: poll until it is back
+                            wd = None
+                            rescan = True
+                            continue
+                        if name and self._matches(name):
+                            names.add(name)
+                            if mask & (IN_CREATE | IN_MOVED_TO):
+                                rescan = True
+                    if rescan:
+                        self._sync_tails(initial=False)
+                        self._poll_tails()
+                    elif names:
+                        self._sync_tails(initial=False)
+                        self._poll_tails(names)
+                elif not ready:
+                    # Timeout (no inotify, or directory not watched): stat-based sweep
+                    self._sync_tails(initial=False)
+                    self._poll_tails()
         except Exception as e:
             logger.exception("Error watching log file")
-            self._stop.set()
\ No newline at end of file
+            self._stop.set()
+        finally:
+            for tail in self._tails.values():
+                tail.close()
+            self._tails.clear()
+            if inotify:
+                inotify.close()
+            with self._wake_lock:
+                for fd in (self._wake_r, self._wake_w):
+                    if fd is not None:
+                        try:
+                            os.close(fd)
+                        except OSError:
+                            pass
+                self._wake_r, self._wake_w = None, None
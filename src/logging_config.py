@@ -1,36 +1,283 @@
 # src/logging_config.py
+"""
+Queue-based logging for the admin panel.
+
+Loggers only put records on a bounded in-memory queue; a background
+QueueListener formats them and writes the console and the log file, so
+threads that log every container line never wait on the terminal or the
+disk. When the queue is full (the disk cannot keep up), DEBUG and INFO
+records are dropped rather than blocking the caller; the listener logs
+how many once it catches up, and at shutdown.
+
+The log file rotates by size (or on a schedule with `rotate_when`) and
+rotated files are gzip-compressed. Levels can be set per logger, and
+the file can be written as JSON lines:
+
+    IGNITION_ADMIN_LOG_LEVELS="docker_manager=INFO,log_index=WARNING"
+    IGNITION_ADMIN_LOG_FORMAT=json
+"""
+
+import atexit
+import copy
+import gzip
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import shutil
 import sys
+import threading
+import time
 from pathlib import Path
+from typing import Dict, Optional
+
+# Per-logger levels ("name=LEVEL,name=LEVEL") and the file format ("text" or "json")
+LOG_LEVELS_ENV = 'IGNITION_ADMIN_LOG_LEVELS'
+LOG_FORMAT_ENV = 'IGNITION_ADMIN_LOG_FORMAT'
+
+DEFAULT_QUEUE_SIZE = 50_000
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+# The listener running the real handlers, replaced on each setup_logging call
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional['DroppingQueueHandler'] = None
+_setup_lock = threading.Lock()
+_plain = logging.Formatter()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that drops DEBUG and INFO records instead of blocking when
+    the queue is full; warnings and errors wait for room. Drops are only
+    counted here; the listener reports them (see _Listener).
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback now (they may not survive the
+        # trip to another thread) but leave the formatting to the listener
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _plain.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def take_dropped(self) -> int:
+        """
+        The number of records dropped since the last call.
+        """
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    """
+    Reports the records `source` dropped straight to the handlers, once
+    the queue has drained (at most once a second while it stays full)
+    and at shutdown, so a burst that ends the session is still counted.
+    """
+
+    def __init__(self, q: queue.Queue, *handlers: logging.Handler, source: DroppingQueueHandler):
+        super().__init__(q, *handlers, respect_handler_level=True)
+        self.source = source
+        self._last_notice = 0.0
+
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full; the listener thread is draining it
+        self.queue.put(self._sentinel)
+
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        if self.source.dropped and (self.queue.empty() or time.monotonic() - self._last_notice >= 1.0):
+            self.report_dropped()
+
+    def report_dropped(self) -> None:
+        dropped = self.source.take_dropped()
+        if not dropped:
+            return
+        self._last_notice = time.monotonic()
+        super().handle(logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            "%d log record(s) dropped: the log writer fell behind", (dropped,), None,
+        ))
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per record: ts (ISO 8601, UTC), level, logger,
+    thread, message and, when present, exc.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created))
+                  + f".{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    # Runs on the listener thread, never on a logging caller
+    with open(source, 'rb') as src, gzip.open(dest, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.remove(source)
+
+
+def _gzip_namer(name: str) -> str:
+    return f"{name}.gz"
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """
+    "docker_manager=INFO, log_index=warning" -> {name: level}. Unknown
+    level names raise ValueError.
+    """
+    levels: Dict[str, int] = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, level = item.partition('=')
+        value = logging.getLevelName(level.strip().upper())
+        if not sep or not name.strip() or not isinstance(value, int):
+            raise ValueError(f"Invalid log level setting: '{item}' (expected logger=LEVEL)")
+        levels[name.strip()] = value
+    return levels
+
+
+def _file_handler(
+    log_file: Path, rotate_when: Optional[str], max_bytes: int, backup_count: int, compress: bool,
+) -> logging.Handler:
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    if rotate_when:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            log_file, when=rotate_when, backupCount=backup_count, encoding='utf-8',
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8',
+        )
+    if compress:
+        handler.rotator = _gzip_rotator
+        handler.namer = _gzip_namer
+    return handler
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the listener thread. Registered with
+    atexit; safe to call more than once.
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        listener, _listener = _listener, None
+        handler, _queue_handler = _queue_handler, None
+    if handler is not None:
+        logging.getLogger().removeHandler(handler)
+    if listener is not None:
+        listener.stop()
+        # Drops after the last record the listener handled
+        listener.report_dropped()
+        for h in listener.handlers:
+            h.close()
 
-from typing import Optional
 
 def setup_logging(
     log_file: Optional[Path] = None,
     level: int = logging.DEBUG,
     fmt: str = '%(asctime)s %(levelname)s [%(name)s] %(message)s',
-    datefmt: str = '%Y-%m-%d %H:%M:%S'
-):
+    datefmt: str = '%Y-%m-%d %H:%M:%S',
+    stream=None,
+    console_level: Optional[int] = None,
+    *,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    rotate_when: Optional[str] = None,
+    backup_count: int = DEFAULT_BACKUP_COUNT,
+    compress: bool = True,
+    json_lines: Optional[bool] = None,
+    module_levels: Optional[Dict[str, int]] = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+) -> logging.handlers.QueueListener:
     """
-    Configure root logger with a console handler (stdout) and optional file handler.
-    Call this once at application startup.
+    Configure the root logger to hand records to a background listener
+    with a console handler (stdout unless `stream` is given) and optional
+    rotating file handler. Call this once at application startup; calling
+    it again replaces the previous setup.
+
+    The file rotates at `max_bytes`, or on the `rotate_when` schedule
+    (TimedRotatingFileHandler's `when`, e.g. 'midnight'), keeping
+    `backup_count` rotated files, gzip-compressed unless `compress` is
+    False. `json_lines` and `module_levels` default to the
+    IGNITION_ADMIN_LOG_FORMAT and IGNITION_ADMIN_LOG_LEVELS variables.
     """
-    root = logging.getLogger()
-    root.setLevel(level)
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    if json_lines is None:
+        json_lines = os.environ.get(LOG_FORMAT_ENV, '').strip().lower() == 'json'
+    if module_levels is None:
+        try:
+            module_levels = parse_levels(os.environ.get(LOG_LEVELS_ENV, ''))
+        except ValueError as e:
+            print(f"Ignoring {LOG_LEVELS_ENV}: {e}", file=sys.stderr)
+            module_levels = {}
 
     formatter = logging.Formatter(fmt, datefmt=datefmt)
 
     # Console handler
-    ch = logging.StreamHandler(sys.stdout)
-    ch.setLevel(level)
+    ch = logging.StreamHandler(stream or sys.stdout)
+    ch.setLevel(console_level if console_level is not None else level)
     ch.setFormatter(formatter)
-    root.addHandler(ch)
+    handlers = [ch]
 
     # File handler
     if log_file:
-        log_file = Path(log_file)
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-        fh = logging.FileHandler(log_file, encoding='utf-8')
+        fh = _file_handler(Path(log_file), rotate_when, max_bytes, backup_count, compress)
         fh.setLevel(level)
-        fh.setFormatter(formatter)
-        root.addHandler(fh)
+        fh.setFormatter(JsonLinesFormatter() if json_lines else formatter)
+        handlers.append(fh)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    q: queue.Queue = queue.Queue(maxsize=queue_size)
+    qh = DroppingQueueHandler(q)
+    listener = _Listener(q, *handlers, source=qh)
+    listener.start()
+    root.addHandler(qh)
+    with _setup_lock:
+        _listener, _queue_handler = listener, qh
+    return listener
+
+
+atexit.register(shutdown_logging)
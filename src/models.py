@@ -1,7 +1,28 @@
+import hashlib
+import json
 from pathlib import Path
 from dataclasses import dataclass, field
 from typing import Optional, Literal, Tuple
 
+from content_store import file_sha256, store_for
+from images import pinned_reference
+from project_inventory import ProjectInventory, load_project_inventory
+from project_sync import project_digest
+from tag_inventory import INVENTORY_DIR_NAME, TagInventory, load_inventory
+
+
+# Gateway image used when no version is chosen
+DEFAULT_IMAGE = 'inductiveautomation/ignition:latest'
+
+
+def _stored_file_hash(path: Path) -> str:
+    """
+    Content hash of a file, taken from its content-store manifest when
+    available so multi-GB backups are not re-read.
+    """
+    digest = store_for(path.parent).hash_of(path.name)
+    return digest or file_sha256(path)
+
 @dataclass
 class Backup:
     name: str
@@ -16,29 +37,53 @@ class Backup:
         if self.path.suffix.lower() != '.gwbk':
             raise ValueError(f"Invalid backup extension: {self.path.suffix}. Expected .gwbk")
 
+    def content_hash(self) -> str:
+        """
+        SHA-256 of the backup content.
+        """
+        return _stored_file_hash(self.path)
+
 @dataclass
 class Project:
     name: str
     path: Path
+    _inventory: Optional[ProjectInventory] = field(default=None, init=False, repr=False, compare=False)
+    # The folder the ZIP was synced into; `path` may be a nested root inside it
+    _folder: Optional[Path] = field(default=None, init=False, repr=False, compare=False)
 
     def validate(self) -> None:
         """
         Ensure the project folder contains an Ignition 8.1 project manifest (project.json).
-        Supports both direct export or a nested folder structure.
+        Supports both direct export or a nested folder structure. The folder
+        is inventoried once per Project; later calls reuse that result.
         """
-        # Check for top-level project.json
-        manifest = self.path / 'project.json'
-        if manifest.is_file():
+        if self._inventory is not None:
             return
-        # Check for a single nested folder containing project.json
-        subdirs = [d for d in self.path.iterdir() if d.is_dir()]
-        if len(subdirs) == 1:
-            nested_manifest = subdirs[0] / 'project.json'
-            if nested_manifest.is_file():
-                # Flatten path to nested folder
-                self.path = subdirs[0]
-                return
-        raise ValueError(f"Project '{self.name}' missing project.json manifest in {self.path}")
+        inv = load_project_inventory(self.path)
+        if inv.manifest is None:
+            raise ValueError(f"Project '{self.name}' missing project.json manifest in {self.path}")
+        self._folder = self.path
+        if inv.root:
+            # Flatten path to nested folder
+            self.path = self.path / inv.root
+        self._inventory = inv
+
+    def inventory(self) -> ProjectInventory:
+        """
+        Resource counts, size and project.json settings, cached by the
+        folder's file list.
+        """
+        self.validate()
+        return self._inventory
+
+    def content_hash(self) -> str:
+        """
+        Digest of the project files, from the sync record of the folder
+        it was imported into. Not part of the config fingerprint: the
+        projects folder is mounted into the gateway live.
+        """
+        self.validate()
+        return project_digest(self.path, self._folder)
 
 @dataclass
 class TagFile:
@@ -57,10 +102,68 @@ class TagFile:
 
     def validate(self) -> None:
         """
-        Ensure the tag file exists and matches its declared format.
+        Ensure the tag file exists and is a well-formed export of its format.
+        The file is only parsed the first time its content is seen.
         """
         if not self.path.is_file():
             raise FileNotFoundError(f"Tag file not found: {self.path}")
+        self.inventory()
+
+    def inventory(self) -> TagInventory:
+        """
+        Tag, folder, UDT and data type counts, cached by content hash.
+        """
+        return load_inventory(self.path, self.path.parent / INVENTORY_DIR_NAME, self.content_hash())
+
+    def content_hash(self) -> str:
+        """
+        SHA-256 of the tag export content.
+        """
+        return _stored_file_hash(self.path)
+
+@dataclass
+class Resources:
+    """
+    JVM heap and container limits of a gateway, in MB. Unset limits leave
+    the container unconstrained; unset max heap keeps the image default.
+    """
+    heap_init_mb: int = 512
+    heap_max_mb: Optional[int] = None
+    mem_limit_mb: Optional[int] = None
+    cpus: Optional[float] = None
+    # Picked by sizing.auto_resources rather than set by hand
+    auto: bool = False
+    # What auto sizing was based on, for the GUI and logs
+    basis: str = field(default='', compare=False)
+
+    def validate(self) -> None:
+        """
+        Ensure the heap fits the container: initial <= max <= memory limit.
+        """
+        if self.heap_init_mb < 64:
+            raise ValueError(f"Initial heap of {self.heap_init_mb} MB is too small (minimum 64 MB)")
+        if self.heap_max_mb is not None and self.heap_max_mb < self.heap_init_mb:
+            raise ValueError(
+                f"Max heap ({self.heap_max_mb} MB) is below the initial heap ({self.heap_init_mb} MB)"
+            )
+        if self.mem_limit_mb is not None:
+            heap = self.heap_max_mb or self.heap_init_mb
+            if self.mem_limit_mb <= heap:
+                raise ValueError(
+                    f"Container memory limit ({self.mem_limit_mb} MB) must leave room above the heap ({heap} MB)"
+                )
+        if self.cpus is not None and self.cpus <= 0:
+            raise ValueError(f"CPU limit must be positive, got {self.cpus}")
+
+    def describe(self) -> str:
+        """
+        One line for the GUI and logs.
+        """
+        heap = f"heap {self.heap_init_mb:,}–{self.heap_max_mb:,} MB" if self.heap_max_mb \
+            else f"initial heap {self.heap_init_mb:,} MB"
+        limit = f"{self.mem_limit_mb:,} MB" if self.mem_limit_mb else "no memory limit"
+        cpus = f"{self.cpus:g} CPUs" if self.cpus else "all CPUs"
+        return f"{heap}, {limit}, {cpus}" + (" (auto)" if self.auto else "")
 
 @dataclass
 class ComposeConfig:
@@ -75,6 +178,16 @@ class ComposeConfig:
     gateway_name: str
     edition: str = 'standard'
     timezone: str = 'America/Chicago'
+    container_name: str = 'ignition-dev'
+    image: str = DEFAULT_IMAGE
+    # Content digest the image tag resolved to (sha256:…); pins the gateway version
+    image_digest: Optional[str] = None
+    # Backup mode only: data volume is seeded from a warm snapshot, skip the .gwbk restore
+    restore_from_snapshot: bool = False
+    # Host path of a tag delta (tag_diff) mounted instead of the full export,
+    # for a gateway that already imported an earlier version of it
+    tag_delta: Optional[str] = None
+    resources: Resources = field(default_factory=Resources)
 
     def validate(self) -> None:
         """
@@ -82,6 +195,7 @@ class ComposeConfig:
         - Mode-specific requirements
         - Port bounds
         - Credentials non-empty
+        - Heap and container limits consistent
         """
         if self.mode not in ('clean', 'backup'):
             raise ValueError(f"Invalid mode: {self.mode}. Expected 'clean' or 'backup'.")
@@ -106,6 +220,75 @@ class ComposeConfig:
             raise ValueError("Admin password cannot be empty.")
         if not self.gateway_name:
             raise ValueError("Gateway name cannot be empty.")
+        if not self.container_name:
+            raise ValueError("Container name cannot be empty.")
+        if not self.image:
+            raise ValueError("Gateway image cannot be empty.")
+        if self.image_digest and not self.image_digest.startswith('sha256:'):
+            raise ValueError(f"Invalid image digest: {self.image_digest}")
+        self.resources.validate()
+
+    @property
+    def image_ref(self) -> str:
+        """
+        Image reference for compose: "repo@sha256:…" once pinned, else the tag.
+        """
+        if not self.image_digest:
+            return self.image
+        return pinned_reference(self.image, self.image_digest)
+
+    def fingerprint(self) -> str:
+        """
+        Stable hash of everything that shapes the gateway container: config
+        fields plus the content of the backup and tag file. Two configs
+        with the same fingerprint produce an identical container. Project
+        files are left out; the gateway sees them through its mount. So
+        are auto-sized limits, which move with the host's load.
+        """
+        return self._fingerprint(include_tags=True)
+
+    def base_fingerprint(self) -> str:
+        """
+        The fingerprint without the tag export. Configs that differ only
+        in their tags can update a gateway with a tag delta.
+        """
+        return self._fingerprint(include_tags=False)
+
+    def data_fingerprint(self) -> str:
+        """
+        Hash of what the data volume is seeded from: the mode and the
+        backup restored into it. A container recreated for any other
+        change keeps its data.
+        """
+        inputs = {
+            'mode': self.mode,
+            'backup_hash': self.backup.content_hash() if self.backup else None,
+        }
+        blob = json.dumps(inputs, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def _fingerprint(self, include_tags: bool) -> str:
+        inputs = self.to_dict()
+        # Seeding from a snapshot yields the same gateway as replaying the backup
+        inputs.pop('restore_from_snapshot')
+        # A delta import ends with the same tags as the full export
+        inputs.pop('tag_delta')
+        # The whole projects folder is mounted; which project was imported
+        # last, and its content, never change the container
+        inputs.pop('project_name')
+        if self.resources.auto:
+            # Auto limits follow the host and the gateways running next to
+            # this one; only the choice of auto sizing is the user's
+            for key in ('heap_init_mb', 'heap_max_mb', 'mem_limit_mb', 'cpus'):
+                inputs.pop(key)
+            inputs['resources'] = 'auto'
+        inputs['backup_hash'] = self.backup.content_hash() if self.backup else None
+        if include_tags:
+            inputs['tag_hash'] = self.tag_file.content_hash() if self.tag_file else None
+        else:
+            inputs.pop('tag_file')
+        blob = json.dumps(inputs, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
 
     def to_dict(self) -> dict:
         """
@@ -123,4 +306,12 @@ class ComposeConfig:
             'gateway_name': self.gateway_name,
             'edition': self.edition,
             'timezone': self.timezone,
+            'container_name': self.container_name,
+            'image': self.image_ref,
+            'restore_from_snapshot': self.restore_from_snapshot,
+            'tag_delta': self.tag_delta,
+            'heap_init_mb': self.resources.heap_init_mb,
+            'heap_max_mb': self.resources.heap_max_mb,
+            'mem_limit_mb': self.resources.mem_limit_mb,
+            'cpus': self.resources.cpus,
         }
\ No newline at end of file
@@ -0,0 +1,301 @@
+# src/perf.py
+
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Directories
+BASE_DIR = Path(__file__).resolve().parent.parent
+LOGS_DIR = BASE_DIR / 'logs'
+
+REPORT_PREFIX = 'perf-'
+REPORT_VERSION = 1
+# One report per launch; older ones are deleted past this many
+MAX_REPORTS = 50
+
+# Well-known marks
+FIRST_LOG_LINE = 'logs.first_line'
+
+
+@dataclass
+class Span:
+    name: str
+    start: float       # seconds since the launch began
+    duration: float
+    ok: bool = True
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Mark:
+    name: str
+    at: float          # seconds since the launch began
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class LaunchReport:
+    """
+    Timings for one spin-up: spans (named durations), marks (first-time
+    events such as the first log line) and counters (log lines, bytes).
+    Thread-safe; every time is relative to the launch start.
+    """
+
+    def __init__(self, label: str = 'launch', **meta: Any):
+        self.label = label
+        self.meta: Dict[str, Any] = dict(meta)
+        self.started_at = time.time()
+        self._t0 = time.monotonic()
+        self.spans: List[Span] = []
+        self.marks: Dict[str, Mark] = {}
+        self.counters: Dict[str, float] = {}
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        return time.monotonic() - self._t0
+
+    def add_span(self, name: str, start: float, duration: float, ok: bool = True, **attrs: Any) -> None:
+        with self._lock:
+            self.spans.append(Span(name, start, duration, ok, attrs))
+
+    def mark(self, name: str, **attrs: Any) -> bool:
+        """
+        Record the first occurrence of an event; later calls are ignored.
+        Returns True if this call set the mark.
+        """
+        with self._lock:
+            if name in self.marks:
+                return False
+            self.marks[name] = Mark(name, self.now(), attrs)
+        logger.info("perf mark=%s at=%.3fs", name, self.marks[name].at)
+        return True
+
+    def count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_meta(self, **meta: Any) -> None:
+        with self._lock:
+            self.meta.update(meta)
+
+    # --- reporting ------------------------------------------------------
+
+    def totals(self) -> Dict[str, float]:
+        """
+        Summed duration per span name (a name can occur several times).
+        """
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for s in self.spans:
+                totals[s.name] = totals.get(s.name, 0.0) + s.duration
+        return totals
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'version': REPORT_VERSION,
+                'label': self.label,
+                'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+                'elapsed': (self.finished_at or self.now()),
+                'meta': dict(self.meta),
+                'spans': [asdict(s) for s in sorted(self.spans, key=lambda s: s.start)],
+                'marks': {k: asdict(m) for k, m in self.marks.items()},
+                'counters': dict(self.counters),
+            }
+
+    def finish(self, log_dir: Path = LOGS_DIR, keep: int = MAX_REPORTS) -> Path:
+        """
+        Freeze the elapsed time and write the report as JSON into log_dir,
+        keeping only the `keep` most recent reports there.
+        """
+        if self.finished_at is None:
+            self.finished_at = self.now()
+        log_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started_at).strftime('%Y%m%d-%H%M%S')
+        path = log_dir / f"{REPORT_PREFIX}{stamp}-{self.label}.json"
+        tmp = path.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps(self.to_dict(), indent=2, default=str), encoding='utf-8')
+        tmp.replace(path)
+        logger.info("Wrote performance report %s", path)
+        prune_reports(log_dir, keep)
+        return path
+
+
+def summarize(report: dict, previous: Optional[dict] = None) -> str:
+    """
+    Human-readable summary of a report dict, with deltas against a
+    previous launch when given.
+    """
+    def _totals(rep: dict) -> Dict[str, float]:
+        out: Dict[str, float] = {}
+        for s in rep.get('spans', []):
+            out[s['name']] = out.get(s['name'], 0.0) + s['duration']
+        for name, m in rep.get('marks', {}).items():
+            out[f"@{name}"] = m['at']
+        return out
+
+    cur = _totals(report)
+    prev = _totals(previous) if previous else {}
+    lines = []
+    for name in sorted(cur, key=lambda n: (n.startswith('@'), n)):
+        line = f"{name:<28} {cur[name]:8.2f}s"
+        if name in prev:
+            delta = cur[name] - prev[name]
+            line += f"  ({'+' if delta >= 0 else ''}{delta:.2f}s)"
+        lines.append(line)
+    counters = report.get('counters', {})
+    first_line = cur.get(f"@{FIRST_LOG_LINE}")
+    if counters.get('logs.lines') and first_line is not None:
+        streamed = report.get('elapsed', 0.0) - first_line
+        if streamed > 0:
+            lines.append(f"{'log throughput':<28} {counters['logs.lines'] / streamed:8.0f} lines/s")
+    lines.append(f"{'total':<28} {report.get('elapsed', 0.0):8.2f}s")
+    return '\n'.join(lines)
+
+
+def _report_paths(log_dir: Path) -> List[Path]:
+    # Newest first: the names start with the launch time
+    return sorted(log_dir.glob(f"{REPORT_PREFIX}*.json"), reverse=True)
+
+
+def prune_reports(log_dir: Path = LOGS_DIR, keep: int = MAX_REPORTS) -> int:
+    """
+    Delete all but the `keep` most recent reports. Returns how many went.
+    """
+    removed = 0
+    for p in _report_paths(log_dir)[keep:]:
+        try:
+            p.unlink()
+            removed += 1
+        except OSError as e:
+            logger.warning("Could not delete old performance report %s: %s", p, e)
+    return removed
+
+
+def load_reports(log_dir: Path = LOGS_DIR, limit: int = 2) -> List[dict]:
+    """
+    Most recent reports first.
+    """
+    paths = _report_paths(log_dir)[:limit]
+    reports = []
+    for p in paths:
+        try:
+            reports.append(json.loads(p.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            logger.warning("Skipping unreadable performance report %s", p)
+    return reports
+
+
+# --- active launch ---------------------------------------------------------
+# Instrumented code calls span()/mark()/count() without threading a report
+# through every signature; outside a launch they only log at DEBUG.
+
+_active: Optional[LaunchReport] = None
+_active_lock = threading.Lock()
+
+
+def start_launch(label: str = 'launch', **meta: Any) -> LaunchReport:
+    global _active
+    with _active_lock:
+        _active = LaunchReport(label, **meta)
+        return _active
+
+
+def current() -> Optional[LaunchReport]:
+    return _active
+
+
+def end_launch(log_dir: Path = LOGS_DIR) -> Optional[Path]:
+    """
+    Write the active report and detach it. Returns the report path.
+    """
+    global _active
+    with _active_lock:
+        report, _active = _active, None
+    return report.finish(log_dir) if report else None
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Time a block. The yielded dict may be filled with extra attributes
+    (e.g. bytes copied) that end up on the span.
+    """
+    report = _active
+    start = time.monotonic()
+    rel_start = report.now() if report else 0.0
+    ok = True
+    try:
+        yield attrs
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        duration = time.monotonic() - start
+        logger.debug("perf span=%s duration=%.3fs ok=%s", name, duration, ok)
+        if report is not None:
+            report.add_span(name, rel_start, duration, ok, **attrs)
+
+
+class OpenSpan:
+    """
+    A span ended by an event rather than by leaving a block, e.g. compose
+    up in the foreground, which keeps running after the container starts.
+    It is added to the report that was active when it began.
+    """
+
+    def __init__(self, name: str, **attrs: Any):
+        self.name = name
+        self.attrs = attrs
+        self._report = _active
+        self._start = time.monotonic()
+        self._rel_start = self._report.now() if self._report else 0.0
+        self._ended = False
+
+    def end(self, ok: bool = True, **attrs: Any) -> bool:
+        """
+        Record the span; only the first call counts. Returns True if this
+        call recorded it.
+        """
+        if self._ended:
+            return False
+        self._ended = True
+        duration = time.monotonic() - self._start
+        logger.debug("perf span=%s duration=%.3fs ok=%s", self.name, duration, ok)
+        if self._report is not None:
+            self._report.add_span(self.name, self._rel_start, duration, ok, **{**self.attrs, **attrs})
+        return True
+
+
+def timed(name: str):
+    """
+    Decorator form of span().
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def mark(name: str, **attrs: Any) -> None:
+    report = _active
+    if report is not None:
+        report.mark(name, **attrs)
+
+
+def count(name: str, amount: float = 1) -> None:
+    report = _active
+    if report is not None:
+        report.count(name, amount)
@@ -0,0 +1,342 @@
+# src/project_inventory.py
+"""
+Inventory of an Ignition 8.1 project folder.
+
+One pass over the folder's file list (a single scandir walk, keyed by the
+CRCs the last ZIP sync recorded while the folder still matches that
+record) gives resource counts by
+module and type, total size, the largest resources, and the project.json
+settings including the inheritance parent. The inventory is cached with
+its file list under a fingerprint of that list. When the fingerprint
+changes, only the files that changed since the cached list update the
+totals, and project.json is read again only if it changed.
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import perf
+from errors import ProjectValidationError
+from project_sync import load_sync_state
+from utils import format_size, read_json_cache, write_json_cache
+
+logger = logging.getLogger(__name__)
+
+# Directories
+BASE_DIR = Path(__file__).resolve().parent.parent
+# Outside projects/, which the gateway mounts as its own projects folder
+PROJECT_INVENTORY_DIR = BASE_DIR / '.cache' / 'projects'
+# Cached inventories of any other version are analyzed again
+INVENTORY_VERSION = 1
+
+MANIFEST_NAME = 'project.json'
+RESOURCE_MANIFEST = 'resource.json'
+LARGEST_COUNT = 10
+
+# rel path -> [signature, size]; the signature is the CRC-32 from the sync
+# record or the mtime from a scan, so tables of different sources never mix
+FileTable = Dict[str, List[int]]
+# directory -> [files, bytes]
+DirSizes = Dict[str, List[int]]
+
+
+@dataclass
+class ProjectInventory:
+    """
+    What a project folder holds. `root` is '' when project.json is at the
+    top of the folder, or the single subfolder that holds it; resource
+    paths are relative to that root. `manifest` is None without one.
+    """
+    fingerprint: str
+    source: str
+    root: str = ''
+    manifest: Optional[str] = None
+    title: str = ''
+    description: str = ''
+    parent: Optional[str] = None
+    enabled: bool = True
+    inheritable: bool = False
+    files: int = 0
+    total_size: int = 0
+    resources: int = 0
+    # "perspective/views" -> count
+    by_type: Dict[str, int] = field(default_factory=dict)
+    # [resource path, size], largest first
+    largest: List[List] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        """
+        One line for the GUI and logs.
+        """
+        if self.manifest is None:
+            return f"{self.files:,} files, no {MANIFEST_NAME}"
+        top = sorted(self.by_type.items(), key=lambda kv: (-kv[1], kv[0]))[:4]
+        types = ', '.join(f"{name} {count:,}" for name, count in top)
+        text = f"{self.resources:,} resources"
+        if types:
+            text += f" ({types})"
+        text += f", {format_size(self.total_size)}"
+        if self.parent:
+            text += f", inherits from '{self.parent}'"
+        if not self.enabled:
+            text += ", disabled"
+        if self.warnings:
+            text += f"; {len(self.warnings)} warning(s)"
+        return text
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ProjectInventory':
+        return cls(**data)
+
+
+def _type_key(parts: List[str]) -> str:
+    # com.inductiveautomation.perspective/views -> perspective/views
+    return f"{parts[0].rsplit('.', 1)[-1]}/{parts[1]}"
+
+
+# --- file table ------------------------------------------------------------
+
+def _scan(path: Path) -> FileTable:
+    table: FileTable = {}
+    stack = [(path, '')]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as it:
+            for entry in it:
+                rel = f"{prefix}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((Path(entry.path), f"{rel}/"))
+                elif entry.is_file() and not entry.name.endswith('.sync-tmp'):
+                    st = entry.stat()
+                    table[rel] = [st.st_mtime_ns, st.st_size]
+    return table
+
+
+def file_table(path: Path) -> Tuple[FileTable, str]:
+    """
+    (rel path -> [signature, size], source) of every file in a project
+    folder, from one scandir pass. The folder is live-mounted and can be
+    edited after a sync, so the ZIP sync record's CRCs are used only while
+    every file's size and mtime still match it; any added, removed or
+    touched file means the scan table.
+    """
+    table = _scan(path)
+    state = load_sync_state(path)
+    if state and state.keys() == table.keys() and all(
+            len(rec) > 2 and table[rel] == [rec[2], rec[1]] for rel, rec in state.items()):
+        return {rel: [rec[0], rec[1]] for rel, rec in state.items()}, 'sync'
+    return table, 'scan'
+
+
+def _fingerprint(table: FileTable, source: str) -> str:
+    h = hashlib.sha256(source.encode('utf-8'))
+    for rel in sorted(table):
+        sig, size = table[rel]
+        h.update(f"{rel}\0{sig}\0{size}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+# --- analysis --------------------------------------------------------------
+
+def _manifest_rel(table: FileTable) -> Tuple[str, Optional[str]]:
+    """
+    (root, manifest path): same rule as ZIP imports, project.json at the
+    top or in the single top-level folder.
+    """
+    if MANIFEST_NAME in table:
+        return '', MANIFEST_NAME
+    tops = {rel.split('/', 1)[0] for rel in table if '/' in rel}
+    if len(tops) == 1:
+        top = next(iter(tops))
+        if f"{top}/{MANIFEST_NAME}" in table:
+            return top, f"{top}/{MANIFEST_NAME}"
+    return '', None
+
+
+def _read_manifest(path: Path, inv: ProjectInventory) -> None:
+    try:
+        data = json.loads((path / inv.manifest).read_text(encoding='utf-8-sig'))
+    except ValueError as e:
+        raise ProjectValidationError(f"{inv.manifest} is not valid JSON", underlying=e)
+    except OSError as e:
+        raise ProjectValidationError(f"Cannot read {inv.manifest}", underlying=e)
+    if not isinstance(data, dict):
+        raise ProjectValidationError(f"{inv.manifest} is not a JSON object")
+    inv.title = str(data.get('title') or '')
+    inv.description = str(data.get('description') or '')
+    parent = data.get('parent')
+    inv.parent = str(parent) if parent else None
+    inv.enabled = bool(data.get('enabled', True))
+    inv.inheritable = bool(data.get('inheritable', False))
+
+
+def _dir_sizes(table: FileTable) -> DirSizes:
+    sizes: DirSizes = {}
+    for rel, (_sig, size) in table.items():
+        entry = sizes.setdefault(rel.rpartition('/')[0], [0, 0])
+        entry[0] += 1
+        entry[1] += size
+    return sizes
+
+
+def _update_dir_sizes(sizes: DirSizes, old: FileTable, new: FileTable) -> int:
+    """
+    Bring per-directory totals from `old` to `new` touching only the files
+    that differ. Returns how many did.
+    """
+    changed = 0
+
+    def _add(rel: str, files: int, size: int) -> None:
+        d = rel.rpartition('/')[0]
+        entry = sizes.setdefault(d, [0, 0])
+        entry[0] += files
+        entry[1] += size
+        if not entry[0]:
+            del sizes[d]
+
+    for rel in old.keys() - new.keys():
+        _add(rel, -1, -old[rel][1])
+        changed += 1
+    for rel, rec in new.items():
+        before = old.get(rel)
+        if before == rec:
+            continue
+        if before:
+            _add(rel, 0, rec[1] - before[1])
+        else:
+            _add(rel, 1, rec[1])
+        changed += 1
+    return changed
+
+
+def _summarize(inv: ProjectInventory, table: FileTable, sizes: DirSizes) -> None:
+    """
+    Counts from per-directory sizes. A resource is a folder holding a
+    resource.json, below <module>/<type>/.
+    """
+    prefix = f"{inv.root}/" if inv.root else ''
+    inv.files = len(table)
+    inv.total_size = sum(size for _files, size in sizes.values())
+    by_type: Dict[str, int] = {}
+    resources: List[Tuple[int, str]] = []
+    loose = 0
+    for d, (_files, size) in sizes.items():
+        if not d.startswith(prefix) or d == inv.root:
+            continue
+        parts = d[len(prefix):].split('/')
+        if len(parts) < 3:
+            continue
+        if f"{d}/{RESOURCE_MANIFEST}" not in table:
+            loose += 1
+            continue
+        key = _type_key(parts)
+        by_type[key] = by_type.get(key, 0) + 1
+        resources.append((size, d[len(prefix):]))
+    inv.by_type = by_type
+    inv.resources = len(resources)
+    inv.largest = [[name, size] for size, name in heapq.nlargest(LARGEST_COUNT, resources)]
+    inv.warnings = []
+    if inv.manifest is not None and not inv.resources:
+        inv.warnings.append("Project has no resources")
+    if loose:
+        inv.warnings.append(f"{loose:,} folder(s) hold files but no {RESOURCE_MANIFEST}")
+
+
+def _analyze(
+    path: Path, table: FileTable, source: str, fingerprint: str,
+    previous: Optional[Tuple[ProjectInventory, FileTable, DirSizes]],
+) -> Tuple[ProjectInventory, DirSizes]:
+    root, manifest = _manifest_rel(table)
+    inv = ProjectInventory(fingerprint=fingerprint, source=source, root=root, manifest=manifest)
+    with perf.span('project.inventory', source=source, files=len(table)) as attrs:
+        if previous and previous[0].source == source:
+            old_inv, old_table, sizes = previous
+            sizes = {d: list(entry) for d, entry in sizes.items()}
+            attrs['changed'] = _update_dir_sizes(sizes, old_table, table)
+            same_manifest = manifest is not None and manifest == old_inv.manifest \
+                and table[manifest] == old_table.get(manifest)
+        else:
+            sizes = _dir_sizes(table)
+            old_inv, same_manifest = None, False
+        if same_manifest:
+            for name in ('title', 'description', 'parent', 'enabled', 'inheritable'):
+                setattr(inv, name, getattr(old_inv, name))
+        elif manifest is not None:
+            _read_manifest(path, inv)
+        _summarize(inv, table, sizes)
+        attrs.update(resources=inv.resources)
+    return inv, sizes
+
+
+# --- cache -----------------------------------------------------------------
+
+# path -> (inventory, table, dir sizes)
+_memory: Dict[str, Tuple[ProjectInventory, FileTable, DirSizes]] = {}
+_memory_lock = threading.Lock()
+
+
+def _cache_file(cache_dir: Path, key: str) -> Path:
+    return cache_dir / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]}.json"
+
+
+def _read_cache(cache_dir: Path, key: str) -> Optional[Tuple[ProjectInventory, FileTable, DirSizes]]:
+    data = read_json_cache(_cache_file(cache_dir, key), INVENTORY_VERSION)
+    if data is None or data.get('path') != key:
+        return None
+    try:
+        return ProjectInventory.from_dict(data['inventory']), data['table'], data['dirs']
+    except (KeyError, TypeError):
+        return None
+
+
+def _write_cache(cache_dir: Path, key: str, entry: Tuple[ProjectInventory, FileTable, DirSizes]) -> None:
+    inv, table, sizes = entry
+    write_json_cache(_cache_file(cache_dir, key), {
+        'path': key, 'inventory': inv.to_dict(), 'table': table, 'dirs': sizes,
+    }, INVENTORY_VERSION)
+
+
+def load_project_inventory(path: Path, cache_dir: Optional[Path] = None) -> ProjectInventory:
+    """
+    Inventory of a project folder, from memory or `cache_dir` (default
+    PROJECT_INVENTORY_DIR) while its file list is unchanged, else updated
+    from the cached one. Raises ProjectValidationError if the folder is
+    missing or its project.json is unreadable.
+    """
+    cache_dir = cache_dir or PROJECT_INVENTORY_DIR
+    path = Path(path)
+    if not path.is_dir():
+        raise ProjectValidationError(f"Project folder not found: {path}")
+    key = str(path.resolve())
+    try:
+        table, source = file_table(path)
+    except OSError as e:
+        raise ProjectValidationError(f"Cannot list project folder {path}", underlying=e)
+    fingerprint = _fingerprint(table, source)
+
+    with _memory_lock:
+        previous = _memory.get(key)
+    if previous is None:
+        previous = _read_cache(cache_dir, key)
+    if previous is not None and previous[0].fingerprint == fingerprint:
+        inv = previous[0]
+        logger.debug("Project inventory of %s from cache", path.name)
+    else:
+        inv, sizes = _analyze(path, table, source, fingerprint, previous)
+        previous = (inv, table, sizes)
+        _write_cache(cache_dir, key, previous)
+        logger.info("Analyzed project %s: %s", path.name, inv.summary())
+    with _memory_lock:
+        _memory[key] = previous
+    return inv
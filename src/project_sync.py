@@ -0,0 +1,358 @@
+# src/project_sync.py
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, List, Optional, Tuple
+
+from errors import ProjectValidationError
+
+logger = logging.getLogger(__name__)
+
+# Directories
+BASE_DIR = Path(__file__).resolve().parent.parent
+# Per-project record of what the last sync wrote: name -> [crc, size, mtime_ns].
+# Kept outside projects/, which the gateway mounts as its own projects folder
+SYNC_STATE_DIR = BASE_DIR / '.cache' / 'sync'
+SYNC_STATE_VERSION = 1
+# Where earlier versions kept the record, inside the project folder
+LEGACY_SYNC_STATE_NAME = '.sync-state.json'
+_CHUNK = 1024 * 1024
+
+# Archive sanity limits, checked against the central directory before extraction
+MAX_ENTRIES = 500_000
+MAX_ENTRY_SIZE = 2 * 1024 ** 3
+MAX_TOTAL_SIZE = 20 * 1024 ** 3
+# Compression ratio above which an entry is treated as a ZIP bomb
+MAX_RATIO = 200
+_RATIO_MIN_SIZE = 1024 * 1024
+
+# on_progress(done, total)
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass
+class ProjectChangeset:
+    """
+    What an incremental project import actually touched on disk.
+    """
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.updated)} updated, "
+            f"{len(self.removed)} removed, {self.unchanged} unchanged"
+        )
+
+
+def _crc32_of(path: Path) -> int:
+    crc = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+    return crc & 0xFFFFFFFF
+
+
+def safe_member_path(dest_dir: Path, name: str) -> Path:
+    """
+    Map a ZIP member name onto dest_dir, refusing anything that would
+    land outside it (absolute paths, drive letters, '..' components).
+    """
+    posix = PurePosixPath(name.replace('\\', '/'))
+    if posix.is_absolute() or '..' in posix.parts or (posix.parts and ':' in posix.parts[0]):
+        raise ProjectValidationError(f"Archive entry escapes the project folder: {name}")
+    return dest_dir.joinpath(*posix.parts)
+
+
+@dataclass
+class ArchivePlan:
+    """
+    Validated view of a project ZIP's central directory.
+    """
+    members: List[Tuple[str, zipfile.ZipInfo]]
+    manifest: str
+    total_size: int
+
+
+def _is_symlink(info: zipfile.ZipInfo) -> bool:
+    return stat.S_ISLNK(info.external_attr >> 16)
+
+
+def plan_archive(zf: zipfile.ZipFile, dest_dir: Path) -> ArchivePlan:
+    """
+    Read and vet the central directory without writing anything:
+    path-escaping or symlink entries, oversized or suspiciously compressed
+    entries, and archives with no project.json all fail here.
+    """
+    infos = zf.infolist()
+    if len(infos) > MAX_ENTRIES:
+        raise ProjectValidationError(
+            f"Archive has {len(infos)} entries (limit {MAX_ENTRIES})"
+        )
+    members: List[Tuple[str, zipfile.ZipInfo]] = []
+    total = 0
+    seen = set()
+    for info in infos:
+        if info.is_dir():
+            continue
+        if _is_symlink(info):
+            raise ProjectValidationError(f"Archive entry is a symlink: {info.filename}")
+        if info.flag_bits & 0x1:
+            raise ProjectValidationError(f"Archive entry is encrypted: {info.filename}")
+        target = safe_member_path(dest_dir, info.filename)
+        rel = target.relative_to(dest_dir).as_posix()
+        if rel in seen:
+            raise ProjectValidationError(f"Archive contains duplicate entry: {rel}")
+        seen.add(rel)
+        if info.file_size > MAX_ENTRY_SIZE:
+            raise ProjectValidationError(
+                f"Archive entry too large: {info.filename} ({info.file_size} bytes)"
+            )
+        if info.file_size > _RATIO_MIN_SIZE and \
+                info.file_size > MAX_RATIO * max(info.compress_size, 1):
+            raise ProjectValidationError(
+                f"Archive entry has a suspicious compression ratio: {info.filename}"
+            )
+        total += info.file_size
+        if total > MAX_TOTAL_SIZE:
+            raise ProjectValidationError(
+                f"Archive expands to more than {MAX_TOTAL_SIZE} bytes"
+            )
+        members.append((rel, info))
+
+    # Same rule as models.Project.validate: top-level or single nested folder
+    if 'project.json' in seen:
+        manifest = 'project.json'
+    else:
+        tops = {rel.split('/', 1)[0] for rel in seen if '/' in rel}
+        nested = [f"{t}/project.json" for t in tops if f"{t}/project.json" in seen]
+        if len(tops) != 1 or not nested:
+            raise ProjectValidationError("Archive has no project.json manifest")
+        manifest = nested[0]
+    return ArchivePlan(members=members, manifest=manifest, total_size=total)
+
+
+def sync_state_path(dest_dir: Path) -> Path:
+    """
+    File under .cache/sync/ holding the sync record of a project folder,
+    keyed by its resolved path.
+    """
+    key = str(Path(dest_dir).resolve())
+    return SYNC_STATE_DIR / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]}.json"
+
+
+def load_sync_state(dest_dir: Path) -> Dict[str, list]:
+    """
+    What the last sync wrote into dest_dir: rel path -> [crc, size, mtime_ns].
+    Empty if the folder was never synced (or its record is unreadable).
+    """
+    try:
+        data = json.loads(sync_state_path(dest_dir).read_text(encoding='utf-8'))
+        if data.get('version') == SYNC_STATE_VERSION and data.get('path') == str(Path(dest_dir).resolve()):
+            return data['files']
+        return {}
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, AttributeError):
+        return {}
+    # Not migrated yet: the record still sits in the project folder
+    try:
+        return json.loads((dest_dir / LEGACY_SYNC_STATE_NAME).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(dest_dir: Path, state: Dict[str, list]) -> None:
+    path = sync_state_path(dest_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps({
+        'version': SYNC_STATE_VERSION, 'path': str(Path(dest_dir).resolve()), 'files': state,
+    }, separators=(',', ':')), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def _is_current(target: Path, info: zipfile.ZipInfo, recorded) -> bool:
+    """
+    Decide whether the file on disk already matches the ZIP entry.
+    Cheap path: size/mtime match what the last sync recorded for this CRC.
+    Fallback: same size and same CRC-32 computed from disk.
+    """
+    try:
+        st = target.stat()
+    except FileNotFoundError:
+        return False
+    if st.st_size != info.file_size:
+        return False
+    if recorded and recorded[0] == info.CRC and recorded[1] == info.file_size \
+            and recorded[2] == st.st_mtime_ns:
+        return True
+    return _crc32_of(target) == info.CRC
+
+
+def _write_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, target: Path) -> int:
+    """
+    Atomically replace target with the entry's bytes; returns the new mtime_ns.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.sync-tmp")
+    with zf.open(info) as src, open(tmp, 'wb') as dst:
+        shutil.copyfileobj(src, dst, _CHUNK)
+    os.replace(tmp, target)
+    return target.stat().st_mtime_ns
+
+
+def _prune_empty_dirs(root: Path) -> None:
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        if dirpath != str(root) and not dirnames and not filenames:
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                pass
+
+
+def sync_project_zip(
+    zip_path: Path,
+    dest_dir: Path,
+    on_progress: Optional[ProgressCallback] = None,
+    max_workers: Optional[int] = None,
+) -> ProjectChangeset:
+    """
+    Bring dest_dir in line with the ZIP, writing only entries whose
+    CRC/size differ from what is on disk and deleting files the ZIP no
+    longer contains. Untouched files keep their mtimes, so a gateway
+    watching the folder only rescans what changed.
+
+    The central directory is validated up front (see plan_archive); entries
+    are then compared and decompressed in parallel, each worker reading
+    through its own ZipFile handle. `on_progress(done, total)` is called
+    on the calling thread as entries complete; raising from it aborts the
+    sync, leaving already written entries in place.
+    """
+    changes = ProjectChangeset()
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        plan = plan_archive(zf, dest_dir)
+    logger.info(
+        "Archive %s: %d entries, %d bytes, manifest %s",
+        zip_path, len(plan.members), plan.total_size, plan.manifest
+    )
+
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    old_state = load_sync_state(dest_dir)
+    # Migrated: the record is saved under .cache/ from now on
+    (dest_dir / LEGACY_SYNC_STATE_NAME).unlink(missing_ok=True)
+    new_state: Dict[str, list] = {}
+    total = len(plan.members)
+    done = 0
+    progress_lock = threading.Lock()
+    local = threading.local()
+    handles: List[zipfile.ZipFile] = []
+
+    def _zip() -> zipfile.ZipFile:
+        zf = getattr(local, 'zf', None)
+        if zf is None:
+            zf = local.zf = zipfile.ZipFile(zip_path, 'r')
+            with progress_lock:
+                handles.append(zf)
+        return zf
+
+    def _sync_one(rel: str, info: zipfile.ZipInfo) -> Tuple[str, str, list]:
+        target = dest_dir.joinpath(*rel.split('/'))
+        existed = target.exists()
+        if existed and _is_current(target, info, old_state.get(rel)):
+            return rel, 'unchanged', [info.CRC, info.file_size, target.stat().st_mtime_ns]
+        mtime = _write_member(_zip(), info, target)
+        return rel, ('updated' if existed else 'added'), [info.CRC, info.file_size, mtime]
+
+    workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='unzip') as pool:
+            futures = [pool.submit(_sync_one, rel, info) for rel, info in plan.members]
+            try:
+                for fut in as_completed(futures):
+                    rel, outcome, record = fut.result()
+                    new_state[rel] = record
+                    if outcome == 'unchanged':
+                        changes.unchanged += 1
+                    else:
+                        getattr(changes, outcome).append(rel)
+                    done += 1
+                    if on_progress:
+                        on_progress(done, total)
+            except BaseException:
+                # A failed entry or a progress callback aborting (cancel):
+                # drop the queued entries instead of extracting them all
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+    finally:
+        for zf in handles:
+            zf.close()
+    changes.added.sort()
+    changes.updated.sort()
+
+    # Anything on disk the archive no longer has goes away
+    wanted = set(new_state)
+    for path in sorted(dest_dir.rglob('*')):
+        if not path.is_file():
+            continue
+        rel = path.relative_to(dest_dir).as_posix()
+        if rel not in wanted:
+            path.unlink()
+            changes.removed.append(rel)
+    if changes.removed:
+        _prune_empty_dirs(dest_dir)
+
+    _save_state(dest_dir, new_state)
+    logger.info("Synced %s into %s: %s", zip_path, dest_dir, changes.summary())
+    return changes
+
+
+def project_digest(path: Path, sync_dir: Optional[Path] = None) -> str:
+    """
+    Stable content digest of a project folder. `sync_dir` is the folder
+    the ZIP was synced into when `path` is a nested project root inside
+    it (default: `path` itself); while every file under `path` still has
+    the size and mtime its sync record holds, the record's CRCs stand in
+    for reading them. Otherwise (never synced, or edited since) falls back
+    to relative path, size and mtime of every file.
+    """
+    sync_dir = sync_dir or path
+    prefix = path.relative_to(sync_dir).as_posix()
+    prefix = '' if prefix == '.' else f"{prefix}/"
+    files = {}
+    for p in path.rglob('*'):
+        if p.is_file():
+            st = p.stat()
+            files[p.relative_to(path).as_posix()] = (st.st_size, st.st_mtime_ns)
+    state = load_sync_state(sync_dir)
+    records = {rel[len(prefix):]: rec for rel, rec in state.items() if rel.startswith(prefix)}
+    h = hashlib.sha256()
+    if records and records.keys() == files.keys() and all(
+            len(rec) > 2 and files[rel] == (rec[1], rec[2]) for rel, rec in records.items()):
+        for rel in sorted(records):
+            crc, size = records[rel][0], records[rel][1]
+            h.update(f"{rel}\0{crc}\0{size}\n".encode('utf-8'))
+        return h.hexdigest()
+    for rel in sorted(files):
+        size, mtime = files[rel]
+        h.update(f"{rel}\0{size}\0{mtime}\n".encode('utf-8'))
+    return h.hexdigest()
@@ -0,0 +1,202 @@
+# src/readiness.py
+
+import logging
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Startup phases, in the order a healthy gateway reaches them
+PHASE_CONTAINER = 'container running'
+PHASE_LISTENING = 'HTTP listening'
+PHASE_PING = 'Ping OK'
+PHASE_RUNNING = 'gateway RUNNING'
+PHASES = (PHASE_CONTAINER, PHASE_LISTENING, PHASE_PING, PHASE_RUNNING)
+
+DEFAULT_DEADLINE = 300.0
+PING_PATH = '/main/system/status/Ping'
+STATUS_PATH = '/StatusPing'
+
+# Container states that mean the gateway will never come up on its own
+_DEAD_STATES = ('exited', 'dead', 'removing')
+
+
+@dataclass
+class PhaseMark:
+    phase: str
+    at: float          # seconds since the probe started
+
+
+@dataclass
+class ReadinessResult:
+    """
+    Outcome of a readiness probe plus the timeline of phases reached.
+    """
+    ready: bool
+    elapsed: float
+    phases: List[PhaseMark] = field(default_factory=list)
+    failure: Optional[str] = None
+
+    def reached(self, phase: str) -> Optional[float]:
+        for mark in self.phases:
+            if mark.phase == phase:
+                return mark.at
+        return None
+
+    def timeline(self) -> str:
+        """
+        One line per phase, e.g. "HTTP listening   +41.2s", pending ones marked.
+        """
+        lines = []
+        for phase in PHASES:
+            at = self.reached(phase)
+            lines.append(f"{phase:<18} {'+%.1fs' % at if at is not None else '…'}")
+        if self.failure:
+            lines.append(f"failed: {self.failure}")
+        return '\n'.join(lines)
+
+
+class ReadinessProbe:
+    """
+    Waits for an Ignition gateway to become usable.
+
+    Reuses one pooled HTTP session, backs off adaptively (resetting the
+    delay whenever a new phase is reached), honours a configurable
+    deadline and, when `container_info` is given, fails fast if the
+    container has stopped.
+    """
+
+    def __init__(
+        self,
+        port: int,
+        host: str = 'localhost',
+        deadline: float = DEFAULT_DEADLINE,
+        container_info: Optional[Callable[[], dict]] = None,
+        on_phase: Optional[Callable[[PhaseMark], None]] = None,
+        initial_delay: float = 0.25,
+        max_delay: float = 5.0,
+        container_check_interval: float = 2.0,
+        dead_grace: float = 15.0,
+    ):
+        self.port = port
+        self.host = host
+        self.deadline = deadline
+        self.container_info = container_info
+        self.on_phase = on_phase
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.container_check_interval = container_check_interval
+        # A stale stopped container may linger until compose recreates it
+        self.dead_grace = dead_grace
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0)
+        self.session.mount('http://', adapter)
+
+    def _url(self, path: str) -> str:
+        return f'http://{self.host}:{self.port}{path}'
+
+    def _listening(self) -> bool:
+        try:
+            with socket.create_connection((self.host, self.port), timeout=1):
+                return True
+        except OSError:
+            return False
+
+    def _ping_ok(self) -> bool:
+        try:
+            return self.session.get(self._url(PING_PATH), timeout=2).status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _gateway_running(self) -> bool:
+        try:
+            r = self.session.get(self._url(STATUS_PATH), timeout=2)
+            if r.status_code != 200:
+                return False
+            return str(r.json().get('state', '')).upper() == 'RUNNING'
+        except (requests.RequestException, ValueError):
+            return False
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> ReadinessResult:
+        start = time.monotonic()
+        result = ReadinessResult(ready=False, elapsed=0.0)
+        reached = set()
+        delay = self.initial_delay
+        next_container_check = 0.0
+
+        def mark(phase: str) -> None:
+            if phase in reached:
+                return
+            reached.add(phase)
+            m = PhaseMark(phase, time.monotonic() - start)
+            result.phases.append(m)
+            logger.info("Gateway on port %s: %s after %.1fs", self.port, phase, m.at)
+            if self.on_phase:
+                self.on_phase(m)
+
+        try:
+            while True:
+                now = time.monotonic()
+                if now - start > self.deadline:
+                    result.failure = f"deadline of {self.deadline:.0f}s exceeded"
+                    break
+                if stop_event is not None and stop_event.is_set():
+                    result.failure = 'cancelled'
+                    break
+                progressed = False
+
+                if self.container_info and now >= next_container_check:
+                    next_container_check = now + self.container_check_interval
+                    try:
+                        info = self.container_info()
+                    except Exception as e:
+                        logger.debug("Container state check failed: %s", e)
+                        info = None
+                    if info:
+                        state = str(info.get('state'))
+                        seen_up = PHASE_CONTAINER in reached or now - start > self.dead_grace
+                        if state in _DEAD_STATES and seen_up:
+                            result.failure = (
+                                f"container {state} (exit code {info.get('exit_code')})"
+                            )
+                            break
+                        if state == 'running' and PHASE_CONTAINER not in reached:
+                            mark(PHASE_CONTAINER)
+                            progressed = True
+                elif not self.container_info and PHASE_CONTAINER not in reached:
+                    # Nothing to ask; treat the container as up
+                    mark(PHASE_CONTAINER)
+
+                if PHASE_LISTENING not in reached and self._listening():
+                    mark(PHASE_LISTENING)
+                    progressed = True
+                if PHASE_LISTENING in reached and PHASE_PING not in reached and self._ping_ok():
+                    mark(PHASE_PING)
+                    progressed = True
+                if PHASE_LISTENING in reached and self._gateway_running():
+                    # A gateway answering RUNNING has necessarily passed the earlier phases
+                    mark(PHASE_CONTAINER)
+                    mark(PHASE_PING)
+                    mark(PHASE_RUNNING)
+                    result.ready = True
+                    break
+
+                delay = self.initial_delay if progressed else min(delay * 1.5, self.max_delay)
+                remaining = self.deadline - (time.monotonic() - start)
+                wait = max(0.0, min(delay, remaining))
+                if stop_event is not None:
+                    stop_event.wait(wait)
+                else:
+                    time.sleep(wait)
+        finally:
+            self.session.close()
+
+        result.phases.sort(key=lambda m: m.at)
+        result.elapsed = time.monotonic() - start
+        return result
@@ -0,0 +1,139 @@
+# src/sizing.py
+"""
+Automatic heap and container limits for gateways.
+
+The heap a gateway wants grows with its project (resource count) and its
+tags (tags plus UDT members); what it may have is the host's RAM, less a
+reserve for the OS and Docker, split between the gateways sharing the
+host. The container limit is the heap plus the JVM's off-heap memory, and
+CPUs are split evenly once several gateways run.
+"""
+
+import ctypes
+import logging
+import math
+import os
+import sys
+from typing import Optional
+
+from models import Project, Resources, TagFile
+
+logger = logging.getLogger(__name__)
+
+# Left to the OS, Docker and the panel
+HOST_RESERVE_MB = 2048
+# Used when the host's RAM cannot be read
+DEFAULT_HOST_MB = 8192
+
+# An empty gateway with the default modules (Ignition 8.1 default max heap)
+BASE_HEAP_MB = 2048
+MIN_HEAP_MB = 512
+MAX_HEAP_MB = 16384
+PROJECT_HEAP_MB_PER_1000_RESOURCES = 128
+TAG_HEAP_MB_PER_10000_TAGS = 64
+# Metaspace, thread stacks and direct buffers outside the heap
+MIN_OFF_HEAP_MB = 512
+STEP_MB = 256
+
+
+def host_memory_mb() -> Optional[int]:
+    """
+    Physical memory of this machine, or None when it cannot be read.
+    """
+    try:
+        if sys.platform == 'win32':
+            class _MemoryStatus(ctypes.Structure):
+                _fields_ = [
+                    ('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                    ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                    ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                    ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                    ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+                ]
+            status = _MemoryStatus()
+            status.dwLength = ctypes.sizeof(status)
+            if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return None
+            return status.ullTotalPhys // (1024 * 1024)
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def host_cpus() -> int:
+    return os.cpu_count() or 1
+
+
+def describe_host() -> str:
+    memory = host_memory_mb()
+    ram = f"{memory / 1024:.1f} GB RAM" if memory else "unknown RAM"
+    return f"{host_cpus()} cores, {ram}"
+
+
+def _floor_step(mb: float) -> int:
+    return int(mb // STEP_MB) * STEP_MB
+
+
+def _ceil_step(mb: float) -> int:
+    return int(math.ceil(mb / STEP_MB)) * STEP_MB
+
+
+def _off_heap_mb(heap_mb: int) -> int:
+    return max(MIN_OFF_HEAP_MB, heap_mb // 4)
+
+
+def auto_resources(
+    project: Optional[Project] = None,
+    tag_file: Optional[TagFile] = None,
+    gateways: int = 1,
+    memory_mb: Optional[int] = None,
+    cpus: Optional[int] = None,
+) -> Resources:
+    """
+    Size one of `gateways` gateways sharing this host (or one with
+    `memory_mb` / `cpus`), rounded to 256 MB and half CPUs. The values
+    are not part of the config fingerprint: a reused container keeps the
+    limits it was created with until it is recreated for another reason.
+    """
+    gateways = max(1, gateways)
+    memory_mb = memory_mb or host_memory_mb() or DEFAULT_HOST_MB
+    cpus = cpus or host_cpus()
+
+    demand = BASE_HEAP_MB
+    load = []
+    if project is not None:
+        resources = project.inventory().resources
+        demand += math.ceil(resources / 1000) * PROJECT_HEAP_MB_PER_1000_RESOURCES
+        load.append(f"{resources:,} resources")
+    if tag_file is not None:
+        inv = tag_file.inventory()
+        tags = inv.tags + inv.udt_members
+        demand += math.ceil(tags / 10_000) * TAG_HEAP_MB_PER_10000_TAGS
+        load.append(f"{tags:,} tags")
+
+    # Heap plus off-heap (max(512 MB, heap / 4)) must fit each gateway's share
+    share = (memory_mb - HOST_RESERVE_MB) / gateways
+    cap = min(share - MIN_OFF_HEAP_MB, share * 4 / 5)
+    heap_max = _floor_step(min(demand, cap, MAX_HEAP_MB))
+    if heap_max < MIN_HEAP_MB:
+        logger.warning(
+            "%d gateway(s) leave %d MB each on a %d MB host; using the %d MB minimum heap",
+            gateways, int(share), memory_mb, MIN_HEAP_MB,
+        )
+        heap_max = MIN_HEAP_MB
+    elif heap_max < demand:
+        logger.warning("Heap capped at %d MB by host memory (%d MB wanted)", heap_max, demand)
+    heap_init = max(MIN_HEAP_MB, _floor_step(heap_max / 2))
+
+    basis = f"{cpus} cores, {memory_mb / 1024:.1f} GB RAM, {gateways} gateway(s)"
+    if load:
+        basis += "; " + ", ".join(load)
+    return Resources(
+        heap_init_mb=heap_init,
+        heap_max_mb=heap_max,
+        mem_limit_mb=_ceil_step(heap_max + _off_heap_mb(heap_max)),
+        # A lone gateway may use the whole machine
+        cpus=max(1.0, math.floor(cpus / gateways * 2) / 2) if gateways > 1 else None,
+        auto=True,
+        basis=basis,
+    )
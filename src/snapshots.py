@@ -0,0 +1,200 @@
+# src/snapshots.py
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Directories
+BASE_DIR = Path(__file__).resolve().parent.parent
+SNAPSHOTS_DIR = BASE_DIR / 'snapshots'
+
+ARCHIVE_SUFFIX = '.tar.gz'
+META_SUFFIX = '.json'
+
+
+def snapshot_key(backup_hash: str, image: str) -> str:
+    """
+    Snapshots are only valid for the exact backup content and gateway image.
+    """
+    return hashlib.sha256(f"{backup_hash}\0{image}".encode('utf-8')).hexdigest()[:24]
+
+
+@dataclass
+class SnapshotInfo:
+    key: str
+    backup_hash: str
+    backup_name: str
+    image: str
+    created: float
+    last_used: float
+    size: int
+    path: Path
+    # Content hash of the tag export the gateway had imported when captured
+    tag_hash: Optional[str] = None
+
+    def to_json(self) -> dict:
+        data = asdict(self)
+        data['path'] = str(self.path)
+        return data
+
+
+class SnapshotStore:
+    """
+    Warm copies of a gateway's `ign-data` volume taken right after a
+    backup restore, keyed by backup content hash + Ignition image, so later
+    launches can seed a fresh volume instead of replaying the .gwbk.
+
+    Layout: <root>/<key>.tar.gz plus <key>.json metadata.
+    """
+
+    def __init__(self, root: Path = SNAPSHOTS_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def archive_path(self, key: str) -> Path:
+        return self.root / f"{key}{ARCHIVE_SUFFIX}"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.root / f"{key}{META_SUFFIX}"
+
+    def _read(self, key: str) -> Optional[SnapshotInfo]:
+        archive = self.archive_path(key)
+        try:
+            meta = json.loads(self._meta_path(key).read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return None
+        if not archive.is_file():
+            return None
+        return SnapshotInfo(
+            key=key,
+            backup_hash=meta['backup_hash'],
+            backup_name=meta.get('backup_name', ''),
+            image=meta['image'],
+            created=meta.get('created', 0.0),
+            last_used=meta.get('last_used', meta.get('created', 0.0)),
+            size=archive.stat().st_size,
+            path=archive,
+            tag_hash=meta.get('tag_hash'),
+        )
+
+    def _write_meta(self, info: SnapshotInfo) -> None:
+        meta = info.to_json()
+        meta.pop('path')
+        meta.pop('size')
+        tmp = self._meta_path(info.key).with_suffix('.json.tmp')
+        tmp.write_text(json.dumps(meta, indent=2), encoding='utf-8')
+        os.replace(tmp, self._meta_path(info.key))
+
+    # --- public API -----------------------------------------------------
+
+    def find(self, backup_hash: str, image: str) -> Optional[SnapshotInfo]:
+        with self._lock:
+            return self._read(snapshot_key(backup_hash, image))
+
+    def staging_path(self, backup_hash: str, image: str) -> Path:
+        """
+        Where an export should write before `commit` publishes it.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        return self.root / f".{snapshot_key(backup_hash, image)}{ARCHIVE_SUFFIX}.partial"
+
+    def commit(
+        self, staged: Path, backup_hash: str, backup_name: str, image: str, tag_hash: Optional[str] = None,
+    ) -> SnapshotInfo:
+        """
+        Publish a finished export under its key. `tag_hash` records the
+        tags already imported, so later launches need only a delta.
+        """
+        key = snapshot_key(backup_hash, image)
+        now = time.time()
+        with self._lock:
+            os.replace(staged, self.archive_path(key))
+            info = SnapshotInfo(
+                key=key, backup_hash=backup_hash, backup_name=backup_name, image=image,
+                created=now, last_used=now, size=self.archive_path(key).stat().st_size,
+                path=self.archive_path(key), tag_hash=tag_hash,
+            )
+            self._write_meta(info)
+        logger.info("Saved snapshot %s for %s on %s (%d bytes)", key, backup_name, image, info.size)
+        return info
+
+    def touch(self, info: SnapshotInfo) -> None:
+        """
+        Record that a snapshot was used to seed a gateway (for LRU pruning).
+        """
+        with self._lock:
+            info.last_used = time.time()
+            self._write_meta(info)
+
+    def list(self) -> List[SnapshotInfo]:
+        with self._lock:
+            if not self.root.is_dir():
+                return []
+            found = []
+            for meta in self.root.glob(f"*{META_SUFFIX}"):
+                info = self._read(meta.name[:-len(META_SUFFIX)])
+                if info:
+                    found.append(info)
+        return sorted(found, key=lambda i: i.last_used, reverse=True)
+
+    def _delete(self, info: SnapshotInfo) -> None:
+        for p in (info.path, self._meta_path(info.key)):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+        logger.info("Removed snapshot %s (%s, %s)", info.key, info.backup_name, info.image)
+
+    def invalidate(self, backup_hash: Optional[str] = None, image: Optional[str] = None) -> int:
+        """
+        Delete snapshots for a backup and/or image (all of them if neither
+        is given). Returns how many were removed.
+        """
+        removed = 0
+        for info in self.list():
+            if backup_hash and info.backup_hash != backup_hash:
+                continue
+            if image and info.image != image:
+                continue
+            with self._lock:
+                self._delete(info)
+            removed += 1
+        return removed
+
+    def prune(self, max_age_days: Optional[float] = None, max_total_bytes: Optional[int] = None) -> int:
+        """
+        Drop snapshots unused for `max_age_days`, then the least recently
+        used ones until the total size fits `max_total_bytes`.
+        """
+        removed = 0
+        now = time.time()
+        keep = []
+        for info in self.list():
+            if max_age_days is not None and now - info.last_used > max_age_days * 86400:
+                with self._lock:
+                    self._delete(info)
+                removed += 1
+            else:
+                keep.append(info)
+        if max_total_bytes is not None:
+            total = sum(i.size for i in keep)
+            # list() is most-recent first; evict from the tail
+            while keep and total > max_total_bytes:
+                victim = keep.pop()
+                total -= victim.size
+                with self._lock:
+                    self._delete(victim)
+                removed += 1
+        # Leftovers from interrupted exports
+        for partial in self.root.glob('.*.partial') if self.root.is_dir() else []:
+            if now - partial.stat().st_mtime > 3600:
+                partial.unlink()
+        return removed
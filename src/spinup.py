@@ -0,0 +1,354 @@
+# src/spinup.py
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import perf
+from compose_generator import RenderResult, build_config, render_all
+from content_store import store_for
+from errors import AppError, SpinUpCancelled
+from fleet import replica_names
+from gateway import DEFAULT_GATEWAY, running_gateways
+from images import ImageCache, split_reference
+from models import ComposeConfig, Project, TagFile
+from project_sync import ProjectChangeset
+from snapshots import SnapshotInfo, SnapshotStore
+from utils import (
+    PROJECTS_DIR, TAGS_DIR, import_project, is_port_free, save_backup, save_tag_file, slugify,
+)
+
+logger = logging.getLogger(__name__)
+
+# Stage states reported through on_stage
+STAGE_RUNNING = 'running'
+STAGE_DONE = 'done'
+STAGE_FAILED = 'failed'
+STAGE_CANCELLED = 'cancelled'
+STAGE_SKIPPED = 'skipped'
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[['StageContext'], Any]
+    deps: Sequence[str] = ()
+
+
+class StageContext:
+    """
+    What a running stage sees: results of the stages it depends on, a way
+    to report progress and log lines, and the shared cancellation flag.
+    """
+
+    def __init__(self, pipeline: 'Pipeline', stage: Stage):
+        self._pipeline = pipeline
+        self.stage = stage
+
+    def result(self, name: str) -> Any:
+        return self._pipeline.results[name]
+
+    @property
+    def cancelled(self) -> threading.Event:
+        return self._pipeline.cancelled
+
+    def check(self) -> None:
+        """
+        Raise SpinUpCancelled if the pipeline was cancelled.
+        """
+        if self._pipeline.cancelled.is_set():
+            raise SpinUpCancelled(f"Stage '{self.stage.name}' cancelled")
+
+    def progress(self, done: int, total: int) -> None:
+        self.check()
+        if self._pipeline.on_progress:
+            self._pipeline.on_progress(self.stage.name, done, total)
+
+    def log(self, line: str) -> None:
+        if self._pipeline.on_log:
+            self._pipeline.on_log(line)
+
+
+class Pipeline:
+    """
+    Runs stages on a worker pool as soon as their dependencies have
+    finished, so independent I/O overlaps and only real dependencies wait.
+
+    The first failure (or `cancel()`) stops new stages from being
+    scheduled; stages already running are waited for, and the ones never
+    started are reported as skipped. `run()` re-raises the failure.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        max_workers: int = 4,
+        on_stage: Optional[Callable[[str, str, float], None]] = None,
+        on_progress: Optional[Callable[[str, int, int], None]] = None,
+        on_log: Optional[Callable[[str], None]] = None,
+    ):
+        names = [s.name for s in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Stage names must be unique")
+        for s in stages:
+            missing = [d for d in s.deps if d not in names]
+            if missing:
+                raise ValueError(f"Stage '{s.name}' depends on unknown stage(s) {missing}")
+        self.stages = stages
+        self.max_workers = max_workers
+        self.on_stage = on_stage
+        self.on_progress = on_progress
+        self.on_log = on_log
+        self.cancelled = threading.Event()
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def _emit(self, name: str, state: str, elapsed: float = 0.0) -> None:
+        logger.debug("Stage %s %s (%.2fs)", name, state, elapsed)
+        if self.on_stage:
+            self.on_stage(name, state, elapsed)
+
+    def _run_stage(self, stage: Stage) -> Any:
+        ctx = StageContext(self, stage)
+        ctx.check()
+        self._emit(stage.name, STAGE_RUNNING)
+        with perf.span(f"stage.{stage.name}"):
+            return stage.run(ctx)
+
+    def run(self) -> Dict[str, Any]:
+        pending = {s.name: s for s in self.stages}
+        running: Dict[Any, Stage] = {}
+        started: Dict[str, float] = {}
+        failure: Optional[BaseException] = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='spinup') as pool:
+            while True:
+                if failure is None and not self.cancelled.is_set():
+                    for name, stage in list(pending.items()):
+                        if all(d in self.results for d in stage.deps):
+                            del pending[name]
+                            started[name] = time.monotonic()
+                            running[pool.submit(self._run_stage, stage)] = stage
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    stage = running.pop(fut)
+                    elapsed = time.monotonic() - started[stage.name]
+                    self.timings[stage.name] = elapsed
+                    try:
+                        self.results[stage.name] = fut.result()
+                        self._emit(stage.name, STAGE_DONE, elapsed)
+                    except SpinUpCancelled as e:
+                        self._emit(stage.name, STAGE_CANCELLED, elapsed)
+                        failure = failure or e
+                    except Exception as e:
+                        logger.exception("Spin-up stage '%s' failed", stage.name)
+                        self._emit(stage.name, STAGE_FAILED, elapsed)
+                        failure = failure or e
+                        # Let sibling stages notice and bail out early
+                        self.cancelled.set()
+
+        for name in pending:
+            self._emit(name, STAGE_SKIPPED)
+        if failure is not None:
+            raise failure
+        if self.cancelled.is_set():
+            raise SpinUpCancelled("Spin-up cancelled")
+        if pending:
+            raise AppError(f"Stages could not be scheduled: {', '.join(pending)}")
+        return self.results
+
+
+# --- gateway spin-up -------------------------------------------------------
+
+@dataclass
+class SpinUpRequest:
+    """
+    Everything a spin-up needs, captured from the UI (or CLI) up front so
+    stages never touch widgets.
+    """
+    raw: Dict[str, str]
+    http_port: int
+    backup_src: Optional[str] = None
+    project_src: Optional[str] = None
+    tag_src: Optional[str] = None
+    use_snapshots: bool = False
+    # HTTP port of this gateway's last spin-up: may still be held by its own
+    # container, which the plan then reuses or updates
+    own_port: Optional[int] = None
+    # Fleets render per instance themselves
+    render: bool = True
+    out_dir: Optional[Path] = None
+
+
+@dataclass
+class PreparedGateway:
+    config: ComposeConfig
+    rendered: Optional[RenderResult] = None
+    snapshot: Optional[SnapshotInfo] = None
+    project_changes: Optional[ProjectChangeset] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def wait_for_image(ctx: StageContext, images: ImageCache, image: str) -> str:
+    """
+    Wait for a (possibly already running) background pull, checking for
+    cancellation while it progresses. The pull itself keeps going.
+    """
+    fut = images.ensure(image, on_line=lambda line: ctx.log(f"[pull] {line}"))
+    while True:
+        ctx.check()
+        try:
+            return fut.result(timeout=0.25)
+        except FutureTimeout:
+            continue
+
+
+def spinup_stages(
+    request: SpinUpRequest,
+    images: ImageCache,
+    snapshots: Optional[SnapshotStore] = None,
+) -> List[Stage]:
+    """
+    The spin-up dependency graph:
+
+        backup ──┐
+        project ─┤
+        tags ────┼─ config ─┐
+        share ───┘          ├─ pin ─ snapshot ─┐
+        image ──────────────┘                  ├─ render
+        port ──────────────────────────────────┘
+    """
+    raw = dict(request.raw)
+
+    def _port(ctx: StageContext) -> int:
+        if request.http_port != request.own_port and not is_port_free(request.http_port):
+            raise AppError(f"Host port {request.http_port} is already in use.")
+        return request.http_port
+
+    def _image(ctx: StageContext) -> str:
+        return wait_for_image(ctx, images, raw['image'])
+
+    def _share(ctx: StageContext) -> int:
+        # Gateways that will share the host: this launch plus the other running ones
+        count = int(raw.get('gateways') or 1)
+        if (raw.get('resources') or 'auto') != 'auto':
+            return count
+        if count > 1:
+            own = replica_names(raw.get('gateway_name', ''), count)
+        else:
+            own = [slugify(raw.get('container_name') or DEFAULT_GATEWAY)]
+        others = running_gateways(exclude=own)
+        if others:
+            ctx.log(f"Sizing for {count + len(others)} gateways (also running: {', '.join(others)})")
+        return count + len(others)
+
+    def _backup(ctx: StageContext) -> Optional[str]:
+        if raw.get('mode') != 'backup':
+            return None
+        return save_backup(request.backup_src or '')
+
+    def _project(ctx: StageContext) -> Optional[tuple]:
+        if not request.project_src:
+            return None
+        name, changes = import_project(request.project_src, on_progress=ctx.progress)
+        ctx.log(f"Project '{name}' synced: {changes.summary()}")
+        # From the sync record, updated for just the changed files; config validation hits the cache
+        project = Project(name=name, path=PROJECTS_DIR / name)
+        ctx.log(f"Project '{name}': {project.inventory().summary()}")
+        return name, changes
+
+    def _tags(ctx: StageContext) -> Optional[str]:
+        if not request.tag_src:
+            return None
+        name = save_tag_file(request.tag_src)
+        # Parsed here, in parallel with the other stages; config validation hits the cache
+        tag_file = TagFile(name=name, path=store_for(TAGS_DIR).resolve(name))
+        ctx.log(f"Tag export '{name}': {tag_file.inventory().summary()}")
+        return name
+
+    def _config(ctx: StageContext) -> ComposeConfig:
+        cfg_raw = dict(raw)
+        if ctx.result('backup'):
+            cfg_raw['backup_name'] = ctx.result('backup')
+        if ctx.result('project'):
+            cfg_raw['project_name'] = ctx.result('project')[0]
+        if ctx.result('tags'):
+            cfg_raw['tag_name'] = ctx.result('tags')
+        cfg_raw['gateways'] = str(ctx.result('share'))
+        cfg = build_config(cfg_raw)
+        ctx.log(f"Resources: {cfg.resources.describe()}")
+        return cfg
+
+    def _pin(ctx: StageContext) -> ComposeConfig:
+        cfg = ctx.result('config')
+        pinned = ctx.result('image')
+        cfg.image_digest = split_reference(pinned)[2]
+        ctx.log(f"📌 Using {pinned}")
+        return cfg
+
+    def _snapshot(ctx: StageContext) -> Optional[SnapshotInfo]:
+        cfg = ctx.result('pin')
+        if not (request.use_snapshots and snapshots and cfg.mode == 'backup' and cfg.backup):
+            return None
+        snapshot = snapshots.find(cfg.backup.content_hash(), cfg.image_ref)
+        cfg.restore_from_snapshot = snapshot is not None
+        if snapshot:
+            ctx.log(f"❄ Found warm snapshot {snapshot.key} of {snapshot.backup_name}; skipping backup restore.")
+        return snapshot
+
+    def _render(ctx: StageContext) -> Optional[RenderResult]:
+        if not request.render:
+            return None
+        rendered = render_all(ctx.result('pin'), request.out_dir)
+        state = "updated" if rendered.changed else "unchanged"
+        ctx.log(f"Generated compose file: {rendered.compose_path} ({state})")
+        ctx.log(f"Generated env file: {rendered.env_path} ({state})")
+        return rendered
+
+    return [
+        Stage('port', _port),
+        Stage('image', _image),
+        Stage('backup', _backup),
+        Stage('project', _project),
+        Stage('tags', _tags),
+        Stage('share', _share),
+        Stage('config', _config, deps=('backup', 'project', 'tags', 'share')),
+        Stage('pin', _pin, deps=('config', 'image')),
+        Stage('snapshot', _snapshot, deps=('pin',)),
+        Stage('render', _render, deps=('pin', 'snapshot', 'port')),
+    ]
+
+
+def prepare_gateway(
+    request: SpinUpRequest,
+    images: ImageCache,
+    snapshots: Optional[SnapshotStore] = None,
+    pipeline_hook: Optional[Callable[[Pipeline], None]] = None,
+    **callbacks,
+) -> PreparedGateway:
+    """
+    Run the spin-up stages and collect what compose needs. `callbacks` are
+    passed to Pipeline (on_stage, on_progress, on_log); `pipeline_hook`
+    receives the pipeline before it starts, e.g. to keep it for cancel().
+    """
+    pipeline = Pipeline(spinup_stages(request, images, snapshots), **callbacks)
+    if pipeline_hook:
+        pipeline_hook(pipeline)
+    results = pipeline.run()
+    project = results.get('project')
+    return PreparedGateway(
+        config=results['pin'],
+        rendered=results.get('render'),
+        snapshot=results.get('snapshot'),
+        project_changes=project[1] if project else None,
+        timings=dict(pipeline.timings),
+    )
@@ -0,0 +1,471 @@
+# src/tag_diff.py
+"""
+Differences between two tag exports, for incremental re-imports.
+
+Both exports are streamed into a scratch SQLite database, one row per tag
+(path, kind, content hash, definition), so memory stays bounded however
+many tags there are. UDT definitions and instances are compared as a
+whole, members included. `write_delta` then writes an export of the same
+format holding only the added and changed tags inside their folders, for
+a gateway that already has the old export. Removed tags are reported; an
+import cannot delete them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+import perf
+from errors import TagValidationError
+from tag_inventory import (
+    FOLDER_TYPES, PROVIDER_TYPES, UDT_DEF_TYPES, UDT_INSTANCE_TYPES, json_events, tag_format,
+)
+
+logger = logging.getLogger(__name__)
+
+# Written next to the gateway's compose file and mounted instead of the full export
+DELTA_NAME = 'delta-tags'
+
+KIND_FOLDER = 'folder'
+KIND_TAG = 'tag'
+KIND_UDT = 'udt'
+KIND_INSTANCE = 'instance'
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+_UDT_TYPES = UDT_DEF_TYPES | UDT_INSTANCE_TYPES
+_BATCH = 5000
+# Path separator in sort keys: sorts before any character a tag name can hold,
+# so a folder's descendants always follow it directly
+_SEP = '\x01'
+# (path, kind, definition)
+Record = Tuple[str, str, str]
+
+
+def _kind(tag_type: Optional[str]) -> str:
+    if tag_type in FOLDER_TYPES:
+        return KIND_FOLDER
+    if tag_type in UDT_DEF_TYPES:
+        return KIND_UDT
+    if tag_type in UDT_INSTANCE_TYPES:
+        return KIND_INSTANCE
+    return KIND_TAG
+
+
+def _tag_path(parents: Tuple[str, ...], name: object) -> str:
+    if not isinstance(name, str) or not name:
+        raise TagValidationError(f"Tag without a name under '{'/'.join(parents) or '(root)'}'")
+    return '/'.join(parents + (name,))
+
+
+# --- record extraction -----------------------------------------------------
+
+def _json_records(f: IO[bytes]) -> Iterator[Record]:
+    """
+    One record per tag, its definition being the tag object without its
+    "tags" children (kept for UDT definitions and instances). Nested
+    values are rebuilt from parse events one tag at a time.
+    """
+    # Frames: ['tag', fields, key, parents, is_root] | ['tags', parents]
+    #         ['map', dict, key] | ['list', list]
+    stack: list = []
+
+    def _put(top: list, value: object) -> None:
+        if top[0] == 'list':
+            top[1].append(value)
+        else:
+            top[1][top[2]] = value
+
+    for event, value in json_events(f):
+        top = stack[-1] if stack else None
+        if event == 'map_key':
+            top[2] = value
+        elif event == 'start_map':
+            if top is None:
+                stack.append(['tag', {}, None, (), True])
+            elif top[0] == 'tags':
+                stack.append(['tag', {}, None, top[1], False])
+            else:
+                nested: dict = {}
+                _put(top, nested)
+                stack.append(['map', nested, None])
+        elif event == 'end_map':
+            frame = stack.pop()
+            if frame[0] != 'tag':
+                continue
+            fields = frame[1]
+            tag_type = fields.get('tagType')
+            if frame[4] and tag_type in (None, *PROVIDER_TYPES):
+                continue
+            body = json.dumps(fields, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+            yield _tag_path(frame[3], fields.get('name')), _kind(tag_type), body
+        elif event == 'start_array':
+            if top is None:
+                stack.append(['tags', ()])
+            elif top[0] == 'tag' and top[2] == 'tags' and top[1].get('tagType') not in _UDT_TYPES:
+                fields = top[1]
+                if top[4] and fields.get('tagType') in (None, *PROVIDER_TYPES):
+                    stack.append(['tags', ()])
+                elif isinstance(fields.get('name'), str):
+                    stack.append(['tags', top[3] + (fields['name'],)])
+                else:
+                    raise TagValidationError(
+                        f"Tag under '{'/'.join(top[3]) or '(root)'}' lists its tags before its name"
+                    )
+            else:
+                items: list = []
+                _put(top, items)
+                stack.append(['list', items])
+        elif event == 'end_array':
+            stack.pop()
+        elif top is None:
+            raise TagValidationError("Not a tag export: top-level value is not an object or array")
+        elif top[0] == 'tags':
+            raise TagValidationError(f"Tag under '{'/'.join(top[1]) or '(root)'}' is not an object")
+        else:
+            _put(top, value)
+
+
+def _xml_canonical(elem: ET.Element, out: List[str]) -> None:
+    """
+    Serialize with sorted attributes and whitespace-trimmed text, so
+    formatting differences between exports do not count as changes.
+    """
+    attrs = ''.join(f' {k}={quoteattr(v)}' for k, v in sorted(elem.items()))
+    out.append(f'<{elem.tag}{attrs}>')
+    text = (elem.text or '').strip()
+    if text:
+        out.append(escape(text))
+    for child in elem:
+        _xml_canonical(child, out)
+        tail = (child.tail or '').strip()
+        if tail:
+            out.append(escape(tail))
+    out.append(f'</{elem.tag}>')
+
+
+def _xml_records(f: IO[bytes]) -> Iterator[Record]:
+    """
+    One record per <Tag>, its definition being the normalized XML of the
+    element without its child <Tags> (kept for UDT definitions and
+    instances). Recorded elements are detached to keep memory bounded.
+    """
+    elements: List[ET.Element] = []
+    tags: List[Tuple[str, str]] = []
+    root_seen = False
+    try:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if not root_seen:
+                    root_seen = True
+                    if elem.tag not in ('Tags', 'Tag'):
+                        raise TagValidationError(f"Not a tag export: root element is <{elem.tag}>")
+                if elem.tag == 'Tag':
+                    tags.append((elem.get('name') or '', elem.get('type') or ''))
+                elements.append(elem)
+                continue
+            elements.pop()
+            if elem.tag != 'Tag':
+                continue
+            name, tag_type = tags.pop()
+            if any(t in _UDT_TYPES for _, t in tags):
+                # A member: part of its UDT's definition
+                continue
+            if tag_type in PROVIDER_TYPES:
+                continue
+            parents = tuple(n for n, t in tags if t not in PROVIDER_TYPES)
+            path = _tag_path(parents, name)
+            kind = _kind(tag_type)
+            if kind not in (KIND_UDT, KIND_INSTANCE):
+                for child in [c for c in elem if c.tag == 'Tags']:
+                    elem.remove(child)
+            out: List[str] = []
+            _xml_canonical(elem, out)
+            yield path, kind, ''.join(out)
+            if elements:
+                elements[-1].remove(elem)
+    except ET.ParseError as e:
+        line, column = e.position
+        raise TagValidationError(f"Invalid XML at line {line}, column {column}", underlying=e)
+    if not root_seen:
+        raise TagValidationError("Empty tag export")
+
+
+def _records(path: Path, fmt: str) -> Iterator[Record]:
+    with open(path, 'rb') as f:
+        yield from (_json_records if fmt == 'json' else _xml_records)(f)
+
+
+# --- delta writers -----------------------------------------------------------
+
+class _JsonDelta:
+    def __init__(self, out: IO[str]):
+        self.out = out
+        # Items written so far in each open "tags" array
+        self.counts = [0]
+
+    def _item(self) -> None:
+        if self.counts[-1]:
+            self.out.write(',')
+        self.counts[-1] += 1
+
+    def begin(self) -> None:
+        self.out.write('{"tags":[')
+
+    def open_wrapper(self, name: str) -> None:
+        self._item()
+        self.out.write(f'{{"name":{json.dumps(name, ensure_ascii=False)},"tagType":"Folder","tags":[')
+        self.counts.append(0)
+
+    def open_folder(self, body: str) -> None:
+        self._item()
+        self.out.write(body[:-1] + ',"tags":[')
+        self.counts.append(0)
+
+    def leaf(self, body: str) -> None:
+        self._item()
+        self.out.write(body)
+
+    def close(self) -> None:
+        self.out.write(']}')
+        self.counts.pop()
+
+    def end(self) -> None:
+        self.out.write(']}\n')
+
+
+class _XmlDelta:
+    def __init__(self, out: IO[str]):
+        self.out = out
+
+    def begin(self) -> None:
+        self.out.write('<?xml version="1.0" encoding="UTF-8"?>\n<Tags>')
+
+    def open_wrapper(self, name: str) -> None:
+        self.out.write(f'<Tag name={quoteattr(name)} type="Folder"><Tags>')
+
+    def open_folder(self, body: str) -> None:
+        self.out.write(body[:-len('</Tag>')] + '<Tags>')
+
+    def leaf(self, body: str) -> None:
+        self.out.write(body)
+
+    def close(self) -> None:
+        self.out.write('</Tags></Tag>')
+
+    def end(self) -> None:
+        self.out.write('</Tags>\n')
+
+
+def _write_export(dest: Path, fmt: str, rows: Iterator[Tuple[str, str, str]]) -> int:
+    """
+    Write (sort key, kind, definition) rows, sorted by key, as a nested
+    export. Folders a row needs but that are not rows themselves get a
+    bare wrapper. Returns the number of rows written.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    written = 0
+    with open(tmp, 'w', encoding='utf-8') as out:
+        writer = _JsonDelta(out) if fmt == 'json' else _XmlDelta(out)
+        writer.begin()
+        open_folders: List[str] = []
+        for key, kind, body in rows:
+            parts = key.split(_SEP)
+            parents = parts[:-1]
+            common = 0
+            while common < min(len(open_folders), len(parents)) and open_folders[common] == parents[common]:
+                common += 1
+            while len(open_folders) > common:
+                writer.close()
+                open_folders.pop()
+            for name in parents[common:]:
+                writer.open_wrapper(name)
+                open_folders.append(name)
+            if kind == KIND_FOLDER:
+                writer.open_folder(body)
+                open_folders.append(parts[-1])
+            else:
+                writer.leaf(body)
+            written += 1
+        for _ in open_folders:
+            writer.close()
+        writer.end()
+    os.replace(tmp, dest)
+    return written
+
+
+def write_empty_delta(dest: Path, fmt: str) -> Path:
+    """
+    A valid export with no tags, for a gateway that already has them all.
+    """
+    _write_export(dest, fmt, iter(()))
+    return dest
+
+
+# --- diff --------------------------------------------------------------------
+
+@dataclass
+class DiffSummary:
+    """
+    Counts by kind ('folder', 'tag', 'udt', 'instance') per outcome.
+    """
+    added: Dict[str, int] = field(default_factory=dict)
+    removed: Dict[str, int] = field(default_factory=dict)
+    changed: Dict[str, int] = field(default_factory=dict)
+    unchanged: int = 0
+
+    @property
+    def changes(self) -> int:
+        return sum(self.added.values()) + sum(self.removed.values()) + sum(self.changed.values())
+
+    def describe(self) -> str:
+        def _part(label: str, counts: Dict[str, int]) -> str:
+            total = sum(counts.values())
+            udts = counts.get(KIND_UDT, 0)
+            return f"{total:,} {label}" + (f" ({udts:,} UDTs)" if udts else "")
+        return ", ".join([
+            _part("added", self.added), _part("changed", self.changed),
+            _part("removed", self.removed), f"{self.unchanged:,} unchanged",
+        ])
+
+
+@dataclass
+class TagChange:
+    path: str
+    kind: str
+    status: str
+
+
+class TagDiff:
+    """
+    Compare two exports of the same format. Use as a context manager; the
+    scratch database is deleted on close.
+    """
+
+    def __init__(self, old: Path, new: Path, fmt: Optional[str] = None, work_dir: Optional[Path] = None):
+        self.old = Path(old)
+        self.new = Path(new)
+        # The old export may be a content-store blob without an extension
+        self.format = fmt or tag_format(self.new)
+        fd, name = tempfile.mkstemp(prefix='tag-diff-', suffix='.sqlite', dir=work_dir)
+        os.close(fd)
+        self._db_path = Path(name)
+        self._db = sqlite3.connect(name)
+        try:
+            self._db.executescript("""
+                PRAGMA journal_mode = OFF;
+                PRAGMA synchronous = OFF;
+                CREATE TABLE rec (
+                    side INTEGER NOT NULL,
+                    key  TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    hash BLOB NOT NULL,
+                    body TEXT,
+                    PRIMARY KEY (side, key)
+                ) WITHOUT ROWID;
+            """)
+            with perf.span('tags.diff', format=self.format) as attrs:
+                attrs['old'] = self._load(0, self.old)
+                attrs['new'] = self._load(1, self.new)
+                self.summary = self._summarize()
+        except BaseException:
+            self.close()
+            raise
+        logger.info("Tag diff %s -> %s: %s", self.old.name, self.new.name, self.summary.describe())
+
+    def __enter__(self) -> 'TagDiff':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+            self._db_path.unlink(missing_ok=True)
+
+    def _load(self, side: int, path: Path) -> int:
+        # Only the new side's definitions are needed, for the delta
+        keep_body = side == 1
+        sql = "INSERT OR REPLACE INTO rec VALUES (?, ?, ?, ?, ?)"
+        batch = []
+        count = 0
+        try:
+            for tag_path, kind, body in _records(path, self.format):
+                data = body.encode('utf-8')
+                batch.append((
+                    side, tag_path.replace('/', _SEP), kind,
+                    hashlib.blake2b(data, digest_size=16).digest(), body if keep_body else None,
+                ))
+                if len(batch) >= _BATCH:
+                    self._db.executemany(sql, batch)
+                    count += len(batch)
+                    batch.clear()
+        except UnicodeDecodeError as e:
+            raise TagValidationError(f"Tag export {path.name} is not UTF-8 text", underlying=e)
+        except TagValidationError as e:
+            raise TagValidationError(f"{path.name}: {e}") from e
+        self._db.executemany(sql, batch)
+        self._db.commit()
+        return count + len(batch)
+
+    _QUERIES = {
+        ADDED: """
+            SELECT n.key, n.kind FROM rec n LEFT JOIN rec o ON o.side = 0 AND o.key = n.key
+            WHERE n.side = 1 AND o.key IS NULL
+        """,
+        REMOVED: """
+            SELECT o.key, o.kind FROM rec o LEFT JOIN rec n ON n.side = 1 AND n.key = o.key
+            WHERE o.side = 0 AND n.key IS NULL
+        """,
+        CHANGED: """
+            SELECT n.key, n.kind FROM rec n JOIN rec o ON o.side = 0 AND o.key = n.key
+            WHERE n.side = 1 AND o.hash != n.hash
+        """,
+    }
+
+    def _summarize(self) -> DiffSummary:
+        summary = DiffSummary()
+        for status, query in self._QUERIES.items():
+            counts = getattr(summary, status)
+            for kind, n in self._db.execute(f"SELECT kind, count(*) FROM ({query}) GROUP BY kind"):
+                counts[kind] = n
+        summary.unchanged = self._db.execute("""
+            SELECT count(*) FROM rec n JOIN rec o ON o.side = 0 AND o.key = n.key
+            WHERE n.side = 1 AND o.hash = n.hash
+        """).fetchone()[0]
+        return summary
+
+    def changes(self, status: Optional[str] = None) -> Iterator[TagChange]:
+        """
+        Every added, removed and changed tag (or those of one `status`), by path.
+        """
+        for st in ([status] if status else list(self._QUERIES)):
+            for key, kind in self._db.execute(f"{self._QUERIES[st]} ORDER BY 1"):
+                yield TagChange(key.replace(_SEP, '/'), kind, st)
+
+    def write_delta(self, dest: Path) -> int:
+        """
+        Write the added and changed tags, nested in their folders, as an
+        export in the diffed format. Returns how many were written.
+        """
+        rows = self._db.execute("""
+            SELECT n.key, n.kind, n.body FROM rec n LEFT JOIN rec o ON o.side = 0 AND o.key = n.key
+            WHERE n.side = 1 AND (o.key IS NULL OR o.hash != n.hash)
+            ORDER BY n.key
+        """)
+        written = _write_export(Path(dest), self.format, rows)
+        logger.info("Wrote tag delta %s (%d entries)", dest, written)
+        return written
@@ -0,0 +1,450 @@
+# src/tag_inventory.py
+"""
+Streaming analysis of Ignition tag exports.
+
+A JSON or XML export is parsed incrementally (never loaded whole), its
+structure is checked, and a TagInventory is built: tag and folder counts,
+UDT definitions, UDT instances and data types. Inventories are cached on
+disk by content hash, so a file that was analyzed once is never parsed
+again. Malformed exports raise TagValidationError with the position of
+the problem, before any gateway is started.
+"""
+
+import json
+import logging
+import re
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+import perf
+from content_store import file_sha256
+from errors import TagValidationError
+from utils import read_json_cache, write_json_cache
+
+logger = logging.getLogger(__name__)
+
+# Cache directory, next to the stored exports (tags/.inventory/<sha256>.json)
+INVENTORY_DIR_NAME = '.inventory'
+# Bump when the inventory layout or the analysis changes
+INVENTORY_VERSION = 1
+
+_CHUNK = 1024 * 1024
+_MAX_WARNINGS = 20
+
+FOLDER_TYPES = {'Folder'}
+PROVIDER_TYPES = {'Provider'}
+# 8.x names and their 7.9 equivalents
+UDT_DEF_TYPES = {'UdtType', 'UDT_DEF'}
+UDT_INSTANCE_TYPES = {'UdtInstance', 'UDT_INST'}
+TYPES_FOLDER = '_types_'
+
+# Tag properties the inventory reads (8.x JSON/XML and 7.9 XML spellings)
+_DATA_TYPE_KEYS = ('dataType', 'DataType')
+_TYPE_ID_KEYS = ('typeId', 'UDTParentType')
+
+
+@dataclass
+class TagInventory:
+    """
+    What a tag export contains. `tags` counts tags outside UDT
+    definitions and instances; their members are counted in `udt_members`.
+    """
+    format: str
+    size: int
+    content_hash: str = ''
+    tags: int = 0
+    folders: int = 0
+    udt_definitions: List[str] = field(default_factory=list)
+    udt_instances: int = 0
+    udt_members: int = 0
+    data_types: Dict[str, int] = field(default_factory=dict)
+    max_depth: int = 0
+    warnings: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        """
+        One line for the GUI and logs.
+        """
+        top = sorted(self.data_types.items(), key=lambda kv: (-kv[1], kv[0]))[:4]
+        types = ', '.join(f"{name} {count:,}" for name, count in top)
+        text = (
+            f"{self.tags:,} tags in {self.folders:,} folders, "
+            f"{len(self.udt_definitions):,} UDTs ({self.udt_instances:,} instances)"
+        )
+        if types:
+            text += f"; {types}"
+        if self.warnings:
+            text += f"; {len(self.warnings)} warning(s)"
+        return text
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TagInventory':
+        return cls(**data)
+
+
+class _Collector:
+    """
+    Accumulates tags as the format walkers report them. `path` holds the
+    (name, tagType) of every open ancestor tag.
+    """
+
+    def __init__(self, inventory: TagInventory):
+        self.inv = inventory
+        self.path: List[Tuple[str, str]] = []
+        self.udt_defs: set = set()
+        # typeId -> first instance using it, to check references at the end
+        self.type_refs: Dict[str, str] = {}
+
+    def where(self, name: str = '') -> str:
+        parts = [n for n, _ in self.path if n] + ([name] if name else [])
+        return '/'.join(parts) or '(root)'
+
+    def warn(self, message: str) -> None:
+        if len(self.inv.warnings) < _MAX_WARNINGS:
+            self.inv.warnings.append(message)
+
+    def add(self, name: object, tag_type: Optional[str], data_type: Optional[str], type_id: Optional[str]) -> None:
+        if not isinstance(name, str) or not name:
+            raise TagValidationError(f"Tag without a name under '{self.where()}'")
+        inv = self.inv
+        inv.max_depth = max(inv.max_depth, len(self.path) + 1)
+        in_udt = any(t in UDT_DEF_TYPES or t in UDT_INSTANCE_TYPES for _, t in self.path)
+        if in_udt:
+            inv.udt_members += 1
+        elif tag_type in FOLDER_TYPES:
+            inv.folders += 1
+        elif tag_type in UDT_DEF_TYPES:
+            # Definitions may sit in folders below _types_; typeId uses that path
+            names = [n for n, _ in self.path if n]
+            if TYPES_FOLDER in names:
+                names = names[names.index(TYPES_FOLDER) + 1:]
+            key = '/'.join(names + [name])
+            self.udt_defs.add(key)
+            inv.udt_definitions.append(key)
+        elif tag_type in UDT_INSTANCE_TYPES:
+            inv.udt_instances += 1
+            if type_id:
+                self.type_refs.setdefault(str(type_id), self.where(name))
+            else:
+                self.warn(f"UDT instance '{self.where(name)}' has no type")
+        else:
+            inv.tags += 1
+            key = str(data_type) if data_type is not None else '(none)'
+            inv.data_types[key] = inv.data_types.get(key, 0) + 1
+
+    def finish(self) -> None:
+        self.inv.udt_definitions.sort()
+        for type_id, instance in sorted(self.type_refs.items()):
+            if type_id not in self.udt_defs and type_id.rsplit('/', 1)[-1] not in self.udt_defs:
+                # May exist on the gateway already; worth a look, not fatal
+                self.warn(f"UDT instance '{instance}' uses type '{type_id}', not defined in this export")
+
+
+# --- JSON ------------------------------------------------------------------
+
+# One token per match: punctuation, string, number or literal
+_TOKEN_RE = re.compile(
+    r'[ \t\n\r]*(?:([{}\[\]:,])|"((?:[^"\\]|\\.)*)"'
+    r'|(-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?)|(true|false|null))',
+    re.S,
+)
+_WS_RE = re.compile(r'[ \t\n\r]*')
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+# What the grammar allows next
+_VALUE, _VALUE_OR_END, _KEY, _KEY_OR_END, _COLON, _COMMA_OR_END, _DONE = range(7)
+_EXPECTED = {
+    _VALUE: "a value", _VALUE_OR_END: "a value or ']'", _KEY: "an object key",
+    _KEY_OR_END: "an object key or '}'", _COLON: "':'", _COMMA_OR_END: "',' or a closing bracket",
+    _DONE: "end of file",
+}
+
+
+def _scan_json(f: IO[str]) -> Iterator[Tuple[str, object]]:
+    """
+    Incremental JSON tokenizer producing ijson.basic_parse-style events
+    ('start_map', 'map_key', 'string', ...). Used when ijson is missing.
+    """
+    buf = ''
+    pos = 0
+    consumed = 0
+    eof = False
+    stack: List[str] = []
+    state = _VALUE
+    match = _TOKEN_RE.match
+
+    def fail(message: str):
+        at = consumed + _WS_RE.match(buf, pos).end()
+        raise TagValidationError(f"Invalid JSON at character {at}: {message}")
+
+    while True:
+        # Keep a margin so no number or literal is cut at the buffer end
+        if not eof and len(buf) - pos < 256:
+            chunk = f.read(_CHUNK)
+            consumed += pos
+            buf, pos = buf[pos:] + chunk, 0
+            eof = not chunk
+            continue
+        m = match(buf, pos)
+        if m is None:
+            at = _WS_RE.match(buf, pos).end()
+            if at >= len(buf):
+                if state != _DONE:
+                    fail("unexpected end of file")
+                return
+            if buf[at] != '"':
+                fail(f"unexpected character {buf[at]!r}, expected {_EXPECTED[state]}")
+            if eof:
+                fail("unterminated string")
+            # A string longer than what is buffered
+            chunk = f.read(_CHUNK)
+            eof = not chunk
+            buf += chunk
+            continue
+        punct, string, number, literal = m.groups()
+        if state == _DONE:
+            fail("trailing data after the top-level value")
+        if punct:
+            if punct == ',':
+                if state != _COMMA_OR_END:
+                    fail(f"unexpected ',', expected {_EXPECTED[state]}")
+                state = _KEY if stack[-1] == '{' else _VALUE
+            elif punct == ':':
+                if state != _COLON:
+                    fail(f"unexpected ':', expected {_EXPECTED[state]}")
+                state = _VALUE
+            elif punct in '{[':
+                if state not in (_VALUE, _VALUE_OR_END):
+                    fail(f"unexpected {punct!r}, expected {_EXPECTED[state]}")
+                stack.append(punct)
+                if punct == '{':
+                    yield 'start_map', None
+                    state = _KEY_OR_END
+                else:
+                    yield 'start_array', None
+                    state = _VALUE_OR_END
+            else:
+                opener = '{' if punct == '}' else '['
+                allowed = _KEY_OR_END if punct == '}' else _VALUE_OR_END
+                if not stack or stack[-1] != opener or state not in (allowed, _COMMA_OR_END):
+                    fail(f"unexpected {punct!r}, expected {_EXPECTED[state]}")
+                stack.pop()
+                yield ('end_map' if punct == '}' else 'end_array'), None
+                state = _COMMA_OR_END if stack else _DONE
+            pos = m.end()
+            continue
+
+        if string is not None:
+            text = json.loads(f'"{string}"') if '\\' in string else string
+            if state in (_KEY, _KEY_OR_END):
+                pos = m.end()
+                yield 'map_key', text
+                state = _COLON
+                continue
+            event, value = 'string', text
+        elif number is not None:
+            event = 'number'
+            value = float(number) if ('.' in number or 'e' in number or 'E' in number) else int(number)
+        else:
+            value = _LITERALS[literal]
+            event = 'null' if value is None else 'boolean'
+        if state not in (_VALUE, _VALUE_OR_END):
+            fail(f"unexpected value, expected {_EXPECTED[state]}")
+        pos = m.end()
+        yield event, value
+        state = _COMMA_OR_END if stack else _DONE
+
+
+def json_events(f: IO[bytes]) -> Iterator[Tuple[str, object]]:
+    """
+    basic_parse events from ijson (C backend when present), else the
+    pure-Python scanner. Both raise TagValidationError on bad input.
+    """
+    try:
+        import ijson
+    except ImportError:
+        import io
+        yield from _scan_json(io.TextIOWrapper(f, encoding='utf-8-sig', errors='strict'))
+        return
+    try:
+        yield from ijson.basic_parse(f, use_float=True)
+    except ijson.JSONError as e:
+        raise TagValidationError("Invalid JSON", underlying=e)
+
+
+def _walk_json(f: IO[bytes], col: _Collector) -> None:
+    """
+    Tags are the objects inside "tags" arrays (or a top-level array).
+    Only their scalar fields are kept, so memory stays bounded by depth.
+    """
+    # Frames: ['map', fields, key, is_tag, is_root] or ['array', holds_tags]
+    stack: list = []
+    for event, value in json_events(f):
+        top = stack[-1] if stack else None
+        if event == 'map_key':
+            top[2] = value
+        elif event == 'start_map':
+            is_tag = top is not None and top[0] == 'array' and top[1]
+            stack.append(['map', {}, None, is_tag or top is None, top is None])
+        elif event == 'end_map':
+            _, fields, _, is_tag, is_root = stack.pop()
+            if not is_tag:
+                continue
+            tag_type = fields.get('tagType')
+            if is_root and tag_type in (None, *PROVIDER_TYPES):
+                # The provider (or a bare {"tags": [...]}) is the container
+                continue
+            col.add(
+                fields.get('name'), tag_type,
+                next((fields[k] for k in _DATA_TYPE_KEYS if k in fields), None),
+                next((fields[k] for k in _TYPE_ID_KEYS if k in fields), None),
+            )
+        elif event == 'start_array':
+            if top is None:
+                stack.append(['array', True])
+            elif top[0] == 'map' and top[3] and top[2] == 'tags':
+                fields = top[1]
+                is_container = top[4] and fields.get('tagType') in (None, *PROVIDER_TYPES)
+                if not is_container:
+                    col.path.append((fields.get('name') or '', fields.get('tagType') or ''))
+                stack.append(['array', True, not is_container])
+            else:
+                stack.append(['array', False])
+        elif event == 'end_array':
+            frame = stack.pop()
+            if len(frame) == 3 and frame[2]:
+                col.path.pop()
+        elif top is None:
+            raise TagValidationError("Not a tag export: top-level value is not an object or array")
+        elif top[0] == 'map' and top[3] and top[2] in ('name', 'tagType', *_DATA_TYPE_KEYS, *_TYPE_ID_KEYS):
+            top[1][top[2]] = value
+        elif top[0] == 'array' and top[1]:
+            raise TagValidationError(f"Tag under '{col.where()}' is not an object")
+
+
+# --- XML -------------------------------------------------------------------
+
+def _walk_xml(f: IO[bytes], col: _Collector) -> None:
+    """
+    <Tags><Tag name=".." type=".."><Property name="dataType">..</Property>
+    <Tags>..</Tags></Tag></Tags>, for 8.x and 7.9 exports. Finished
+    elements are detached from their parents so memory stays bounded.
+    """
+    elements: List[ET.Element] = []
+    fields: List[Dict[str, str]] = []
+    root_seen = False
+    try:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if not root_seen:
+                    root_seen = True
+                    if elem.tag not in ('Tags', 'Tag'):
+                        raise TagValidationError(f"Not a tag export: root element is <{elem.tag}>")
+                if elem.tag == 'Tag':
+                    tag_type = elem.get('type') or ''
+                    name = elem.get('name')
+                    fields.append({'name': name, 'type': tag_type})
+                    col.path.append((name or '', tag_type))
+                elements.append(elem)
+                continue
+            elements.pop()
+            if elem.tag == 'Property' and fields and elements and elements[-1].tag == 'Tag':
+                key = elem.get('name')
+                if key in _DATA_TYPE_KEYS or key in _TYPE_ID_KEYS:
+                    fields[-1][key] = (elem.text or '').strip()
+            elif elem.tag == 'Tag':
+                col.path.pop()
+                tag = fields.pop()
+                if tag['type'] not in PROVIDER_TYPES:
+                    col.add(
+                        tag['name'], tag['type'],
+                        next((tag[k] for k in _DATA_TYPE_KEYS if k in tag), None),
+                        next((tag[k] for k in _TYPE_ID_KEYS if k in tag), None),
+                    )
+            # Done with this subtree
+            if elements:
+                elements[-1].remove(elem)
+            else:
+                elem.clear()
+    except ET.ParseError as e:
+        line, column = e.position
+        raise TagValidationError(f"Invalid XML at line {line}, column {column}", underlying=e)
+    if not root_seen:
+        raise TagValidationError("Empty tag export")
+
+
+# --- analysis and cache ----------------------------------------------------
+
+def tag_format(path: Path) -> str:
+    """
+    'json' or 'xml' by extension, as TagFile recognizes them.
+    """
+    suffix = path.suffix.lower()
+    if suffix not in ('.json', '.xml'):
+        raise TagValidationError(f"Unsupported tag file format: {suffix}")
+    return suffix[1:]
+
+
+def analyze(path: Path, content_hash: str = '') -> TagInventory:
+    """
+    Parse an export in one streaming pass and build its inventory.
+    """
+    fmt = tag_format(path)
+    inv = TagInventory(format=fmt, size=path.stat().st_size, content_hash=content_hash)
+    col = _Collector(inv)
+    with perf.span('tags.inventory', format=fmt, size=inv.size) as attrs:
+        try:
+            with open(path, 'rb') as f:
+                (_walk_json if fmt == 'json' else _walk_xml)(f, col)
+        except UnicodeDecodeError as e:
+            raise TagValidationError(f"Tag export {path.name} is not UTF-8 text", underlying=e)
+        col.finish()
+        attrs.update(tags=inv.tags, udts=len(inv.udt_definitions))
+    logger.info("Analyzed %s: %s", path.name, inv.summary())
+    return inv
+
+
+_memory: Dict[str, TagInventory] = {}
+_memory_lock = threading.Lock()
+
+
+def load_inventory(path: Path, cache_dir: Path, content_hash: Optional[str] = None) -> TagInventory:
+    """
+    Inventory of an export, from memory or `cache_dir` when this content
+    was seen before. Invalid exports are remembered too and raise
+    TagValidationError again without being re-parsed.
+    """
+    path = Path(path)
+    if not path.is_file():
+        raise TagValidationError(f"Tag file not found: {path}")
+    tag_format(path)
+    digest = content_hash or file_sha256(path)
+    with _memory_lock:
+        inv = _memory.get(digest)
+    if inv is not None:
+        return inv
+
+    cache_file = Path(cache_dir) / f"{digest}.json"
+    cached = read_json_cache(cache_file, INVENTORY_VERSION)
+    if cached is not None:
+        if 'error' in cached:
+            raise TagValidationError(cached['error'])
+        inv = TagInventory.from_dict(cached['inventory'])
+        logger.debug("Tag inventory of %s from cache", path.name)
+    else:
+        try:
+            inv = analyze(path, digest)
+        except TagValidationError as e:
+            message = f"{path.name}: {e}"
+            write_json_cache(cache_file, {'error': message}, INVENTORY_VERSION)
+            raise TagValidationError(message) from e
+        write_json_cache(cache_file, {'inventory': inv.to_dict()}, INVENTORY_VERSION)
+    with _memory_lock:
+        _memory[digest] = inv
+    return inv
@@ -1,9 +1,18 @@
 # src/utils.py
 
+import json
+import logging
+import re
 import shutil
-import zipfile
-import uuid
+import socket
 from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+import perf
+from content_store import store_for
+from project_sync import ProgressCallback, ProjectChangeset, sync_project_zip
+
+logger = logging.getLogger(__name__)
 
 # === Configure your repo root and subdirs here ===
 BASE_DIR       = Path(__file__).resolve().parent.parent
@@ -11,6 +20,9 @@ BACKUPS_DIR    = BASE_DIR / 'backups'
 PROJECTS_DIR   = BASE_DIR / 'projects'
 TAGS_DIR       = BASE_DIR / 'tags'
 GENERATED_DIR  = BASE_DIR / 'generated'
+FLEET_DIR      = GENERATED_DIR / 'fleet'
+
+_SLUG_RE = re.compile(r'[^a-z0-9_-]+')
 
 def ensure_directories():
     """
@@ -19,42 +31,41 @@ def ensure_directories():
     for d in (BACKUPS_DIR, PROJECTS_DIR, TAGS_DIR, GENERATED_DIR):
         d.mkdir(parents=True, exist_ok=True)
 
+@perf.timed('import.backup')
 def save_backup(src_path: str) -> str:
     """
-    Copy an uploaded gateway backup into backups/.
-    Returns the filename under backups/.
+    Import an uploaded gateway backup into the content store under backups/.
+    Identical content is only stored once; re-importing it is a no-op.
+    Returns the friendly filename under backups/.
     """
     ensure_directories()
     src = Path(src_path)
     if not src.is_file():
         raise FileNotFoundError(f"Backup file not found: {src}")
-    dest = BACKUPS_DIR / src.name
-    # avoid overwriting by adding a UUID suffix if needed
-    if dest.exists():
-        dest = BACKUPS_DIR / f"{src.stem}_{uuid.uuid4().hex}{src.suffix}"
-    shutil.copy(src, dest)
-    return dest.name
+    return store_for(BACKUPS_DIR).import_file(src)
 
+@perf.timed('import.tags')
 def save_tag_file(src_path: str) -> str:
     """
-    Copy an uploaded tag export (JSON or XML) into tags/.
-    Returns the filename under tags/.
+    Import an uploaded tag export (JSON or XML) into the content store under tags/.
+    Returns the friendly filename under tags/.
     """
     ensure_directories()
     src = Path(src_path)
     if not src.is_file():
         raise FileNotFoundError(f"Tag file not found: {src}")
-    dest = TAGS_DIR / src.name
-    if dest.exists():
-        dest = TAGS_DIR / f"{src.stem}_{uuid.uuid4().hex}{src.suffix}"
-    shutil.copy(src, dest)
-    return dest.name
+    return store_for(TAGS_DIR).import_file(src)
 
-def unzip_project(zip_path: str) -> str:
+def import_project(
+    zip_path: str,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Tuple[str, ProjectChangeset]:
     """
-    Unzip a project ZIP into projects/<ProjectName>/.
-    If that folder exists, it is removed first.
-    Returns the project name (zip filename stem).
+    Incrementally sync a project ZIP into projects/<ProjectName>/.
+    The archive is validated (manifest, path escapes, size limits) before
+    anything is written; only entries whose CRC/size changed are rewritten,
+    in parallel, and files missing from the ZIP are deleted.
+    Returns the project name (zip filename stem) and the changeset.
     """
     ensure_directories()
     src = Path(zip_path)
@@ -62,12 +73,17 @@ def unzip_project(zip_path: str) -> str:
         raise FileNotFoundError(f"Project ZIP not found: {src}")
     project_name = src.stem
     dest_dir = PROJECTS_DIR / project_name
-    # clear any existing folder for a clean import
-    if dest_dir.exists():
-        shutil.rmtree(dest_dir)
-    # extract all files
-    with zipfile.ZipFile(src, 'r') as zf:
-        zf.extractall(dest_dir)
+    with perf.span('import.project') as attrs:
+        changes = sync_project_zip(src, dest_dir, on_progress=on_progress)
+        attrs.update(written=len(changes.added) + len(changes.updated), unchanged=changes.unchanged)
+    return project_name, changes
+
+def unzip_project(zip_path: str) -> str:
+    """
+    Sync a project ZIP into projects/<ProjectName>/.
+    Returns the project name (zip filename stem).
+    """
+    project_name, _ = import_project(zip_path)
     return project_name
 
 def clear_generated():
@@ -80,3 +96,87 @@ def clear_generated():
             shutil.rmtree(item)
         else:
             item.unlink()
+
+def slugify(name: str) -> str:
+    """
+    Turn a gateway name into a valid compose project / container name.
+    """
+    slug = _SLUG_RE.sub('-', name.strip().lower()).strip('-_')
+    return slug or 'ignition'
+
+def format_size(size: float) -> str:
+    """
+    Byte count for people: "512 B", "1.5 MB".
+    """
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{int(size):,} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def read_json_cache(path: Path, version: int) -> Optional[dict]:
+    """
+    The object write_json_cache stored at `path` with this `version`;
+    None if it is missing, unreadable or from another version.
+    """
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and data.get('version') == version else None
+
+def write_json_cache(path: Path, data: dict, version: int) -> None:
+    """
+    Atomically store `data` (tagged with `version`) at `path`. Failures
+    are only logged: a cache miss just means analyzing again.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps(dict(data, version=version), separators=(',', ':')), encoding='utf-8')
+        tmp.replace(path)
+    except OSError as e:
+        logger.warning("Could not write cache file %s: %s", path, e)
+
+def find_free_port() -> int:
+    """
+    Ask the OS for an unused TCP port on the host.
+    """
+    with socket.socket() as s:
+        s.bind(('', 0))
+        return s.getsockname()[1]
+
+def is_port_free(port: int, timeout: float = 10) -> bool:
+    """
+    Return True if nothing is listening on localhost:<port>.
+    """
+    with socket.socket() as s:
+        s.settimeout(timeout)
+        return s.connect_ex(('127.0.0.1', port)) != 0
+
+def allocate_port_pairs(
+    count: int,
+    http_start: int = 8088,
+    https_start: int = 8043,
+    taken: Optional[Iterable[int]] = None,
+) -> List[Tuple[int, int]]:
+    """
+    Pick `count` (http, https) host port pairs, walking upwards from the
+    given start ports and skipping anything already in use or reserved.
+    """
+    used: Set[int] = set(taken or ())
+    pairs: List[Tuple[int, int]] = []
+    http, https = http_start, https_start
+
+    def _next(port: int) -> int:
+        while port in used or not is_port_free(port, timeout=0.2):
+            port += 1
+            if port > 65535:
+                raise RuntimeError("Ran out of host ports while allocating gateways")
+        used.add(port)
+        return port
+
+    for _ in range(count):
+        http = _next(http)
+        https = _next(https)
+        pairs.append((http, https))
+    return pairs
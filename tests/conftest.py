@@ -0,0 +1,8 @@
+# tests/conftest.py
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# The app's modules import each other as top-level modules (see src/gui.py)
+sys.path.insert(0, str(ROOT / 'src'))
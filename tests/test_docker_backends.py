@@ -0,0 +1,216 @@
+# tests/test_docker_backends.py
+"""
+CliBackend and EngineBackend against tools/fake_docker.py: the CLI
+backend runs it as `docker`, the Engine backend talks to its
+`engine-api` unix socket. Both see the same fake container.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from docker_backends import CliBackend, EngineBackend, compose_project_name, parse_timestamp
+
+ROOT = Path(__file__).resolve().parent.parent
+FAKE_DOCKER = ROOT / 'tools' / 'fake_docker.py'
+SERVICE = 'ignition-dev'
+
+COMPOSE = """\
+services:
+  ignition-dev:
+    image: inductiveautomation/ignition:8.1.33
+    container_name: backend-test
+    labels:
+      ignition-admin.fingerprint: "abc123"
+"""
+
+
+def wait_for(predicate, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(0.05)
+    raise AssertionError("timed out waiting for condition")
+
+
+@pytest.fixture
+def fake_env(tmp_path, monkeypatch):
+    env = {
+        'FAKE_DOCKER_STATE': str(tmp_path / 'state'),
+        # A quiet gateway: 20 lines, one stack trace, no HTTP server
+        'FAKE_DOCKER_BURST_LINES': '20',
+        'FAKE_DOCKER_TRACE_EVERY': '10',
+        'FAKE_DOCKER_TRACE_DEPTH': '2',
+        'FAKE_DOCKER_RATE': '0',
+        'FAKE_DOCKER_STARTUP': '0',
+        'FAKE_DOCKER_HTTP': 'false',
+    }
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    return env
+
+
+@pytest.fixture
+def container(tmp_path, fake_env):
+    """
+    A running fake gateway; yields the compose base command.
+    """
+    compose_file = tmp_path / 'docker-compose.yml'
+    compose_file.write_text(COMPOSE, encoding='utf-8')
+    base = [sys.executable, str(FAKE_DOCKER), 'compose', '-f', str(compose_file), '-p', 'backendtest']
+    subprocess.run(base + ['up', '-d'], check=True, capture_output=True)
+    log = tmp_path / 'state' / 'projects' / 'backendtest' / 'container.log'
+    wait_for(lambda: log.is_file() and len(log.read_text().splitlines()) > 20)
+    yield base
+    subprocess.run(base + ['down', '-v'], capture_output=True)
+
+
+@pytest.fixture
+def engine_socket(fake_env):
+    # Unix socket paths are limited to ~100 bytes; keep it out of tmp_path
+    sock_dir = tempfile.mkdtemp(prefix='fde-')
+    sock = Path(sock_dir) / 'docker.sock'
+    proc = subprocess.Popen(
+        [sys.executable, str(FAKE_DOCKER), 'engine-api', str(sock)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(sock.exists)
+        yield f'unix://{sock}'
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        sock.unlink(missing_ok=True)
+        os.rmdir(sock_dir)
+
+
+@pytest.fixture(params=['cli', 'engine'])
+def backend(request, container, tmp_path):
+    if request.param == 'cli':
+        return CliBackend(lambda: list(container), SERVICE, tmp_path)
+    base_url = request.getfixturevalue('engine_socket')
+    return EngineBackend('backendtest', SERVICE, base_url=base_url)
+
+
+def collect_records(backend, count: int, tail: str = 'all', since=None):
+    records = []
+    stop = threading.Event()
+
+    def on_record(rec):
+        records.append(rec)
+        if len(records) >= count:
+            stop.set()
+    t = threading.Thread(target=backend.stream_records, args=(on_record, stop), kwargs={'tail': tail, 'since': since})
+    t.start()
+    t.join(timeout=15)
+    stop.set()
+    assert not t.is_alive(), "stream did not end after stop"
+    return records
+
+
+def test_compose_project_name_normalizes_directory(tmp_path):
+    compose_file = tmp_path / 'My Gateway.01' / 'docker-compose.yml'
+    compose_file.parent.mkdir()
+    assert compose_project_name(compose_file, None) == 'mygateway01'
+    assert compose_project_name(compose_file, 'Plant_A') == 'plant_a'
+
+
+def test_parse_timestamp():
+    assert parse_timestamp('2024-05-10T14:22:41.123456789Z') == pytest.approx(1715350961.123456)
+    assert parse_timestamp('2024-05-10T16:22:41+02:00') == 1715350961.0
+    assert parse_timestamp('0001-01-01T00:00:00Z') is None
+    assert parse_timestamp(None) is None
+    assert parse_timestamp('yesterday') is None
+
+
+def test_container_info_running(backend):
+    info = backend.container_info()
+    assert info['state'] == 'running'
+    assert info['exit_code'] == 0
+    assert info['labels']['ignition-admin.fingerprint'] == 'abc123'
+    if backend.name == 'engine':
+        assert info['started_at']
+
+
+def test_container_info_absent(fake_env, tmp_path, request):
+    cli = CliBackend(
+        lambda: [sys.executable, str(FAKE_DOCKER), 'compose', '-p', 'missing'], SERVICE, tmp_path,
+    )
+    assert cli.container_info()['state'] == 'absent'
+    engine = EngineBackend('missing', SERVICE, base_url=request.getfixturevalue('engine_socket'))
+    assert engine.container_info()['state'] == 'absent'
+
+
+def test_stop_and_start(backend):
+    backend.stop(timeout=5)
+    assert backend.container_state() == 'exited'
+    backend.start()
+    assert backend.container_state() == 'running'
+
+
+def test_stream_records_keeps_timestamps(backend):
+    records = collect_records(backend, 20)
+    assert len(records) >= 20
+    assert all(rec.timestamp and rec.timestamp.endswith('Z') for rec in records)
+    assert 'Starting up backend-test' in records[0].text
+    assert not any(rec.text.startswith('20') for rec in records), "timestamp left in the text"
+
+
+def test_stream_records_tail(backend):
+    records = collect_records(backend, 3, tail='3')
+    assert len(records) == 3
+    assert 'Starting up' not in records[0].text
+
+
+def test_stream_records_since(backend):
+    # The startup line is written before the burst, with an earlier stamp
+    _, burst = sorted({rec.time for rec in collect_records(backend, 21)})[:2]
+    records = collect_records(backend, 5, since=burst)
+    assert len(records) >= 5
+    assert all(rec.time >= burst for rec in records)
+    assert not any('Starting up' in rec.text for rec in records)
+
+
+def test_engine_demultiplexes_stderr(container, engine_socket):
+    backend = EngineBackend('backendtest', SERVICE, base_url=engine_socket)
+    records = collect_records(backend, 24)
+    errors = [rec for rec in records if rec.stream == 'stderr']
+    assert errors and all('| E [' in rec.text for rec in errors)
+    assert {rec.stream for rec in records} == {'stdout', 'stderr'}
+
+
+def test_stream_ends_when_container_stops(backend, container):
+    stop = threading.Event()
+    records = []
+    t = threading.Thread(target=backend.stream_records, args=(records.append, stop))
+    t.start()
+    wait_for(lambda: len(records) >= 20)
+    subprocess.run(container + ['stop'], check=True, capture_output=True)
+    t.join(timeout=15)
+    stop.set()
+    assert not t.is_alive()
+    assert 'Gateway shutting down' in records[-1].text
+
+
+def test_events_report_die(backend, container):
+    stop = threading.Event()
+    events = []
+    t = threading.Thread(target=backend.events, args=(events.append, stop))
+    t.start()
+    # Give the subscription time to take its first look at the state
+    time.sleep(0.5)
+    subprocess.run(container + ['stop'], check=True, capture_output=True)
+    event = wait_for(lambda: next(iter(events), None))
+    stop.set()
+    t.join(timeout=15)
+    assert not t.is_alive()
+    action = event.get('Action') if backend.name == 'engine' else event.get('action')
+    assert action == 'die'